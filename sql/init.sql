@@ -33,6 +33,10 @@ CREATE TABLE IF NOT EXISTS stock_latest (
     price DECIMAL(18,6),
     bid DECIMAL(18,6),
     ask DECIMAL(18,6),
+    previous_close DECIMAL(18,6),
+    volume BIGINT,
+    market_cap BIGINT,
+    market_state VARCHAR(16),
     timestamp DATETIME,
     fetched_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     
@@ -40,6 +44,39 @@ CREATE TABLE IF NOT EXISTS stock_latest (
     INDEX idx_latest_fetched_at (fetched_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Intraday OHLCV bars (bar start in UTC); 1m bars are rolled up into 5m, then 1h, as they age
+CREATE TABLE IF NOT EXISTS stock_intraday (
+    ticker VARCHAR(16) NOT NULL,
+    bar_interval ENUM('1m', '5m', '1h') NOT NULL,
+    ts DATETIME NOT NULL,
+    open DECIMAL(18,6),
+    high DECIMAL(18,6),
+    low DECIMAL(18,6),
+    close DECIMAL(18,6),
+    volume BIGINT,
+    fetched_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (ticker, bar_interval, ts),
+    
+    INDEX idx_intraday_interval_ts (bar_interval, ts)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Per-ticker indicator snapshot, updated in the same transaction as stock_daily / alert_history writes
+CREATE TABLE IF NOT EXISTS stock_indicator_snapshot (
+    ticker VARCHAR(16) PRIMARY KEY,
+    latest_date DATE,
+    earliest_date DATE,
+    row_count INT NOT NULL DEFAULT 0,
+    latest_close DECIMAL(18,6),
+    avg_7 DECIMAL(18,6),
+    avg_30 DECIMAL(18,6),
+    avg_90 DECIMAL(18,6),
+    last_alert_type VARCHAR(16),
+    last_alert_price DECIMAL(18,6),
+    last_alert_at DATETIME,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- System status table for monitoring
 CREATE TABLE IF NOT EXISTS system_status (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -67,9 +104,10 @@ CREATE TABLE IF NOT EXISTS alert_history (
     percent_difference DECIMAL(10,4) NOT NULL,
     sent_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     
-    INDEX idx_ticker (ticker),
+    INDEX idx_alert_ticker (ticker),
     INDEX idx_alert_type (alert_type),
-    INDEX idx_sent_at (sent_at)
+    INDEX idx_sent_at (sent_at),
+    INDEX idx_alert_dedup (ticker, alert_type, sent_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Custom watchlist table for user-defined companies to monitor
@@ -81,8 +119,9 @@ CREATE TABLE IF NOT EXISTS watchlist (
     added_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     is_active BOOLEAN DEFAULT TRUE,
     notes TEXT,
+    updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
     
-    INDEX idx_ticker (ticker),
+    INDEX idx_watchlist_ticker (ticker),
     INDEX idx_sector (sector),
     INDEX idx_active (is_active),
     INDEX idx_added_at (added_at)
@@ -122,12 +161,16 @@ SELECT
     s.ticker,
     s.price as current_price,
     s.fetched_at as last_price_update,
-    COUNT(h.id) as historical_records,
-    MAX(h.date) as latest_historical_date,
-    MIN(h.date) as earliest_historical_date
+    COALESCE(i.row_count, 0) as historical_records,
+    i.latest_date as latest_historical_date,
+    i.earliest_date as earliest_historical_date,
+    i.avg_7,
+    i.avg_30,
+    i.avg_90,
+    i.last_alert_type,
+    i.last_alert_at
 FROM stock_latest s
-LEFT JOIN stock_daily h ON s.ticker = h.ticker
-GROUP BY s.ticker, s.price, s.fetched_at;
+LEFT JOIN stock_indicator_snapshot i ON s.ticker = i.ticker;
 
 CREATE OR REPLACE VIEW v_recent_alerts AS
 SELECT 
@@ -160,5 +203,7 @@ SHOW TABLES;
 -- Show table structure
 DESCRIBE stock_daily;
 DESCRIBE stock_latest;
+DESCRIBE stock_intraday;
+DESCRIBE stock_indicator_snapshot;
 DESCRIBE system_status;
 DESCRIBE alert_history;
@@ -0,0 +1,82 @@
+import logging
+import threading
+from datetime import datetime, time, timedelta, timezone
+from typing import Any, Optional, Set, Tuple
+
+import pytz
+
+logger = logging.getLogger(__name__)
+
+
+class AlertLedger:
+    """
+    In-memory record of the alerts sent in the current alert session.
+
+    A session starts at session_open in session_timezone (09:00 Vienna by
+    default), which is when alerts become eligible again. The ledger loads the
+    session's alerts from alert_history in one query, answers duplicate checks
+    from a set, and is written through whenever saved alerts are committed.
+    Crossing the session boundary reloads it, which clears the previous session.
+    """
+
+    def __init__(self, db_manager: Any, session_timezone: str = 'Europe/Vienna', session_open: time = time(9, 0)):
+        self.db = db_manager
+        self.session_timezone = pytz.timezone(session_timezone)
+        self.session_open = session_open
+
+        self._lock = threading.Lock()
+        self._session_start: Optional[datetime] = None
+        self._sent: Set[Tuple[str, str]] = set()
+
+    def session_start(self, now: Optional[datetime] = None) -> datetime:
+        """Start of the current alert session as a naive UTC datetime."""
+        local_now = (now or datetime.now(timezone.utc)).astimezone(self.session_timezone)
+        local_open = self.session_timezone.localize(datetime.combine(local_now.date(), self.session_open))
+
+        # Before today's open the previous session is still running
+        if local_now < local_open:
+            local_open = self.session_timezone.localize(
+                datetime.combine(local_now.date() - timedelta(days=1), self.session_open)
+            )
+
+        return local_open.astimezone(timezone.utc).replace(tzinfo=None)
+
+    def already_sent(self, ticker: str, alert_type: str) -> bool:
+        self._ensure_session()
+        with self._lock:
+            return (ticker, alert_type) in self._sent
+
+    def record(self, ticker: str, alert_type: str) -> None:
+        try:
+            self._ensure_session()
+        except Exception as e:
+            # The alert is already in alert_history, so the next load picks it up
+            logger.warning(f"Alert ledger not updated for {ticker} {alert_type}: {e}")
+            return
+
+        with self._lock:
+            self._sent.add((ticker, alert_type))
+
+    def invalidate(self) -> None:
+        """Drop the ledger so the next check reloads it from alert_history."""
+        with self._lock:
+            self._session_start = None
+            self._sent = set()
+
+    def _ensure_session(self) -> None:
+        session_start = self.session_start()
+
+        with self._lock:
+            if self._session_start == session_start:
+                return
+
+        sent = self.db.get_alerts_since(session_start)
+        if sent is None:
+            # Leave the ledger unloaded so the next check retries the query
+            raise RuntimeError("Could not load alert history for the current session")
+
+        with self._lock:
+            self._session_start = session_start
+            self._sent = set(sent)
+
+        logger.info(f"Alert ledger loaded {len(sent)} alerts sent since {session_start:%Y-%m-%d %H:%M} UTC")
@@ -14,11 +14,12 @@ logger = logging.getLogger(__name__)
 
 class TelegramAlertSystem:
     
-    def __init__(self, bot_token: str, chat_id: str, db_manager=None):
+    def __init__(self, bot_token: str, chat_id: str, db_manager=None, data_fetcher=None):
         self.bot_token = bot_token
         self.chat_id = chat_id
         self.base_url = f"https://api.telegram.org/bot{bot_token}"
         self.db_manager = db_manager
+        self.data_fetcher = data_fetcher
         self.last_update_id = 0
         self.bot_running = False
         self.bot_thread = None
@@ -864,11 +865,13 @@ Below: ${detail['difference']:.2f} ({detail['percentage']:.2f}%)"""
                 self.send_message(f"❌ Invalid ticker format: {ticker}\n\nTicker should contain only letters, numbers, dots, and dashes (max 16 characters)")
                 return
             
-            # Try to get company info from Yahoo Finance
+            # Try to get company info from Yahoo Finance (through the metadata cache when available)
             try:
-                import yfinance as yf
-                stock = yf.Ticker(ticker)
-                info = stock.info
+                if self.data_fetcher:
+                    info = self.data_fetcher.get_ticker_info(ticker, 'static')
+                else:
+                    import yfinance as yf
+                    info = yf.Ticker(ticker).info
                 company_name = info.get('longName', info.get('shortName', ticker))
                 sector = info.get('sector', 'Unknown')
             except:
@@ -884,6 +887,10 @@ Below: ${detail['difference']:.2f} ({detail['percentage']:.2f}%)"""
             )
             
             if success:
+                if self.data_fetcher:
+                    # Give a re-added ticker a clean slate
+                    self.data_fetcher.circuit_breaker.reset(ticker)
+                
                 message = f"✅ <b>Added to Watchlist</b>\n\n"
                 message += f"🏢 <b>{ticker}</b> - {company_name}\n"
                 message += f"📂 Sector: {sector}\n"
@@ -951,6 +958,32 @@ Below: ${detail['difference']:.2f} ({detail['percentage']:.2f}%)"""
             if watchlist:
                 tickers = [item['ticker'] for item in watchlist]
                 message += f"🏢 <b>Monitored Stocks:</b>\n{', '.join(tickers)}\n\n"
+                
+                snapshots = self.db_manager.get_indicator_snapshots(tickers)
+                if snapshots:
+                    message += f"📉 <b>Indicators:</b>\n"
+                    for ticker in tickers:
+                        snapshot = snapshots.get(ticker)
+                        if not snapshot or not snapshot['row_count']:
+                            continue
+                        averages = ' / '.join(
+                            f"${snapshot['averages'][period]:.2f}" if snapshot['averages'][period] is not None else "-"
+                            for period in (7, 30, 90)
+                        )
+                        message += f"   • <b>{ticker}</b> - {snapshot['row_count']} days to {snapshot['latest_date']}, 7/30/90d {averages}"
+                        if snapshot['last_alert_at']:
+                            message += f", last alert {snapshot['last_alert_type']} {snapshot['last_alert_at']:%m-%d %H:%M}"
+                        message += "\n"
+                    message += "\n"
+            
+            if self.data_fetcher:
+                quarantined = self.data_fetcher.circuit_breaker.get_quarantined()
+                if quarantined:
+                    message += f"⛔ <b>Quarantined Tickers:</b> {len(quarantined)}\n"
+                    for item in quarantined:
+                        retry_text = "probing" if item['state'] == 'half_open' else f"retry in {item['retry_in_seconds'] / 60:.0f} min"
+                        message += f"   • <b>{item['ticker']}</b> - {item['failures']} failures, {retry_text}\n"
+                    message += "\n"
             
             message += f"🕐 <b>Status Time:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}\n\n"
             message += f"💡 Use <code>help</code> to see available commands"
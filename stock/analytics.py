@@ -9,9 +9,13 @@ logger = logging.getLogger(__name__)
 
 class StockAnalytics:
     
-    def __init__(self, database_manager):
+    def __init__(self, database_manager, rolling_averages=None, alert_ledger=None):
         self.db = database_manager
+        # Optional AlertLedger answering duplicate checks from memory
+        self.alert_ledger = alert_ledger
         self.average_periods = [7, 30, 90]  
+        # Optional RollingAverageEngine; the database is used for anything it cannot answer
+        self.rolling_averages = rolling_averages
     
     def check_alert_already_sent_today(self, ticker: str, alert_type: str) -> bool:
         """
@@ -32,6 +36,14 @@ class StockAnalytics:
                 logger.error("Database manager not available")
                 return False
             
+            if self.alert_ledger is not None:
+                try:
+                    already_sent = self.alert_ledger.already_sent(ticker, alert_type)
+                    logger.debug(f"Alert ledger: {ticker} {alert_type} {'already sent' if already_sent else 'eligible'} this session")
+                    return already_sent
+                except Exception as e:
+                    logger.warning(f"Alert ledger unavailable, checking database: {e}")
+            
             # Calculate the current market session start time
             # Market opens at 09:00 Vienna time (Europe/Vienna timezone)
             from datetime import timezone, timedelta
@@ -64,7 +76,7 @@ class StockAnalytics:
             """
             
             try:
-                with self.db.engine.connect() as conn:
+                with self.db.connection() as conn:
                     from sqlalchemy import text
                     # Use market open time instead of calendar day
                     params = {"ticker": ticker, "alert_type": alert_type, "market_open": market_open_utc}
@@ -91,28 +103,43 @@ class StockAnalytics:
         try:
             logger.info(f"Calculating averages for {ticker}")
             
-            averages = {}
-            for period in self.average_periods:
-                avg_value = self.db.get_trading_day_averages(ticker, period)
-                averages[f'average_{period}'] = avg_value
-                
-                if avg_value:
-                    logger.debug(f"{ticker} {period}-day average: ${avg_value:.2f}")
-                else:
-                    logger.warning(f"{ticker} {period}-day average: insufficient data")
-            
-            return averages
+            return self.calculate_averages_for_all_tickers([ticker]).get(
+                ticker, {f'average_{period}': None for period in self.average_periods}
+            )
             
         except Exception as e:
             logger.error(f"Error calculating averages for {ticker}: {e}")
             return {f'average_{period}': None for period in self.average_periods}
     
     def calculate_averages_for_all_tickers(self, tickers: List[str]) -> Dict[str, Dict[str, Optional[float]]]:
+        batch = {}
+        if self.rolling_averages is not None:
+            try:
+                batch = self.rolling_averages.get_averages(tickers)
+            except Exception as e:
+                logger.warning(f"Rolling averages unavailable, using database: {e}")
+        
+        # Then the per-ticker snapshot rows, and anything else from one ranked query
+        missing = [ticker for ticker in tickers if ticker not in batch]
+        if missing and set(self.average_periods) <= {7, 30, 90}:
+            snapshots = self.db.get_indicator_snapshots(missing)
+            batch.update({ticker: snapshot['averages'] for ticker, snapshot in snapshots.items()})
+            missing = [ticker for ticker in missing if ticker not in batch]
+        if missing:
+            batch.update(self.db.get_moving_averages(missing, self.average_periods))
         all_averages = {}
         
         for ticker in tickers:
-            logger.info(f"Processing {ticker} ({tickers.index(ticker) + 1}/{len(tickers)})")
-            averages = self.calculate_averages_for_ticker(ticker)
+            averages = {}
+            for period in self.average_periods:
+                avg_value = batch.get(ticker, {}).get(period)
+                averages[f'average_{period}'] = avg_value
+                
+                if avg_value:
+                    logger.debug(f"{ticker} {period}-day average: ${avg_value:.2f}")
+                else:
+                    logger.warning(f"{ticker} {period}-day average: insufficient data")
+            
             all_averages[ticker] = averages
         
         logger.info(f"Calculated averages for {len(all_averages)} tickers")
@@ -269,14 +296,16 @@ class StockAnalytics:
             logger.error(f"Error getting performance summary for {ticker}: {e}")
             return None
 
-    def analyze_single_ticker(self, ticker: str) -> Optional[Dict[str, Any]]:
+    def analyze_single_ticker(self, ticker: str, averages: Optional[Dict[str, Optional[float]]] = None) -> Optional[Dict[str, Any]]:
+        """Analyze one ticker; pass `averages` from calculate_averages_for_all_tickers to skip the query."""
         try:
             current_price = self.db.get_current_price(ticker)
             if current_price is None:
                 logger.warning(f"No current price data for {ticker}")
                 return None
             
-            averages = self.calculate_averages_for_ticker(ticker)
+            if averages is None:
+                averages = self.calculate_averages_for_ticker(ticker)
             if not averages:
                 logger.warning(f"No moving averages available for {ticker}")
                 return None
@@ -0,0 +1,167 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TickerCircuitBreaker:
+    """
+    Per-ticker circuit breaker that quarantines symbols which keep failing.
+
+    A ticker opens after `failure_threshold` consecutive failed cycles and is
+    skipped until its cooldown expires. The next call is then let through as a
+    single half-open probe: success closes the circuit, failure re-opens it with
+    a doubled cooldown (capped at max_cooldown_seconds). State is persisted to a
+    JSON file so quarantines survive restarts.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    PROBE_TIMEOUT_SECONDS = 600
+
+    def __init__(self, path: Optional[str] = None, failure_threshold: int = 3,
+                 base_cooldown_seconds: int = 900, max_cooldown_seconds: int = 86400):
+        self.path = path
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_cooldown_seconds = base_cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+
+        self._lock = threading.Lock()
+        self._states: Dict[str, Dict[str, Any]] = self._load()
+
+    def allow(self, ticker: str) -> bool:
+        """Return True if a request for this ticker should be attempted now."""
+        with self._lock:
+            state = self._states.get(ticker)
+            if state is None or state['state'] == self.CLOSED:
+                return True
+
+            now = time.time()
+            if state['state'] == self.HALF_OPEN:
+                # Only one probe at a time, unless the last one never reported back
+                if now - state.get('probe_started_at', 0) < self.PROBE_TIMEOUT_SECONDS:
+                    return False
+                state['probe_started_at'] = now
+                return True
+
+            if now >= state['opened_at'] + state['cooldown']:
+                state['state'] = self.HALF_OPEN
+                state['probe_started_at'] = now
+                self._save()
+                logger.info(f"Circuit half-open for {ticker} - probing")
+                return True
+
+            return False
+
+    def is_quarantined(self, ticker: str) -> bool:
+        """
+        Return True if the ticker's circuit is open or half-open. Unlike allow()
+        this never claims the half-open probe, for callers that do not report
+        an outcome.
+        """
+        with self._lock:
+            state = self._states.get(ticker)
+            return state is not None and state['state'] != self.CLOSED
+
+    def record_success(self, ticker: str) -> None:
+        with self._lock:
+            state = self._states.pop(ticker, None)
+            if state is not None:
+                if state['state'] != self.CLOSED:
+                    logger.info(f"Circuit closed for {ticker} after successful probe")
+                self._save()
+
+    def record_failure(self, ticker: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            now = time.time()
+            state = self._states.setdefault(ticker, {
+                'state': self.CLOSED,
+                'failures': 0,
+                'opened_at': None,
+                'cooldown': 0,
+                'last_error': None
+            })
+            state['failures'] += 1
+            state['last_error'] = error
+            state['last_failure_at'] = now
+
+            if state['state'] == self.HALF_OPEN:
+                state['state'] = self.OPEN
+                state['opened_at'] = now
+                state['cooldown'] = min(self.max_cooldown_seconds, max(self.base_cooldown_seconds, state['cooldown'] * 2))
+                logger.warning(f"Probe failed for {ticker} - circuit re-opened for {state['cooldown'] / 60:.0f} minutes")
+            elif state['state'] == self.CLOSED and state['failures'] >= self.failure_threshold:
+                state['state'] = self.OPEN
+                state['opened_at'] = now
+                state['cooldown'] = self.base_cooldown_seconds
+                logger.warning(
+                    f"Circuit opened for {ticker} after {state['failures']} consecutive failures - "
+                    f"quarantined for {state['cooldown'] / 60:.0f} minutes"
+                )
+
+            self._save()
+
+    def reset(self, ticker: str) -> None:
+        with self._lock:
+            if self._states.pop(ticker, None) is not None:
+                self._save()
+
+    def get_quarantined(self) -> List[Dict[str, Any]]:
+        """List tickers whose circuit is open or half-open, soonest retry first."""
+        now = time.time()
+        with self._lock:
+            quarantined = [
+                {
+                    'ticker': ticker,
+                    'state': state['state'],
+                    'failures': state['failures'],
+                    'retry_in_seconds': max(0, state['opened_at'] + state['cooldown'] - now),
+                    'last_error': state.get('last_error')
+                }
+                for ticker, state in self._states.items()
+                if state['state'] != self.CLOSED
+            ]
+        return sorted(quarantined, key=lambda item: item['retry_in_seconds'])
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+
+        try:
+            with open(self.path, 'r') as file:
+                states = json.load(file)
+
+            # A probe interrupted by a restart is treated as still open
+            for state in states.values():
+                if state.get('state') == self.HALF_OPEN:
+                    state['state'] = self.OPEN
+
+            logger.info(f"Loaded circuit breaker state for {len(states)} tickers")
+            return states
+
+        except Exception as e:
+            logger.warning(f"Could not load circuit breaker state from {self.path}: {e}")
+            return {}
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as file:
+                json.dump(self._states, file)
+            os.replace(tmp_path, self.path)
+
+        except Exception as e:
+            logger.warning(f"Could not persist circuit breaker state: {e}")
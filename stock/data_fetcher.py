@@ -1,25 +1,128 @@
 
 import logging
+import threading
 import time
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, date, timedelta
+from typing import List, Dict, Optional, Tuple, Any, Callable, Iterator
 import pandas as pd
-import yfinance as yf
-import requests
+import pytz
+
+from stock.circuit_breaker import TickerCircuitBreaker
+from stock.metadata_cache import TickerMetadataCache
+from stock.providers import MarketDataProvider, YahooFinanceProvider
+from stock.rate_limiter import TokenBucketRateLimiter
+from stock.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
 
 class StockDataFetcher:
     
-    def __init__(self, retry_attempts: int = 3, backoff_seconds: int = 5):
+    # Yahoo serves 1m bars for the last 30 days, at most 7 days per request
+    INTRADAY_LOOKBACK = timedelta(days=7)
+    
+    def __init__(self, retry_attempts: int = 3, backoff_seconds: int = 5, batch_size: int = 50,
+                 max_workers: int = 4, requests_per_second: float = 2.0, burst: int = 5,
+                 metadata_cache: Optional[TickerMetadataCache] = None,
+                 provider: Optional[MarketDataProvider] = None,
+                 circuit_breaker: Optional[TickerCircuitBreaker] = None,
+                 intraday_store: Optional[Any] = None):
         self.retry_attempts = retry_attempts
         self.backoff_seconds = backoff_seconds
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        
+        # Shared across all workers in place of fixed per-ticker sleeps
+        self.rate_limiter = TokenBucketRateLimiter(requests_per_second, burst)
+        
+        self.metadata_cache = metadata_cache or TickerMetadataCache()
+        self.provider = provider or YahooFinanceProvider()
+        self.circuit_breaker = circuit_breaker or TickerCircuitBreaker()
+        
+        # Scheduler jobs and the bot thread often ask for the same ticker at once
+        self.single_flight = SingleFlight()
+        
+        # Anything with DatabaseManager's get_last_intraday_timestamps / insert_intraday_bars /
+        # get_intraday_bars; when set, live 1m bars are fetched incrementally and kept
+        self.intraday_store = intraday_store
+        
+        # Previous close only changes once per session: {ticker: (session date, close)}
+        self._previous_close_cache: Dict[str, Tuple[date, float]] = {}
+        self._previous_close_lock = threading.Lock()
         
         self.fallback_automotive_tickers = [
             'TSLA', 'TM', 'F', 'GM', 'BMW3.DE', 'MBGYY', 'VWAGY', 'HMC', 'NSANY', 'RACE'
         ]
     
+    def get_ticker_info(self, ticker: str, *field_classes: str, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Get Ticker.info fields through the metadata cache.
+        
+        field_classes selects which TTL classes must be fresh ('static',
+        'market_cap', 'quote'); defaults to static metadata only.
+        """
+        return self.metadata_cache.get_info(
+            ticker,
+            field_classes or ('static',),
+            self._load_ticker_info,
+            refresh=refresh
+        )
+    
+    def _load_ticker_info(self, ticker: str) -> Optional[Dict[str, Any]]:
+        def fetch():
+            self.rate_limiter.acquire()
+            return self.provider.get_info(ticker)
+        
+        return self._coalesce(('info', ticker), fetch)
+    
+    def _get_history(self, ticker: str, rate_limited: bool = False, **kwargs) -> pd.DataFrame:
+        key = ('history', ticker) + tuple((name, self._flight_value(value)) for name, value in sorted(kwargs.items()))
+        
+        def fetch():
+            if rate_limited:
+                self.rate_limiter.acquire()
+            return self.provider.get_history(ticker, **kwargs)
+        
+        return self._coalesce(key, fetch)
+    
+    def _download_history(self, tickers: List[str], start: Any, end: Any, interval: str = '1d') -> Dict[str, pd.DataFrame]:
+        key = ('download', tuple(tickers), self._flight_value(start), self._flight_value(end), interval)
+        
+        def fetch():
+            # One chart request per symbol goes out underneath
+            for _ in tickers:
+                self.rate_limiter.acquire()
+            return self.provider.download_history(tickers, start=start, end=end, interval=interval)
+        
+        return self._coalesce(key, fetch)
+    
+    def _get_quotes(self, tickers: List[str]) -> List[Dict[str, Any]]:
+        def fetch():
+            self.rate_limiter.acquire()
+            return self.provider.get_quotes(tickers)
+        
+        return self._coalesce(('quotes', tuple(tickers)), fetch)
+    
+    def _coalesce(self, key: Tuple, fetch: Callable[[], Any]) -> Any:
+        result, shared = self.single_flight.do(key, fetch)
+        if not shared:
+            return result
+        
+        # Callers that joined an in-flight request get their own frames to modify
+        if isinstance(result, pd.DataFrame):
+            return result.copy()
+        if isinstance(result, dict):
+            return {k: v.copy() if isinstance(v, pd.DataFrame) else v for k, v in result.items()}
+        return result
+    
+    @staticmethod
+    def _flight_value(value: Any) -> Any:
+        # Range ends are usually "now", so requests within the same minute count as identical
+        if isinstance(value, datetime):
+            return pd.Timestamp(value).floor('min')
+        return value
+    
     def get_top_automotive_stocks(self, count: int = 10) -> List[str]:
         try:
             logger.info("Fetching top automotive stocks by market cap...")
@@ -51,8 +154,7 @@ class StockDataFetcher:
             
             for ticker in known_automotive:
                 try:
-                    stock = yf.Ticker(ticker)
-                    info = stock.info
+                    info = self.get_ticker_info(ticker, 'static')
                     
                     if info and 'sector' in info:
                         sector = info['sector'].lower()
@@ -82,8 +184,7 @@ class StockDataFetcher:
             
             for ticker in tickers:
                 try:
-                    stock = yf.Ticker(ticker)
-                    info = stock.info
+                    info = self.get_ticker_info(ticker, 'market_cap')
                     
                     if info and 'marketCap' in info and info['marketCap']:
                         market_cap = info['marketCap']
@@ -105,16 +206,20 @@ class StockDataFetcher:
             logger.error(f"Error ranking tickers by market cap: {e}")
             return tickers[:count]
     
-    def fetch_historical_data(self, ticker: str, days: int = 150) -> Optional[pd.DataFrame]:
+    def fetch_historical_data(self, ticker: str, days: int = 150, start: Optional[date] = None) -> Optional[pd.DataFrame]:
         for attempt in range(self.retry_attempts):
             try:
-                logger.info(f"Fetching {days} calendar days of historical data for {ticker} (targeting 90 trading days)")
+                if start is not None:
+                    logger.info(f"Fetching historical data for {ticker} since {start}")
+                else:
+                    logger.info(f"Fetching {days} calendar days of historical data for {ticker} (targeting 90 trading days)")
                 
-                stock = yf.Ticker(ticker)
-                end_date = datetime.now()
-                start_date = end_date - timedelta(days=days)
+                end_date = self.provider.now()
+                start_date = start if start is not None else end_date - timedelta(days=days)
                 
-                data = stock.history(
+                data = self._get_history(
+                    ticker,
+                    rate_limited=True,
                     start=start_date,
                     end=end_date,
                     interval='1d'
@@ -124,24 +229,8 @@ class StockDataFetcher:
                     logger.warning(f"No historical data returned for {ticker}")
                     return None
                 
-                if len(data) > 90:
-                    data = data.tail(90)
-                    logger.info(f"Filtered {ticker} to exactly 90 trading days")
-                elif len(data) < 90:
-                    logger.warning(f"Only got {len(data)} trading days for {ticker} (less than 90)")
-                
-                basic_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-                if not all(col in data.columns for col in basic_columns):
-                    logger.error(f"Missing basic required columns for {ticker}: {data.columns}")
-                    return None
-                
-                if 'Adj Close' not in data.columns:
-                    data['Adj Close'] = data['Close']
-                    logger.info(f"Created Adj Close column for {ticker} using Close price")
-                
-                required_columns = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
-                if not all(col in data.columns for col in required_columns):
-                    logger.error(f"Missing required columns for {ticker}: {data.columns}")
+                data = self._prepare_historical_frame(ticker, data, trading_days=None if start is not None else 90)
+                if data is None:
                     return None
                 
                 logger.info(f"Successfully fetched {len(data)} historical records for {ticker}")
@@ -157,6 +246,75 @@ class StockDataFetcher:
         
         return None
     
+    def _prepare_historical_frame(self, ticker: str, data: pd.DataFrame, trading_days: Optional[int] = 90) -> Optional[pd.DataFrame]:
+        # trading_days=None keeps every row, as needed for incremental range fetches
+        if trading_days is None:
+            pass
+        elif len(data) > trading_days:
+            data = data.tail(trading_days)
+            logger.info(f"Filtered {ticker} to exactly {trading_days} trading days")
+        elif len(data) < trading_days:
+            logger.warning(f"Only got {len(data)} trading days for {ticker} (less than {trading_days})")
+        
+        basic_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
+        if not all(col in data.columns for col in basic_columns):
+            logger.error(f"Missing basic required columns for {ticker}: {data.columns}")
+            return None
+        
+        if 'Adj Close' not in data.columns:
+            data = data.copy()
+            data['Adj Close'] = data['Close']
+            logger.info(f"Created Adj Close column for {ticker} using Close price")
+        
+        required_columns = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+        if not all(col in data.columns for col in required_columns):
+            logger.error(f"Missing required columns for {ticker}: {data.columns}")
+            return None
+        
+        return data
+    
+    def fetch_historical_data_batch(self, tickers: List[str], days: int = 150, start: Optional[date] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch daily OHLCV for many tickers with one grouped download per chunk.
+        
+        When `start` is given only that range is fetched and the 90-day trim is
+        skipped. Tickers missing from the response are left out of the result so
+        the caller can retry them individually.
+        """
+        results = {}
+        end_date = self.provider.now()
+        start_date = start if start is not None else end_date - timedelta(days=days)
+        trading_days = None if start is not None else 90
+        
+        for chunk_start in range(0, len(tickers), self.batch_size):
+            chunk = tickers[chunk_start:chunk_start + self.batch_size]
+            logger.info(f"Batch fetching historical data since {start_date:%Y-%m-%d} for {len(chunk)} tickers: {', '.join(chunk)}")
+            
+            frames = None
+            for attempt in range(self.retry_attempts):
+                try:
+                    frames = self._download_history(chunk, start=start_date, end=end_date, interval='1d')
+                    break
+                    
+                except Exception as e:
+                    logger.warning(f"Batch attempt {attempt + 1} failed for {len(chunk)} tickers: {e}")
+                    if attempt < self.retry_attempts - 1:
+                        time.sleep(self.backoff_seconds * (2 ** attempt))
+                    else:
+                        logger.error(f"Failed to batch fetch historical data after {self.retry_attempts} attempts")
+            
+            if not frames:
+                logger.warning(f"No historical data returned for batch: {', '.join(chunk)}")
+                continue
+            
+            for ticker, frame in frames.items():
+                frame = self._prepare_historical_frame(ticker, frame, trading_days=trading_days)
+                if frame is not None:
+                    results[ticker] = frame
+        
+        logger.info(f"Batch fetched historical data for {len(results)}/{len(tickers)} tickers")
+        return results
+    
     def verify_yahoo_finance_match(self, ticker: str) -> Dict[str, Any]:
         try:
             logger.info(f"Verifying {ticker} data matches Yahoo Finance exactly...")
@@ -165,11 +323,9 @@ class StockDataFetcher:
             if not our_data:
                 return {'error': 'Could not fetch our data'}
             
-            stock = yf.Ticker(ticker)
-            
-            live_data = stock.history(period="1d", interval="1m", prepost=True)
+            live_data = self._get_history(ticker, period="1d", interval="1m", prepost=True)
             
-            info = stock.info
+            info = self.get_ticker_info(ticker, 'quote', refresh=True)
             
             verification = {
                 'ticker': ticker,
@@ -218,34 +374,85 @@ class StockDataFetcher:
             logger.error(f"Error verifying Yahoo Finance match for {ticker}: {e}")
             return {'error': str(e)}
     
-    def clear_all_caching(self) -> None:
-        try:
-            import yfinance as yf
-            yf.pdr_override = False
-            
-            import pandas as pd
-            pd.io.common._get_filepath_or_buffer = lambda *args, **kwargs: args[0]
-            
-            import requests
-            if hasattr(requests, 'Session'):
-                session = requests.Session()
-                session.headers.update({'Cache-Control': 'no-cache'})
-            
-            logger.info("All caching cleared for maximum data freshness")
-        except Exception as e:
-            logger.warning(f"Could not clear all caching: {e}")
+    def fetch_intraday_bars(self, ticker: str, since: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Fetch 1m bars (including pre/post market) starting at `since`, a UTC bar
+        start, indexed by bar start in UTC.
+        
+        Without `since`, or when it is older than Yahoo's 1m window, the latest
+        session is fetched instead. The bar at `since` itself is returned again
+        because it may still have been forming when it was stored.
+        """
+        if since is None or datetime.utcnow() - since > self.INTRADAY_LOOKBACK:
+            data = self._get_history(ticker, rate_limited=True, period="1d", interval="1m", prepost=True)
+        else:
+            data = self._get_history(ticker, rate_limited=True, start=pd.Timestamp(since, tz='UTC'), interval="1m", prepost=True)
+        
+        if data is None or data.empty:
+            return pd.DataFrame()
+        
+        index = pd.DatetimeIndex(data.index)
+        if index.tz is not None:
+            data = data.copy()
+            data.index = index.tz_convert('UTC').tz_localize(None)
+        return data
+    
+    def _fetch_live_bars(self, ticker: str) -> pd.DataFrame:
+        if self.intraday_store is None:
+            return self.fetch_intraday_bars(ticker)
+        
+        since = self.intraday_store.get_last_intraday_timestamps([ticker]).get(ticker)
+        bars = self.fetch_intraday_bars(ticker, since)
+        
+        if not bars.empty:
+            self.intraday_store.insert_intraday_bars(ticker, bars)
+            return bars
+        
+        # Nothing new (e.g. market closed) - the last stored bar is still the latest price
+        if since is not None:
+            return self.intraday_store.get_intraday_bars(ticker, start=since)
+        return bars
+    
+    def sync_intraday_bars(self, tickers: List[str]) -> Dict[str, int]:
+        """
+        Append the 1m bars newer than the last stored bar for each ticker.
+        
+        Returns the number of bars written per ticker.
+        """
+        if self.intraday_store is None:
+            return {}
+        
+        # No bars outside market hours is not a failure, so nothing is recorded
+        # here and the half-open probe is left to the price fetch
+        allowed = self._filter_quarantined(tickers, probe=False)
+        last_bars = self.intraday_store.get_last_intraday_timestamps(allowed)
+        written = {}
+        
+        def sync(ticker: str) -> int:
+            bars = self.fetch_intraday_bars(ticker, last_bars.get(ticker))
+            if bars.empty or not self.intraday_store.insert_intraday_bars(ticker, bars):
+                return 0
+            return len(bars)
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(allowed))), thread_name_prefix='intraday-sync') as executor:
+            futures = {executor.submit(sync, ticker): ticker for ticker in allowed}
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    written[ticker] = future.result()
+                except Exception as e:
+                    logger.warning(f"Could not sync intraday bars for {ticker}: {e}")
+        
+        logger.info(f"Intraday sync stored {sum(written.values())} bars for {len(written)}/{len(allowed)} tickers")
+        return written
     
     def fetch_current_price(self, ticker: str) -> Optional[Dict[str, float]]:
         for attempt in range(self.retry_attempts):
             try:
                 logger.info(f"Fetching LIVE current price for {ticker} from Yahoo Finance")
                 
-                self.clear_all_caching()
-                
-                stock = yf.Ticker(ticker)
-                
                 try:
-                    live_data = stock.history(period="1d", interval="1m", prepost=True)
+                    live_data = self._fetch_live_bars(ticker)
                     
                     if not live_data.empty:
                         current_price = float(live_data['Close'].iloc[-1])
@@ -271,12 +478,11 @@ class StockDataFetcher:
                     previous_close = None
                 
                 try:
-                    stock.info = None
-                    info = stock.info
+                    info = self.get_ticker_info(ticker, 'quote', 'market_cap')
                     logger.info(f"Fresh info fetched for {ticker}")
                 except Exception as e:
                     logger.warning(f"Could not refresh info for {ticker}: {e}")
-                    info = stock.info
+                    info = None
                 
                 if not info:
                     logger.warning(f"No info returned for {ticker}")
@@ -294,15 +500,19 @@ class StockDataFetcher:
                         logger.warning(f"No price data available for {ticker}")
                         return None
                 
+                session_date = self._session_date(info)
+                if previous_close is None:
+                    previous_close = self._get_reference_previous_close(ticker, session_date)
+                
                 if previous_close is None:
                     if 'previousClose' in info and info['previousClose']:
-                        previous_close = float(info['previousClose'])
+                        previous_close = self._set_reference_previous_close(ticker, session_date, info['previousClose'])
                         logger.info(f"Previous close from Yahoo Finance for {ticker}: ${previous_close:.6f}")
                     else:
                         try:
-                            hist_data = stock.history(period="2d")
+                            hist_data = self._get_history(ticker, rate_limited=True, period="2d")
                             if len(hist_data) >= 2:
-                                previous_close = float(hist_data['Close'].iloc[-2]) 
+                                previous_close = self._set_reference_previous_close(ticker, session_date, hist_data['Close'].iloc[-2])
                                 logger.info(f"Previous close from history for {ticker}: ${previous_close:.6f}")
                         except Exception as e:
                             logger.warning(f"Could not get previous close for {ticker}: {e}")
@@ -345,113 +555,258 @@ class StockDataFetcher:
         
         return None
     
-    def fetch_all_historical_data(self, tickers: List[str], days: int = 90) -> Dict[str, pd.DataFrame]:
+    def fetch_all_historical_data(self, tickers: List[str], days: int = 90, batched: bool = True,
+                                  start: Optional[date] = None) -> Dict[str, pd.DataFrame]:
         results = {}
         
-        for ticker in tickers:
-            logger.info(f"Processing {ticker} ({tickers.index(ticker) + 1}/{len(tickers)})")
+        if batched:
+            results = self.fetch_historical_data_batch(tickers, days, start=start)
+        
+        remaining = [ticker for ticker in tickers if ticker not in results]
+        if batched and remaining:
+            logger.info(f"Falling back to single-ticker fetch for {len(remaining)} tickers: {', '.join(remaining)}")
+        
+        for ticker in remaining:
+            logger.info(f"Processing {ticker} ({remaining.index(ticker) + 1}/{len(remaining)})")
             
-            data = self.fetch_historical_data(ticker, days)
+            data = self.fetch_historical_data(ticker, days, start=start)
             if data is not None:
                 results[ticker] = data
             else:
                 logger.error(f"Failed to fetch historical data for {ticker}")
-            
-            time.sleep(1)
         
         logger.info(f"Successfully fetched historical data for {len(results)}/{len(tickers)} tickers")
         return results
     
-    def fetch_all_current_prices(self, tickers: List[str]) -> Dict[str, Optional[Dict[str, float]]]:
+    def fetch_quote_snapshots(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch price, volume, previous close and market state for many tickers
+        with one quote request per chunk of batch_size symbols.
+        
+        Tickers missing from the response are left out so the caller can fall
+        back to the per-ticker path for them.
+        """
         results = {}
         
+        for chunk_start in range(0, len(tickers), self.batch_size):
+            chunk = tickers[chunk_start:chunk_start + self.batch_size]
+            
+            try:
+                quotes = self._get_quotes(chunk)
+            except Exception as e:
+                logger.warning(f"Quote snapshot request failed for {len(chunk)} tickers: {e}")
+                continue
+            
+            for quote in quotes:
+                snapshot = self._parse_quote_snapshot(quote)
+                if snapshot is not None:
+                    results[quote['symbol']] = snapshot
+        
+        logger.info(f"Quote snapshots fetched for {len(results)}/{len(tickers)} tickers in "
+                    f"{(len(tickers) + self.batch_size - 1) // self.batch_size} request(s)")
+        return results
+    
+    def _parse_quote_snapshot(self, quote: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        ticker = quote.get('symbol')
+        market_state = quote.get('marketState', 'unknown')
+        current_price = quote.get('regularMarketPrice')
+        
+        # Match the prepost=True intraday bars: use the extended-hours price when trading there
+        if market_state in ('PRE', 'PREPRE') and quote.get('preMarketPrice'):
+            current_price = quote['preMarketPrice']
+        elif market_state in ('POST', 'POSTPOST') and quote.get('postMarketPrice'):
+            current_price = quote['postMarketPrice']
+        
+        if not ticker or not current_price:
+            return None
+        
+        session_date = self._session_date(quote)
+        previous_close = self._get_reference_previous_close(ticker, session_date)
+        if previous_close is None and quote.get('regularMarketPreviousClose'):
+            previous_close = self._set_reference_previous_close(ticker, session_date, quote['regularMarketPreviousClose'])
+        
+        return {
+            'price': float(current_price),
+            'previous_close': previous_close if previous_close is not None else float(current_price),
+            'bid': quote.get('bid'),
+            'ask': quote.get('ask'),
+            'volume': quote.get('regularMarketVolume'),
+            'market_cap': quote.get('marketCap'),
+            'market_state': market_state,
+            'is_market_open': market_state == 'REGULAR',
+            'timestamp': datetime.now()
+        }
+    
+    def _session_date(self, quote: Dict[str, Any]) -> date:
+        """
+        Exchange-local date of the session a quote or info dict belongs to.
+        
+        Taken from regularMarketTime rather than the server's date: before the
+        open it still points at the previous session (whose previous close is
+        still valid), and it moves to the new session once trading starts.
+        """
+        market_time = quote.get('regularMarketTime')
+        try:
+            timezone = pytz.timezone(quote.get('exchangeTimezoneName') or 'America/New_York')
+            if isinstance(market_time, (int, float)):
+                return datetime.fromtimestamp(market_time, pytz.utc).astimezone(timezone).date()
+            if isinstance(market_time, datetime):
+                if market_time.tzinfo is None:
+                    market_time = pytz.utc.localize(market_time)
+                return market_time.astimezone(timezone).date()
+        except (pytz.UnknownTimeZoneError, OverflowError, OSError, ValueError) as e:
+            logger.debug(f"Could not read session time of {quote.get('symbol')}: {e}")
+        
+        return self.provider.now().date()
+    
+    def _get_reference_previous_close(self, ticker: str, session_date: date) -> Optional[float]:
+        with self._previous_close_lock:
+            cached = self._previous_close_cache.get(ticker)
+        if cached and cached[0] == session_date:
+            return cached[1]
+        return None
+    
+    def _set_reference_previous_close(self, ticker: str, session_date: date, previous_close: Any) -> float:
+        previous_close = float(previous_close)
+        with self._previous_close_lock:
+            self._previous_close_cache[ticker] = (session_date, previous_close)
+        return previous_close
+    
+    def iter_current_prices(self, tickers: List[str], force_refresh: bool = False) -> Iterator[Tuple[str, Optional[Dict[str, float]]]]:
+        """
+        Yield (ticker, price_data) pairs as each fetch completes.
+        
+        With more than one worker the tickers are fetched concurrently, so a slow
+        or retrying symbol only occupies its own worker. Request pacing comes from
+        the shared rate limiter.
+        """
+        fetch = self._force_refresh_price if force_refresh else self.fetch_current_price
+        
+        if self.max_workers == 1 or len(tickers) <= 1:
+            for ticker in tickers:
+                yield ticker, self._safe_fetch(fetch, ticker)
+            return
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tickers)), thread_name_prefix='quote-fetch') as executor:
+            futures = {executor.submit(self._safe_fetch, fetch, ticker): ticker for ticker in tickers}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+    
+    def _safe_fetch(self, fetch: Callable[[str], Optional[Dict[str, float]]], ticker: str) -> Optional[Dict[str, float]]:
+        try:
+            return fetch(ticker)
+        except Exception as e:
+            logger.error(f"Unexpected error fetching {ticker}: {e}")
+            return None
+    
+    def _filter_quarantined(self, tickers: List[str], probe: bool = True) -> List[str]:
+        # probe=False is for callers that never record an outcome
+        if probe:
+            allowed = [ticker for ticker in tickers if self.circuit_breaker.allow(ticker)]
+        else:
+            allowed = [ticker for ticker in tickers if not self.circuit_breaker.is_quarantined(ticker)]
+        skipped = [ticker for ticker in tickers if ticker not in allowed]
+        if skipped:
+            logger.info(f"Skipping {len(skipped)} quarantined tickers: {', '.join(skipped)}")
+        return allowed
+    
+    def _record_outcomes(self, tickers: List[str], results: Dict[str, Any]) -> None:
         for ticker in tickers:
-            logger.info(f"Processing {ticker} ({tickers.index(ticker) + 1}/{len(tickers)})")
+            if results.get(ticker) is not None:
+                self.circuit_breaker.record_success(ticker)
+            else:
+                self.circuit_breaker.record_failure(ticker, "No price data returned")
+    
+    def fetch_all_current_prices(self, tickers: List[str]) -> Dict[str, Optional[Dict[str, float]]]:
+        allowed = self._filter_quarantined(tickers)
+        results = self.fetch_quote_snapshots(allowed)
+        remaining = [ticker for ticker in allowed if ticker not in results]
+        
+        for completed, (ticker, data) in enumerate(self.iter_current_prices(remaining), start=1):
+            logger.info(f"Processed {ticker} ({completed}/{len(remaining)})")
             
-            data = self.fetch_current_price(ticker)
             if data is not None:
                 results[ticker] = data
             else:
                 logger.error(f"Failed to fetch current price for {ticker}")
-            
-            time.sleep(0.5)
+        
+        self._record_outcomes(allowed, results)
         
         logger.info(f"Successfully fetched current prices for {len(results)}/{len(tickers)} tickers")
         return results
     
     def force_refresh_all_prices(self, tickers: List[str]) -> Dict[str, Optional[Dict[str, float]]]:
-        logger.info("Force refreshing all current prices with aggressive data clearing...")
+        logger.info("Force refreshing all current prices...")
         
-        try:
-            import yfinance as yf
-            yf.pdr_override = False
-            logger.info("Cleared yfinance cache")
-        except Exception as e:
-            logger.warning(f"Could not clear yfinance cache: {e}")
+        allowed = self._filter_quarantined(tickers)
+        results = self.fetch_quote_snapshots(allowed)
+        remaining = [ticker for ticker in allowed if ticker not in results]
+        if remaining:
+            logger.info(f"Falling back to per-ticker refresh for {len(remaining)} tickers: {', '.join(remaining)}")
         
-        results = {}
-        
-        for ticker in tickers:
-            logger.info(f"Force refreshing {ticker} ({tickers.index(ticker) + 1}/{len(tickers)})")
+        for completed, (ticker, data) in enumerate(self.iter_current_prices(remaining, force_refresh=True), start=1):
+            logger.info(f"Force refreshed {ticker} ({completed}/{len(remaining)})")
             
-            try:
-                stock = yf.Ticker(ticker)
-                
-                for refresh_attempt in range(3):
-                    try:
-                        live_data = stock.history(period="1d", interval="1m", prepost=True)
+            if data is not None:
+                results[ticker] = data
+        
+        self._record_outcomes(allowed, results)
+        
+        logger.info(f"Force refresh completed: {len(results)}/{len(tickers)} tickers updated")
+        logger.info(f"Metadata cache stats: {self.metadata_cache.stats()}")
+        logger.info(f"Request coalescing stats: {self.single_flight.stats()}")
+        return results
+    
+    def _force_refresh_price(self, ticker: str) -> Optional[Dict[str, float]]:
+        try:
+            for refresh_attempt in range(3):
+                try:
+                    live_data = self._fetch_live_bars(ticker)
+                    
+                    if not live_data.empty:
+                        current_price = float(live_data['Close'].iloc[-1])
                         
-                        if not live_data.empty:
-                            current_price = float(live_data['Close'].iloc[-1])
-                            
-                            latest_timestamp = live_data.index[-1]
-                            time_diff = datetime.now() - latest_timestamp.replace(tzinfo=None)
-                            
-                            if time_diff.total_seconds() < 300:  # 5 minutes
-                                logger.info(f"Live data is fresh for {ticker}: {time_diff.total_seconds():.0f}s old")
-                            else:
-                                logger.warning(f"Live data may be stale for {ticker}: {time_diff.total_seconds():.0f}s old")
-                            
-                            info = stock.info
-                            previous_close = float(info.get('previousClose', current_price))
-                            
-                            price_data = {
-                                'price': current_price,
-                                'previous_close': previous_close,
-                                'bid': info.get('bid'),
-                                'ask': info.get('ask'),
-                                'volume': info.get('volume'),
-                                'market_cap': info.get('marketCap'),
-                                'market_state': info.get('marketState', 'unknown'),
-                                'is_market_open': info.get('marketState') == 'REGULAR',
-                                'timestamp': datetime.now()
-                            }
-                            
-                            results[ticker] = price_data
-                            logger.info(f"Successfully force refreshed {ticker}: ${current_price:.6f}")
-                            break
-                            
-                    except Exception as e:
-                        logger.warning(f"Force refresh attempt {refresh_attempt + 1} failed for {ticker}: {e}")
-                        if refresh_attempt < 2:
-                            time.sleep(1)  
+                        latest_timestamp = live_data.index[-1]
+                        time_diff = datetime.utcnow() - latest_timestamp.to_pydatetime()
+                        
+                        if time_diff.total_seconds() < 300:  # 5 minutes
+                            logger.info(f"Live data is fresh for {ticker}: {time_diff.total_seconds():.0f}s old")
                         else:
-                            logger.error(f"All force refresh attempts failed for {ticker}")
-                
-                if ticker not in results:
-                    data = self.fetch_current_price(ticker)
-                    if data is not None:
-                        results[ticker] = data
-                    else:
-                        logger.error(f"Failed to fetch current price for {ticker} even with fallback")
-                
-            except Exception as e:
-                logger.error(f"Error in force refresh for {ticker}: {e}")
-                data = self.fetch_current_price(ticker)
-                if data is not None:
-                    results[ticker] = data
+                            logger.warning(f"Live data may be stale for {ticker}: {time_diff.total_seconds():.0f}s old")
+                        
+                        info = self.get_ticker_info(ticker, 'quote', 'market_cap')
+                        session_date = self._session_date(info)
+                        previous_close = self._get_reference_previous_close(ticker, session_date)
+                        if previous_close is None:
+                            if info.get('previousClose'):
+                                previous_close = self._set_reference_previous_close(ticker, session_date, info['previousClose'])
+                            else:
+                                previous_close = current_price
+                        
+                        price_data = {
+                            'price': current_price,
+                            'previous_close': previous_close,
+                            'bid': info.get('bid'),
+                            'ask': info.get('ask'),
+                            'volume': info.get('volume'),
+                            'market_cap': info.get('marketCap'),
+                            'market_state': info.get('marketState', 'unknown'),
+                            'is_market_open': info.get('marketState') == 'REGULAR',
+                            'timestamp': datetime.now()
+                        }
+                        
+                        logger.info(f"Successfully force refreshed {ticker}: ${current_price:.6f}")
+                        return price_data
+                        
+                except Exception as e:
+                    logger.warning(f"Force refresh attempt {refresh_attempt + 1} failed for {ticker}: {e}")
+                    if refresh_attempt == 2:
+                        logger.error(f"All force refresh attempts failed for {ticker}")
             
-            time.sleep(1)
+        except Exception as e:
+            logger.error(f"Error in force refresh for {ticker}: {e}")
         
-        logger.info(f"Force refresh completed: {len(results)}/{len(tickers)} tickers updated")
-        return results
+        data = self.fetch_current_price(ticker)
+        if data is None:
+            logger.error(f"Failed to fetch current price for {ticker} even with fallback")
+        return data
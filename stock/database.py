@@ -1,28 +1,69 @@
 
 
 import logging
-from datetime import datetime, date
-from typing import List, Dict, Optional, Any
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+from time import perf_counter
+from typing import List, Dict, Optional, Any, Iterator
 from decimal import Decimal
 
 import pandas as pd
 from sqlalchemy import (
     create_engine, MetaData, Table, Column, String, Date, 
-    DateTime, Numeric, BigInteger, Text, Index, UniqueConstraint, Enum, Boolean, Integer
+    DateTime, Numeric, BigInteger, Text, Index, UniqueConstraint, Enum, Boolean, Integer, event
 )
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Connection, Engine, make_url
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.dialects.mysql import DATETIME
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
+
+from stock.unit_of_work import UnitOfWork
 
 logger = logging.getLogger(__name__)
 
 
+# SQLite keeps dates as ISO text. Parameters and result rows are converted
+# per engine (sqlite3's adapter and converter registries are process-wide), so
+# raw text() queries see the same types as on MariaDB.
+def _sqlite_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat(' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _sqlite_parameters(parameters: Any) -> Any:
+    if isinstance(parameters, dict):
+        return {name: _sqlite_value(value) for name, value in parameters.items()}
+    return type(parameters)(_sqlite_value(value) for value in parameters)
+
+
+def _parse_sqlite_date(value: str) -> date:
+    return date.fromisoformat(value[:10])
+
+
 class DatabaseManager:
     
-    def __init__(self, connection_string: str):
+    def __init__(self, connection_string: str, bulk_chunk_size: int = 500):
         self.connection_string = connection_string
+        # 'mysql' for MariaDB, or 'sqlite' for the embedded single-node backend
+        self.backend = make_url(connection_string).get_backend_name()
+        self.bulk_chunk_size = max(1, bulk_chunk_size)
+        # Optional RollingAverageEngine fed with every daily bar written here
+        self.rolling_averages = None
+        # Optional AlertLedger written through whenever alerts are saved
+        self.alert_ledger = None
+        # Optional ParquetHistoryCache written after, and read before, stock_daily
+        self.history_cache = None
         self.engine: Optional[Engine] = None
+        # Unit of work opened by the current thread, if any
+        self._local = threading.local()
+        # Every watchlist row, reused while COUNT(*)/MAX(updated_at) is unchanged
+        self._watchlist_lock = threading.Lock()
+        self._watchlist_rows: Optional[List[Dict[str, Any]]] = None
+        self._watchlist_version: Optional[tuple] = None
         self.metadata = MetaData()
         self._setup_tables()
     
@@ -30,7 +71,7 @@ class DatabaseManager:
         self.stock_daily = Table(
             'stock_daily',
             self.metadata,
-            Column('id', BigInteger, primary_key=True, autoincrement=True),
+            Column('id', BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, autoincrement=True),
             Column('ticker', String(16), nullable=False),
             Column('date', Date, nullable=False),
             Column('open', Numeric(18, 6)),
@@ -39,7 +80,7 @@ class DatabaseManager:
             Column('close', Numeric(18, 6)),
             Column('adj_close', Numeric(18, 6)),
             Column('volume', BigInteger),
-            Column('fetched_at', DATETIME, nullable=False, default=datetime.utcnow),
+            Column('fetched_at', DateTime, nullable=False, default=datetime.utcnow),
             
             UniqueConstraint('ticker', 'date', name='unique_ticker_date'),
             
@@ -55,27 +96,69 @@ class DatabaseManager:
             Column('price', Numeric(18, 6)),
             Column('bid', Numeric(18, 6)),
             Column('ask', Numeric(18, 6)),
-            Column('timestamp', DATETIME),
-            Column('fetched_at', DATETIME, nullable=False, default=datetime.utcnow),
+            Column('previous_close', Numeric(18, 6)),
+            Column('volume', BigInteger),
+            Column('market_cap', BigInteger),
+            Column('market_state', String(16)),
+            Column('timestamp', DateTime),
+            Column('fetched_at', DateTime, nullable=False, default=datetime.utcnow),
             
             Index('idx_latest_fetched_at', 'fetched_at')
         )
         
+        # Intraday OHLCV bars keyed by bar start in UTC. Fresh bars are stored at 1m
+        # and rolled up into 5m and then 1h bars as they age.
+        self.stock_intraday = Table(
+            'stock_intraday',
+            self.metadata,
+            Column('ticker', String(16), primary_key=True),
+            Column('bar_interval', Enum('1m', '5m', '1h', name='bar_interval_enum'), primary_key=True),
+            Column('ts', DateTime, primary_key=True),
+            Column('open', Numeric(18, 6)),
+            Column('high', Numeric(18, 6)),
+            Column('low', Numeric(18, 6)),
+            Column('close', Numeric(18, 6)),
+            Column('volume', BigInteger),
+            Column('fetched_at', DateTime, nullable=False, default=datetime.utcnow),
+            
+            Index('idx_intraday_interval_ts', 'bar_interval', 'ts')
+        )
+        
         self.alert_history = Table(
             'alert_history',
             self.metadata,
-            Column('id', BigInteger, primary_key=True, autoincrement=True),
+            Column('id', BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, autoincrement=True),
             Column('ticker', String(16), nullable=False),
             Column('alert_type', Enum('7_day', '30_day', '90_day', name='alert_type_enum'), nullable=False),
             Column('current_price', Numeric(18, 6), nullable=False),
             Column('average_price', Numeric(18, 6), nullable=False),
             Column('absolute_difference', Numeric(18, 6), nullable=False),
             Column('percent_difference', Numeric(10, 4), nullable=False),
-            Column('sent_at', DATETIME, nullable=False, default=datetime.utcnow),
+            Column('sent_at', DateTime, nullable=False, default=datetime.utcnow),
             
-            Index('idx_ticker', 'ticker'),
+            Index('idx_alert_ticker', 'ticker'),
             Index('idx_alert_type', 'alert_type'),
-            Index('idx_sent_at', 'sent_at')
+            Index('idx_sent_at', 'sent_at'),
+            Index('idx_alert_dedup', 'ticker', 'alert_type', 'sent_at')
+        )
+        
+        # One small row per ticker, maintained in the same transaction as the
+        # stock_daily and alert_history writes it summarizes
+        self.stock_indicator_snapshot = Table(
+            'stock_indicator_snapshot',
+            self.metadata,
+            Column('ticker', String(16), primary_key=True),
+            Column('latest_date', Date),
+            Column('earliest_date', Date),
+            Column('row_count', Integer, nullable=False, default=0),
+            Column('latest_close', Numeric(18, 6)),
+            Column('avg_7', Numeric(18, 6)),
+            Column('avg_30', Numeric(18, 6)),
+            Column('avg_90', Numeric(18, 6)),
+            Column('last_alert_type', String(16)),
+            Column('last_alert_price', Numeric(18, 6)),
+            Column('last_alert_at', DateTime),
+            Column('updated_at', DateTime, nullable=False, default=datetime.utcnow)
         )
         
         self.watchlist = Table(
@@ -85,11 +168,14 @@ class DatabaseManager:
             Column('ticker', String(16), nullable=False, unique=True),
             Column('company_name', String(255)),
             Column('sector', String(100), default='Custom'),
-            Column('added_at', DATETIME, nullable=False, default=datetime.utcnow),
+            Column('added_at', DateTime, nullable=False, default=datetime.utcnow),
             Column('is_active', Boolean, default=True),
             Column('notes', Text),
+            # Bumped by the database on every change (ON UPDATE on MariaDB, a
+            # trigger on SQLite) so edits made outside the app are detected
+            Column('updated_at', DateTime, nullable=False, server_default=text('CURRENT_TIMESTAMP')),
             
-            Index('idx_ticker', 'ticker'),
+            Index('idx_watchlist_ticker', 'ticker'),
             Index('idx_sector', 'sector'),
             Index('idx_active', 'is_active'),
             Index('idx_added_at', 'added_at')
@@ -97,12 +183,16 @@ class DatabaseManager:
     
     def connect(self) -> bool:
         try:
-            self.engine = create_engine(
-                self.connection_string,
-                pool_pre_ping=True,
-                pool_recycle=3600,
-                echo=False
-            )
+            if self.backend == 'sqlite':
+                self.engine = self._create_sqlite_engine()
+            else:
+                self.engine = create_engine(
+                    self.connection_string,
+                    pool_pre_ping=True,
+                    pool_recycle=3600,
+                    echo=False
+                )
+            self._register_statement_counters()
             
             with self.engine.connect() as conn:
                 conn.execute(text("SELECT 1"))
@@ -114,6 +204,245 @@ class DatabaseManager:
             logger.error(f"Failed to connect to database: {e}")
             return False
     
+    def _create_sqlite_engine(self) -> Engine:
+        database = make_url(self.connection_string).database
+        if database and database != ':memory:' and os.path.dirname(database):
+            os.makedirs(os.path.dirname(database), exist_ok=True)
+        
+        # Result columns named like a DATE/DATETIME column of the schema are
+        # read back as date/datetime; computed columns (MAX(date)) stay text
+        parsers = {}
+        for table in self.metadata.tables.values():
+            for column in table.columns:
+                if isinstance(column.type, DateTime):
+                    parsers[column.name] = datetime.fromisoformat
+                elif isinstance(column.type, Date):
+                    parsers[column.name] = _parse_sqlite_date
+        
+        engine = create_engine(
+            self.connection_string,
+            connect_args={'check_same_thread': False},
+            echo=False
+        )
+        
+        @event.listens_for(engine, 'connect')
+        def _configure_connection(dbapi_connection, connection_record):
+            # WAL lets the Telegram thread read while a monitoring cycle writes
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA busy_timeout=5000")
+            cursor.close()
+            # Let SQLAlchemy issue BEGIN itself so savepoints work under pysqlite
+            dbapi_connection.isolation_level = None
+            dbapi_connection.row_factory = self._sqlite_row_factory(parsers)
+        
+        @event.listens_for(engine, 'before_cursor_execute', retval=True)
+        def _adapt_parameters(conn, cursor, statement, parameters, context, executemany):
+            if executemany:
+                return statement, [_sqlite_parameters(row) for row in parameters]
+            return statement, _sqlite_parameters(parameters)
+        
+        @event.listens_for(engine, 'begin')
+        def _begin_transaction(conn):
+            conn.exec_driver_sql("BEGIN")
+        
+        return engine
+    
+    @staticmethod
+    def _sqlite_row_factory(parsers: Dict[str, Any]):
+        # One per connection; the temporal column positions are worked out
+        # once per result set
+        last = {'description': None, 'columns': []}
+        
+        def row_factory(cursor, row):
+            description = cursor.description
+            if description is not last['description']:
+                last['description'] = description
+                last['columns'] = [
+                    (index, parsers[column[0]]) for index, column in enumerate(description or ())
+                    if column[0] in parsers
+                ]
+            if not last['columns']:
+                return row
+            
+            values = list(row)
+            for index, parse in last['columns']:
+                value = values[index]
+                if isinstance(value, str):
+                    try:
+                        values[index] = parse(value)
+                    except ValueError:
+                        pass
+            return tuple(values)
+        
+        return row_factory
+    
+    def _register_statement_counters(self) -> None:
+        # Only work done by a thread inside unit_of_work() is counted
+        @event.listens_for(self.engine, 'before_cursor_execute')
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info['statement_started'] = perf_counter()
+        
+        @event.listens_for(self.engine, 'after_cursor_execute')
+        def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            unit = self._active_unit()
+            if unit is not None:
+                unit.record_statement(perf_counter() - conn.info.pop('statement_started', perf_counter()))
+        
+        def _round_trip(*args):
+            unit = self._active_unit()
+            if unit is not None:
+                unit.record_round_trip()
+        
+        event.listen(self.engine, 'commit', _round_trip)
+        event.listen(self.engine, 'rollback', _round_trip)
+        if self.backend != 'sqlite':
+            # pool_pre_ping sends a ping on every checkout
+            event.listen(self.engine.pool, 'checkout', _round_trip)
+    
+    def _active_unit(self) -> Optional[UnitOfWork]:
+        return getattr(self._local, 'unit', None)
+    
+    @contextmanager
+    def unit_of_work(self, name: str = 'Unit of work') -> Iterator[UnitOfWork]:
+        """
+        Share one connection between every call made on this thread inside the
+        block. Writes are committed at checkpoint() and when the block exits,
+        and rolled back if it raises. Nested blocks join the outer one.
+        """
+        active = self._active_unit()
+        if active is not None:
+            yield active
+            return
+        
+        unit = UnitOfWork(name)
+        if not self.engine:
+            yield unit
+            return
+        
+        self._local.unit = unit
+        try:
+            with self.engine.connect() as conn:
+                unit.connection = conn
+                try:
+                    yield unit
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    unit.rolled_back()
+                    raise
+                unit.committed()
+        finally:
+            self._local.unit = None
+            stats = unit.stats()
+            logger.info(
+                f"{name}: {stats['statements']} statements, {stats['round_trips']} round trips, "
+                f"{stats['checkpoints']} checkpoints, {stats['db_seconds']:.3f}s in the database"
+            )
+    
+    def checkpoint(self) -> bool:
+        """Commit the writes of the current unit of work so far; a no-op outside one."""
+        unit = self._active_unit()
+        if unit is None or unit.connection is None:
+            return True
+        
+        try:
+            unit.connection.commit()
+            unit.checkpoints += 1
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to commit {unit.name} checkpoint: {e}")
+            unit.connection.rollback()
+            unit.rolled_back()
+            return False
+        
+        unit.committed()
+        return True
+    
+    def after_commit(self, on_commit, on_rollback=None) -> None:
+        """
+        Run `on_commit` once the current writes are committed: at the next
+        checkpoint inside a unit of work, right away otherwise. `on_rollback`
+        runs instead if the unit of work rolls them back.
+        """
+        unit = self._active_unit()
+        if unit is None or unit.connection is None:
+            on_commit()
+            return
+        
+        unit.after_commit(on_commit, on_rollback)
+    
+    @contextmanager
+    def connection(self) -> Iterator[Connection]:
+        """Connection for reads: the current unit of work's, or a pooled one."""
+        unit = self._active_unit()
+        if unit is None or unit.connection is None:
+            with self.engine.connect() as conn:
+                yield conn
+            return
+        
+        self._recover(unit)
+        unit.open_reads += 1
+        try:
+            yield unit.connection
+        finally:
+            unit.open_reads -= 1
+            if not unit.open_reads and not unit.dirty:
+                self._end_read(unit)
+    
+    @contextmanager
+    def transaction(self) -> Iterator[Connection]:
+        """
+        Atomic block for writes. Inside a unit of work it is a savepoint on the
+        shared connection, committed at the next checkpoint.
+        """
+        unit = self._active_unit()
+        if unit is None or unit.connection is None:
+            with self.engine.begin() as conn:
+                yield conn
+            return
+        
+        self._recover(unit)
+        unit.dirty = True
+        with unit.connection.begin_nested():
+            yield unit.connection
+    
+    @staticmethod
+    def _end_read(unit: UnitOfWork) -> None:
+        # A read-only transaction pins a snapshot: an InnoDB read view on
+        # MariaDB, and on SQLite a snapshot that can no longer be upgraded to a
+        # write (SQLITE_BUSY_SNAPSHOT) once another connection commits. End it
+        # so the network I/O between the cycle's reads and writes holds nothing.
+        if unit.connection.invalidated or not unit.connection.in_transaction():
+            return
+        try:
+            unit.connection.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not end {unit.name} read transaction: {e}")
+            unit.connection.rollback()
+    
+    @staticmethod
+    def _recover(unit: UnitOfWork) -> None:
+        # After a lost connection the transaction must be rolled back before
+        # the connection can reconnect; writes since the last checkpoint are gone
+        if unit.connection.invalidated:
+            logger.warning(f"{unit.name} lost its connection - uncommitted writes were discarded")
+            unit.connection.rollback()
+            unit.rolled_back()
+    
+    def _on_conflict(self, keys: List[str], columns: List[str]) -> str:
+        """Upsert clause overwriting `columns` when a row with the same `keys` exists."""
+        if self.backend == 'sqlite':
+            assignments = ",\n".join(f"{column} = excluded.{column}" for column in columns)
+            return f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET\n{assignments}"
+        
+        assignments = ",\n".join(f"{column} = VALUES({column})" for column in columns)
+        return f"ON DUPLICATE KEY UPDATE\n{assignments}"
+    
+    def _as_float(self, column: str) -> str:
+        # DECIMAL columns otherwise reach Python as one Decimal object per value
+        return f"CAST({column} AS {'REAL' if self.backend == 'sqlite' else 'DOUBLE'}) AS {column}"
+    
     def create_tables(self) -> bool:
         try:
             if not self.engine:
@@ -121,6 +450,7 @@ class DatabaseManager:
                     return False
             
             self.metadata.create_all(self.engine)
+            self._migrate_schema()
             logger.info("Database tables created successfully")
             return True
             
@@ -128,36 +458,102 @@ class DatabaseManager:
             logger.error(f"Failed to create tables: {e}")
             return False
     
+    def _migrate_schema(self) -> None:
+        # create_all() does not alter existing tables, so columns added after
+        # the first deployment are brought in here. SQLite databases were always
+        # created with the full layout and only need the trigger.
+        if self.backend == 'sqlite':
+            migrations = [
+                """
+                    CREATE TRIGGER IF NOT EXISTS trg_watchlist_updated_at
+                    AFTER UPDATE ON watchlist
+                    FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+                    BEGIN
+                        UPDATE watchlist
+                        SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+                        WHERE id = NEW.id;
+                    END
+                """
+            ]
+        else:
+            migrations = [
+                """
+                    ALTER TABLE stock_latest
+                    ADD COLUMN IF NOT EXISTS previous_close DECIMAL(18,6) AFTER ask,
+                    ADD COLUMN IF NOT EXISTS volume BIGINT AFTER previous_close,
+                    ADD COLUMN IF NOT EXISTS market_cap BIGINT AFTER volume,
+                    ADD COLUMN IF NOT EXISTS market_state VARCHAR(16) AFTER market_cap
+                """,
+                """
+                    CREATE INDEX IF NOT EXISTS idx_alert_dedup
+                    ON alert_history (ticker, alert_type, sent_at)
+                """,
+                """
+                    ALTER TABLE watchlist
+                    ADD COLUMN IF NOT EXISTS updated_at DATETIME(6) NOT NULL
+                        DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6) AFTER notes
+                """
+            ]
+        
+        with self.engine.begin() as conn:
+            for statement in migrations:
+                conn.execute(text(statement))
+            
+            if self.backend != 'sqlite' and not self._watchlist_updated_at_current(conn):
+                # Only a column created by create_all() lacks the ON UPDATE clause;
+                # MODIFY can rebuild the table, so it is not run on every startup
+                logger.info("Migrating watchlist.updated_at to DATETIME(6) ON UPDATE CURRENT_TIMESTAMP(6)")
+                conn.execute(text("""
+                    ALTER TABLE watchlist
+                    MODIFY COLUMN updated_at DATETIME(6) NOT NULL
+                        DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+                """))
+    
+    @staticmethod
+    def _watchlist_updated_at_current(conn: Connection) -> bool:
+        row = conn.execute(text("""
+            SELECT COLUMN_TYPE, EXTRA
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE()
+            AND TABLE_NAME = 'watchlist'
+            AND COLUMN_NAME = 'updated_at'
+        """)).fetchone()
+        if row is None:
+            return False
+        
+        column_type, extra = (str(value or '').lower() for value in row)
+        return column_type == 'datetime(6)' and 'on update current_timestamp(6)' in extra
+    
     def insert_historical_data(self, ticker: str, data: pd.DataFrame) -> bool:
         try:
             if not self.engine:
                 logger.error("Database not connected")
                 return False
             
-            records = []
-            for _, row in data.iterrows():
-                record = {
-                    'ticker': ticker,
-                    'date': row.name.date() if hasattr(row.name, 'date') else row.name,
-                    'open': float(row['Open']) if pd.notna(row['Open']) else None,
-                    'high': float(row['High']) if pd.notna(row['High']) else None,
-                    'low': float(row['Low']) if pd.notna(row['Low']) else None,
-                    'close': float(row['Close']) if pd.notna(row['Close']) else None,
-                    'adj_close': float(row['Adj Close']) if pd.notna(row['Adj Close']) else None,
-                    'volume': int(row['Volume']) if pd.notna(row['Volume']) else None,
-                    'fetched_at': datetime.utcnow()
-                }
-                records.append(record)
+            records = self._daily_records(ticker, data)
             
-            with self.engine.connect() as conn:
-                for record in records:
-                    stmt = f"""
-                        REPLACE INTO stock_daily 
-                        (ticker, date, open, high, low, close, adj_close, volume, fetched_at)
-                        VALUES (:ticker, :date, :open, :high, :low, :close, :adj_close, :volume, :fetched_at)
-                    """
-                    conn.execute(text(stmt), record)
-                conn.commit()
+            with self.transaction() as conn:
+                self._execute_chunked(conn, f"""
+                    INSERT INTO stock_daily
+                    (ticker, date, open, high, low, close, adj_close, volume, fetched_at)
+                    VALUES (:ticker, :date, :open, :high, :low, :close, :adj_close, :volume, :fetched_at)
+                    {self._on_conflict(['ticker', 'date'], ['open', 'high', 'low', 'close', 'adj_close', 'volume', 'fetched_at'])}
+                """, records)
+                self._refresh_indicator_snapshots(conn, [ticker])
+            
+            # Inside a unit of work the rows are not durable until the next
+            # checkpoint, so the in-memory windows and the file follow the
+            # commit, not the savepoint
+            if self.rolling_averages is not None:
+                self.after_commit(
+                    lambda: self.rolling_averages.apply_bars(ticker, data),
+                    lambda: self.rolling_averages.invalidate(ticker)
+                )
+            if self.history_cache is not None:
+                self.after_commit(
+                    lambda: self.history_cache.write(ticker, data),
+                    lambda: self.history_cache.invalidate(ticker)
+                )
             
             logger.info(f"Inserted {len(records)} historical records for {ticker}")
             return True
@@ -166,39 +562,248 @@ class DatabaseManager:
             logger.error(f"Failed to insert historical data for {ticker}: {e}")
             return False
     
+    @classmethod
+    def _daily_records(cls, ticker: str, data: pd.DataFrame) -> List[Dict[str, Any]]:
+        index = pd.DatetimeIndex(data.index)
+        columns = {
+            'date': index.date.tolist(),
+            'open': cls._nullable(data['Open']),
+            'high': cls._nullable(data['High']),
+            'low': cls._nullable(data['Low']),
+            'close': cls._nullable(data['Close']),
+            'adj_close': cls._nullable(data['Adj Close']),
+            'volume': cls._nullable(data['Volume'], integer=True)
+        }
+        fetched_at = datetime.utcnow()
+        
+        return [
+            dict(zip(columns, values), ticker=ticker, fetched_at=fetched_at)
+            for values in zip(*columns.values())
+        ]
+    
+    @staticmethod
+    def _nullable(series: pd.Series, integer: bool = False) -> List[Any]:
+        """Convert a column to plain Python floats/ints in one step, with NaN as None."""
+        values = pd.to_numeric(series, errors='coerce').astype(float)
+        if integer:
+            values = values.round().astype('Int64')
+        else:
+            # The scale of DECIMAL(18,6), which SQLite does not enforce itself
+            values = values.round(6)
+        return values.astype(object).where(values.notna(), None).tolist()
+    
+    def _execute_chunked(self, conn, statement: str, records: List[Dict[str, Any]]) -> None:
+        # executemany of a single-row INSERT is sent by the driver as one
+        # multi-row INSERT per chunk, i.e. one round trip per bulk_chunk_size rows
+        for chunk_start in range(0, len(records), self.bulk_chunk_size):
+            conn.execute(text(statement), records[chunk_start:chunk_start + self.bulk_chunk_size])
+    
     def update_latest_price(self, ticker: str, price_data: Dict[str, Any]) -> bool:
+        return self.update_latest_prices({ticker: price_data})
+    
+    def update_latest_prices(self, prices: Dict[str, Optional[Dict[str, Any]]]) -> bool:
+        """
+        Upsert the latest snapshot of every ticker in one multi-row statement
+        and one commit. Takes the fetcher's {ticker: price_data} result as is;
+        tickers without data are skipped.
+        """
         try:
             if not self.engine:
                 logger.error("Database not connected")
                 return False
             
-            record = {
-                'ticker': ticker,
-                'price': float(price_data.get('price', 0)),  # Maintain exact precision
-                'bid': float(price_data.get('bid', 0)) if price_data.get('bid') else None,
-                'ask': float(price_data.get('ask', 0)) if price_data.get('ask') else None,
-                'timestamp': price_data.get('timestamp'),
-                'fetched_at': datetime.utcnow()
-            }
+            fetched_at = datetime.utcnow()
+            records = []
+            for ticker, price_data in prices.items():
+                if not price_data:
+                    continue
+                
+                # A malformed snapshot only costs its own ticker the update
+                try:
+                    records.append({
+                        'ticker': ticker,
+                        'price': float(price_data.get('price', 0)),  # Maintain exact precision
+                        'bid': float(price_data['bid']) if price_data.get('bid') else None,
+                        'ask': float(price_data['ask']) if price_data.get('ask') else None,
+                        'previous_close': float(price_data['previous_close']) if price_data.get('previous_close') is not None else None,
+                        'volume': int(price_data['volume']) if price_data.get('volume') is not None else None,
+                        'market_cap': int(price_data['market_cap']) if price_data.get('market_cap') is not None else None,
+                        'market_state': price_data.get('market_state'),
+                        'timestamp': price_data.get('timestamp'),
+                        'fetched_at': fetched_at
+                    })
+                except (TypeError, ValueError, OverflowError) as e:
+                    logger.error(f"Skipping malformed latest price for {ticker}: {e}")
             
-            logger.info(f"Storing {ticker} with exact price: ${record['price']:.6f}")
+            if not records:
+                return True
             
-            with self.engine.connect() as conn:
-                stmt = f"""
-                    REPLACE INTO stock_latest 
-                    (ticker, price, bid, ask, timestamp, fetched_at)
-                    VALUES (:ticker, :price, :bid, :ask, :timestamp, :fetched_at)
-                """
-                conn.execute(text(stmt), record)
-                conn.commit()
+            with self.transaction() as conn:
+                self._execute_chunked(conn, f"""
+                    INSERT INTO stock_latest
+                    (ticker, price, bid, ask, previous_close, volume, market_cap, market_state, timestamp, fetched_at)
+                    VALUES (:ticker, :price, :bid, :ask, :previous_close, :volume, :market_cap, :market_state, :timestamp, :fetched_at)
+                    {self._on_conflict(['ticker'], [
+                        'price', 'bid', 'ask', 'previous_close', 'volume', 'market_cap', 'market_state', 'timestamp', 'fetched_at'
+                    ])}
+                """, records)
             
-            logger.info(f"Updated latest price for {ticker}: {record['price']}")
+            for record in records:
+                logger.debug(f"Stored {record['ticker']} with exact price: ${record['price']:.6f}")
+            logger.info(f"Updated latest prices for {len(records)} tickers")
             return True
             
         except SQLAlchemyError as e:
-            logger.error(f"Failed to update latest price for {ticker}: {e}")
+            logger.error(f"Failed to update latest prices: {e}")
             return False
     
+    def get_historical_data(self, ticker: str, start: Optional[date] = None, end: Optional[date] = None,
+                            use_cache: bool = True) -> pd.DataFrame:
+        """Read stored daily bars with `start` <= date < `end` as a yfinance-style frame indexed by date."""
+        try:
+            if use_cache and self.history_cache is not None:
+                cached = self.history_cache.read(ticker, start=start, end=end)
+                if cached is not None:
+                    return cached
+            
+            if not self.engine:
+                logger.error("Database not connected")
+                return pd.DataFrame()
+            
+            price_columns = ", ".join(self._as_float(column) for column in ['open', 'high', 'low', 'close', 'adj_close'])
+            query = f"""
+                SELECT date, {price_columns}, volume
+                FROM stock_daily
+                WHERE ticker = :ticker
+            """
+            params = {"ticker": ticker}
+            if start is not None:
+                query += " AND date >= :start"
+                params['start'] = start
+            if end is not None:
+                query += " AND date < :end"
+                params['end'] = end
+            query += " ORDER BY date"
+            
+            with self.connection() as conn:
+                rows = conn.execute(text(query), params).fetchall()
+            
+            frame = pd.DataFrame(rows, columns=['Date', 'Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume'])
+            frame = frame.set_index(pd.DatetimeIndex(frame.pop('Date'), name='Date'))
+            return frame.astype(float)
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get historical data for {ticker}: {e}")
+            return pd.DataFrame()
+    
+    def get_price_matrix(self, tickers: List[str], days: int, field: str = 'close') -> pd.DataFrame:
+        """
+        Get the last `days` stored daily bars of every ticker as a float64 frame
+        with one column per ticker and one row per date (NaN where a ticker has
+        no bar). `field` is one of open, high, low, close, adj_close, volume.
+        
+        The database casts the values to double, so no Decimal objects are built
+        and the frame is assembled from the result set in one pivot.
+        """
+        try:
+            if not self.engine:
+                logger.error("Database not connected")
+                return pd.DataFrame()
+            
+            if field not in ('open', 'high', 'low', 'close', 'adj_close', 'volume'):
+                raise ValueError(f"Unknown price field: {field}")
+            
+            if not tickers or days <= 0:
+                return pd.DataFrame(columns=list(tickers), dtype=float)
+            
+            cached = {}
+            frame_column = 'Adj Close' if field == 'adj_close' else field.capitalize()
+            if self.history_cache is not None:
+                for ticker in tickers:
+                    frame = self.history_cache.read(ticker)
+                    if frame is not None:
+                        cached[ticker] = frame[frame_column].tail(days)
+            
+            remaining = [ticker for ticker in tickers if ticker not in cached]
+            if not remaining:
+                matrix = pd.DataFrame(cached)
+                matrix.index.name = 'Date'
+                return matrix.reindex(columns=list(tickers)).sort_index().astype('float64')
+            
+            query = text(f"""
+                WITH ranked AS (
+                    SELECT ticker, date, {self._as_float(field)},
+                           ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY date DESC) AS rn
+                    FROM stock_daily
+                    WHERE ticker IN :tickers
+                )
+                SELECT ticker, date, {field}
+                FROM ranked
+                WHERE rn <= :days
+            """).bindparams(bindparam('tickers', expanding=True))
+            
+            with self.connection() as conn:
+                rows = conn.execute(query, {"tickers": remaining, "days": days}).fetchall()
+            
+            frame = pd.DataFrame(rows, columns=['ticker', 'Date', field])
+            matrix = frame.pivot(index='Date', columns='ticker', values=field)
+            matrix.index = pd.DatetimeIndex(matrix.index, name='Date')
+            if cached:
+                matrix = pd.concat([matrix, pd.DataFrame(cached)], axis=1)
+            return matrix.reindex(columns=list(tickers)).sort_index().astype('float64')
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get {field} matrix: {e}")
+            return pd.DataFrame()
+    
+    def get_daily_checksums(self, tickers: Optional[List[str]] = None) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Per-ticker row count, first and last date and column sums of stock_daily,
+        used to check copies of the table; None on error.
+        """
+        try:
+            if not self.engine:
+                logger.error("Database not connected")
+                return None
+            
+            float_type = 'REAL' if self.backend == 'sqlite' else 'DOUBLE'
+            sums = ",\n".join(
+                f"SUM(CAST({column} AS {float_type})) AS {column}_sum"
+                for column in ['open', 'high', 'low', 'close', 'adj_close', 'volume']
+            )
+            query = f"""
+                SELECT ticker, COUNT(*), MIN(date), MAX(date),
+                       {sums}
+                FROM stock_daily
+            """
+            params = {}
+            if tickers is not None:
+                if not tickers:
+                    return {}
+                query += " WHERE ticker IN :tickers"
+                params['tickers'] = list(tickers)
+            query += " GROUP BY ticker"
+            
+            statement = text(query)
+            if tickers is not None:
+                statement = statement.bindparams(bindparam('tickers', expanding=True))
+            
+            columns = ['open_sum', 'high_sum', 'low_sum', 'close_sum', 'adj_close_sum', 'volume_sum']
+            with self.connection() as conn:
+                return {
+                    row[0]: {
+                        'rows': row[1],
+                        'first_date': row[2],
+                        'last_date': row[3],
+                        **{column: float(value) if value is not None else None for column, value in zip(columns, row[4:])}
+                    }
+                    for row in conn.execute(statement, params).fetchall()
+                }
+                
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get daily checksums: {e}")
+            return None
+    
     def get_trading_day_averages(self, ticker: str, days: int) -> Optional[float]:
         try:
             if not self.engine:
@@ -217,7 +822,7 @@ class DatabaseManager:
                 ) as recent_data
             """
             
-            with self.engine.connect() as conn:
+            with self.connection() as conn:
                 result = conn.execute(text(query), {"ticker": ticker, "days": days})
                 row = result.fetchone()
                 
@@ -231,6 +836,436 @@ class DatabaseManager:
             logger.error(f"Failed to get {days}-day average for {ticker}: {e}")
             return None
     
+    def get_moving_averages(self, tickers: List[str], periods: List[int]) -> Dict[str, Dict[int, Optional[float]]]:
+        """
+        Get the average close over the last N trading days for every ticker and
+        period in a single query.
+        
+        Returns {ticker: {period: average}}; a period is None when the ticker
+        has no closes, and averages over fewer rows when history is short,
+        matching get_trading_day_averages.
+        """
+        try:
+            if not self.engine:
+                logger.error("Database not connected")
+                return {}
+            
+            periods = sorted({int(period) for period in periods})
+            if not tickers or not periods:
+                return {}
+            
+            # Periods are ints, so inlining them as column expressions is safe
+            average_columns = ",\n".join(
+                f"AVG(CASE WHEN rn <= {period} THEN close END) AS avg_{period}" for period in periods
+            )
+            query = text(f"""
+                WITH ranked AS (
+                    SELECT ticker, close,
+                           ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY date DESC) AS rn
+                    FROM stock_daily
+                    WHERE ticker IN :tickers
+                    AND close IS NOT NULL
+                )
+                SELECT ticker,
+                       {average_columns}
+                FROM ranked
+                WHERE rn <= :max_period
+                GROUP BY ticker
+            """).bindparams(bindparam('tickers', expanding=True))
+            
+            with self.connection() as conn:
+                result = conn.execute(query, {"tickers": list(tickers), "max_period": periods[-1]})
+                averages = {
+                    row[0]: {
+                        period: float(value) if value is not None else None
+                        for period, value in zip(periods, row[1:])
+                    }
+                    for row in result.fetchall()
+                }
+            
+            for ticker in tickers:
+                if ticker not in averages:
+                    logger.warning(f"Insufficient data for {ticker} moving averages")
+                    averages[ticker] = {period: None for period in periods}
+            
+            return averages
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get moving averages: {e}")
+            return {}
+    
+    def get_recent_closes(self, tickers: List[str], limit: int) -> Dict[str, List[tuple]]:
+        """Get the last `limit` non-null closes per ticker as [(date, close), ...], oldest first."""
+        try:
+            if not self.engine:
+                logger.error("Database not connected")
+                return {}
+            
+            if not tickers:
+                return {}
+            
+            closes: Dict[str, List[tuple]] = {}
+            if self.history_cache is not None:
+                closes.update(self.history_cache.recent_closes(tickers, limit))
+                tickers = [ticker for ticker in tickers if ticker not in closes]
+                if not tickers:
+                    return closes
+            
+            query = text(f"""
+                WITH ranked AS (
+                    SELECT ticker, date, {self._as_float('close')},
+                           ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY date DESC) AS rn
+                    FROM stock_daily
+                    WHERE ticker IN :tickers
+                    AND close IS NOT NULL
+                )
+                SELECT ticker, date, close
+                FROM ranked
+                WHERE rn <= :limit
+                ORDER BY ticker, date
+            """).bindparams(bindparam('tickers', expanding=True))
+            
+            with self.connection() as conn:
+                for row in conn.execute(query, {"tickers": list(tickers), "limit": limit}):
+                    closes.setdefault(row[0], []).append((row[1], float(row[2])))
+            
+            return closes
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get recent closes: {e}")
+            return {}
+    
+    def refresh_indicator_snapshots(self, tickers: Optional[List[str]] = None) -> bool:
+        """Rebuild the stock_daily part of the snapshot for the given tickers, or all of them."""
+        try:
+            if not self.engine:
+                logger.error("Database not connected")
+                return False
+            
+            with self.transaction() as conn:
+                self._refresh_indicator_snapshots(conn, tickers)
+            
+            logger.info(f"Refreshed indicator snapshots for {len(tickers) if tickers is not None else 'all'} tickers")
+            return True
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to refresh indicator snapshots: {e}")
+            return False
+    
+    def _refresh_indicator_snapshots(self, conn, tickers: Optional[List[str]] = None) -> None:
+        # rn counts only non-null closes, so each window averages the last N
+        # closes exactly like get_trading_day_averages. The outer WHERE keeps
+        # SQLite from reading the upsert's ON as a join condition.
+        ticker_filter = "WHERE ticker IN :tickers" if tickers is not None else ""
+        query = text(f"""
+            INSERT INTO stock_indicator_snapshot
+            (ticker, latest_date, earliest_date, row_count, latest_close, avg_7, avg_30, avg_90, updated_at)
+            SELECT ticker,
+                   MAX(date),
+                   MIN(date),
+                   COUNT(*),
+                   MAX(CASE WHEN close IS NOT NULL AND rn = 1 THEN close END),
+                   AVG(CASE WHEN close IS NOT NULL AND rn <= 7 THEN close END),
+                   AVG(CASE WHEN close IS NOT NULL AND rn <= 30 THEN close END),
+                   AVG(CASE WHEN close IS NOT NULL AND rn <= 90 THEN close END),
+                   :updated_at
+            FROM (
+                SELECT ticker, date, close,
+                       SUM(CASE WHEN close IS NOT NULL THEN 1 ELSE 0 END)
+                           OVER (PARTITION BY ticker ORDER BY date DESC ROWS UNBOUNDED PRECEDING) AS rn
+                FROM stock_daily
+                {ticker_filter}
+            ) ranked
+            WHERE TRUE
+            GROUP BY ticker
+            {self._on_conflict(['ticker'], [
+                'latest_date', 'earliest_date', 'row_count', 'latest_close', 'avg_7', 'avg_30', 'avg_90', 'updated_at'
+            ])}
+        """)
+        params = {"updated_at": datetime.utcnow()}
+        
+        if tickers is not None:
+            if not tickers:
+                return
+            query = query.bindparams(bindparam('tickers', expanding=True))
+            params['tickers'] = list(tickers)
+        conn.execute(query, params)
+    
+    def get_indicator_snapshots(self, tickers: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Get the indicator snapshot row of each ticker (all tickers when none are given)."""
+        try:
+            if not self.engine:
+                logger.error("Database not connected")
+                return {}
+            
+            query = """
+                SELECT ticker, latest_date, earliest_date, row_count, latest_close,
+                       avg_7, avg_30, avg_90, last_alert_type, last_alert_price, last_alert_at, updated_at
+                FROM stock_indicator_snapshot
+            """
+            params = {}
+            if tickers is not None:
+                if not tickers:
+                    return {}
+                query += " WHERE ticker IN :tickers"
+                params['tickers'] = list(tickers)
+            
+            statement = text(query)
+            if tickers is not None:
+                statement = statement.bindparams(bindparam('tickers', expanding=True))
+            
+            def number(value):
+                return float(value) if value is not None else None
+            
+            with self.connection() as conn:
+                return {
+                    row[0]: {
+                        'latest_date': row[1],
+                        'earliest_date': row[2],
+                        'row_count': row[3],
+                        'latest_close': number(row[4]),
+                        'averages': {7: number(row[5]), 30: number(row[6]), 90: number(row[7])},
+                        'last_alert_type': row[8],
+                        'last_alert_price': number(row[9]),
+                        'last_alert_at': row[10],
+                        'updated_at': row[11]
+                    }
+                    for row in conn.execute(statement, params).fetchall()
+                }
+                
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get indicator snapshots: {e}")
+            return {}
+    
+    def get_reference_bars(self, tickers: List[str], before: date) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the most recent stored daily bar strictly before `before` for each ticker.
+        
+        Tickers without any stored bar before that date are omitted.
+        """
+        try:
+            if not self.engine:
+                logger.error("Database not connected")
+                return {}
+            
+            if not tickers:
+                return {}
+            
+            query = text("""
+                SELECT d.ticker, d.date, d.close
+                FROM stock_daily d
+                JOIN (
+                    SELECT ticker, MAX(date) AS ref_date
+                    FROM stock_daily
+                    WHERE ticker IN :tickers
+                    AND date < :before
+                    GROUP BY ticker
+                ) r ON d.ticker = r.ticker AND d.date = r.ref_date
+            """).bindparams(bindparam('tickers', expanding=True))
+            
+            with self.connection() as conn:
+                result = conn.execute(query, {"tickers": list(tickers), "before": before})
+                return {
+                    row[0]: {
+                        'date': row[1],
+                        'close': float(row[2]) if row[2] is not None else None
+                    }
+                    for row in result.fetchall()
+                }
+                
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get reference bars: {e}")
+            return {}
+    
+    def get_last_intraday_timestamps(self, tickers: List[str], interval: str = '1m') -> Dict[str, datetime]:
+        """Get the start (UTC) of the newest stored intraday bar for each ticker."""
+        try:
+            if not self.engine:
+                logger.error("Database not connected")
+                return {}
+            
+            if not tickers:
+                return {}
+            
+            query = text("""
+                SELECT ticker, MAX(ts)
+                FROM stock_intraday
+                WHERE ticker IN :tickers
+                AND bar_interval = :interval
+                GROUP BY ticker
+            """).bindparams(bindparam('tickers', expanding=True))
+            
+            with self.connection() as conn:
+                result = conn.execute(query, {"tickers": list(tickers), "interval": interval})
+                # MAX() loses the column type on SQLite, which then returns ISO text
+                return {
+                    row[0]: datetime.fromisoformat(row[1]) if isinstance(row[1], str) else row[1]
+                    for row in result.fetchall()
+                    if row[1] is not None
+                }
+                
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get last intraday timestamps: {e}")
+            return {}
+    
+    def insert_intraday_bars(self, ticker: str, data: pd.DataFrame, interval: str = '1m') -> bool:
+        """
+        Append intraday bars for one ticker in a single multi-row statement.
+        
+        Bars that are already stored are overwritten, so re-sending the last
+        (possibly still forming) bar updates it in place.
+        """
+        try:
+            if not self.engine:
+                logger.error("Database not connected")
+                return False
+            
+            if data is None or data.empty:
+                return True
+            
+            records = self._intraday_records(ticker, interval, data)
+            
+            with self.transaction() as conn:
+                self._upsert_intraday(conn, records)
+            
+            logger.debug(f"Stored {len(records)} {interval} bars for {ticker}")
+            return True
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to insert intraday bars for {ticker}: {e}")
+            return False
+    
+    def get_intraday_bars(self, ticker: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                          interval: str = '1m') -> pd.DataFrame:
+        """
+        Read stored intraday bars as an OHLCV frame indexed by bar start (UTC).
+        
+        `start` is inclusive and `end` exclusive, both in UTC.
+        """
+        try:
+            if not self.engine:
+                logger.error("Database not connected")
+                return pd.DataFrame()
+            
+            query = """
+                SELECT ts, open, high, low, close, volume
+                FROM stock_intraday
+                WHERE ticker = :ticker
+                AND bar_interval = :interval
+            """
+            params = {"ticker": ticker, "interval": interval}
+            if start is not None:
+                query += " AND ts >= :start"
+                params['start'] = start
+            if end is not None:
+                query += " AND ts < :end"
+                params['end'] = end
+            query += " ORDER BY ts"
+            
+            with self.connection() as conn:
+                rows = conn.execute(text(query), params).fetchall()
+            
+            return self._intraday_frame(rows)
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get intraday bars for {ticker}: {e}")
+            return pd.DataFrame()
+    
+    def rollup_intraday_bars(self, raw_retention_days: int = 7, five_minute_retention_days: int = 60) -> Dict[str, int]:
+        """
+        Roll 1m bars older than raw_retention_days into 5m bars, and 5m bars older
+        than five_minute_retention_days into 1h bars, deleting the rolled-up rows.
+        
+        Cutoffs fall on UTC midnight so only complete buckets are aggregated.
+        """
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        stages = [
+            ('1m', '5m', '5min', today - timedelta(days=raw_retention_days)),
+            ('5m', '1h', '1h', today - timedelta(days=five_minute_retention_days))
+        ]
+        rolled_up = {}
+        
+        try:
+            if not self.engine:
+                logger.error("Database not connected")
+                return {}
+            
+            for source, target, rule, cutoff in stages:
+                with self.transaction() as conn:
+                    rows = conn.execute(text("""
+                        SELECT ticker, ts, open, high, low, close, volume
+                        FROM stock_intraday
+                        WHERE bar_interval = :source
+                        AND ts < :cutoff
+                        ORDER BY ticker, ts
+                    """), {"source": source, "cutoff": cutoff}).fetchall()
+                    
+                    if not rows:
+                        rolled_up[target] = 0
+                        continue
+                    
+                    records = []
+                    frame = pd.DataFrame(rows, columns=['ticker', 'ts', 'Open', 'High', 'Low', 'Close', 'Volume'])
+                    for ticker, bars in frame.groupby('ticker'):
+                        bars = self._intraday_frame(bars.drop(columns='ticker').itertuples(index=False))
+                        resampled = bars.resample(rule).agg({
+                            'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'
+                        }).dropna(subset=['Close'])
+                        records.extend(self._intraday_records(ticker, target, resampled))
+                    
+                    self._upsert_intraday(conn, records)
+                    conn.execute(text("""
+                        DELETE FROM stock_intraday
+                        WHERE bar_interval = :source
+                        AND ts < :cutoff
+                    """), {"source": source, "cutoff": cutoff})
+                
+                rolled_up[target] = len(records)
+                logger.info(f"Rolled {len(rows)} {source} bars before {cutoff:%Y-%m-%d} into {len(records)} {target} bars")
+            
+            return rolled_up
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to roll up intraday bars: {e}")
+            return rolled_up
+    
+    @staticmethod
+    def _intraday_frame(rows) -> pd.DataFrame:
+        frame = pd.DataFrame(list(rows), columns=['ts', 'Open', 'High', 'Low', 'Close', 'Volume'])
+        frame = frame.set_index(pd.DatetimeIndex(frame.pop('ts'), name='Datetime'))
+        frame[['Open', 'High', 'Low', 'Close']] = frame[['Open', 'High', 'Low', 'Close']].astype(float)
+        frame['Volume'] = frame['Volume'].astype(float)
+        return frame
+    
+    @classmethod
+    def _intraday_records(cls, ticker: str, interval: str, data: pd.DataFrame) -> List[Dict[str, Any]]:
+        index = pd.DatetimeIndex(data.index)
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        
+        columns = {
+            'ts': index.to_pydatetime().tolist(),
+            'open': cls._nullable(data['Open']),
+            'high': cls._nullable(data['High']),
+            'low': cls._nullable(data['Low']),
+            'close': cls._nullable(data['Close']),
+            'volume': cls._nullable(data['Volume'], integer=True) if 'Volume' in data.columns else [None] * len(data)
+        }
+        fetched_at = datetime.utcnow()
+        
+        return [
+            dict(zip(columns, values), ticker=ticker, bar_interval=interval, fetched_at=fetched_at)
+            for values in zip(*columns.values())
+        ]
+    
+    def _upsert_intraday(self, conn, records: List[Dict[str, Any]]) -> None:
+        self._execute_chunked(conn, f"""
+            INSERT INTO stock_intraday
+            (ticker, bar_interval, ts, open, high, low, close, volume, fetched_at)
+            VALUES (:ticker, :bar_interval, :ts, :open, :high, :low, :close, :volume, :fetched_at)
+            {self._on_conflict(['ticker', 'bar_interval', 'ts'], ['open', 'high', 'low', 'close', 'volume', 'fetched_at'])}
+        """, records)
+    
     def get_current_price(self, ticker: str) -> Optional[float]:
         try:
             if not self.engine:
@@ -243,7 +1278,7 @@ class DatabaseManager:
                 WHERE ticker = :ticker
             """
             
-            with self.engine.connect() as conn:
+            with self.connection() as conn:
                 result = conn.execute(text(query), {"ticker": ticker})
                 row = result.fetchone()
                 
@@ -265,9 +1300,10 @@ class DatabaseManager:
             
             averages = {}
             periods = [7, 30, 90]
+            batch = self.get_moving_averages([ticker], periods).get(ticker, {})
             
             for period in periods:
-                avg_value = self.get_trading_day_averages(ticker, period)
+                avg_value = batch.get(period)
                 averages[f'{period}_day'] = avg_value
                 
                 if avg_value:
@@ -288,22 +1324,40 @@ class DatabaseManager:
                 logger.error("Database not connected")
                 return []
             
+            return sorted(row['ticker'] for row in self._cached_watchlist() if row['is_active'])
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get tickers from watchlist: {e}")
+            return []
+    
+    def get_tickers_needing_backfill(self, min_rows: int = 90) -> Optional[Dict[str, int]]:
+        """
+        Get the active watchlist tickers with fewer than `min_rows` daily bars
+        as {ticker: row_count}; None on error.
+        
+        Reads the per-ticker snapshot rather than stock_daily, so the cost
+        depends on the watchlist size only.
+        """
+        try:
+            if not self.engine:
+                logger.error("Database not connected")
+                return None
+            
             query = """
-                SELECT ticker
-                FROM watchlist
-                WHERE is_active = TRUE
-                ORDER BY ticker
+                SELECT w.ticker, COALESCE(s.row_count, 0)
+                FROM watchlist w
+                LEFT JOIN stock_indicator_snapshot s ON s.ticker = w.ticker
+                WHERE w.is_active = TRUE
+                AND (s.ticker IS NULL OR s.row_count < :min_rows)
             """
             
-            with self.engine.connect() as conn:
-                result = conn.execute(text(query))
-                tickers = [row[0] for row in result.fetchall()]
+            with self.connection() as conn:
+                result = conn.execute(text(query), {"min_rows": min_rows})
+                return {row[0]: int(row[1]) for row in result.fetchall()}
                 
-            return tickers
-            
         except SQLAlchemyError as e:
-            logger.error(f"Failed to get tickers from watchlist: {e}")
-            return []
+            logger.error(f"Failed to get tickers needing backfill: {e}")
+            return None
     
     def save_alert_to_database(self, ticker: str, alert_type: str, current_price: float, 
                               average_price: float, absolute_difference: float, 
@@ -322,45 +1376,101 @@ class DatabaseManager:
         Returns:
             bool: True if alert saved successfully, False otherwise
         """
+        return self.save_alerts_to_database([{
+            'ticker': ticker,
+            'alert_type': alert_type,
+            'current_price': current_price,
+            'average_price': average_price,
+            'absolute_difference': absolute_difference,
+            'percent_difference': percent_difference
+        }])
+    
+    def save_alerts_to_database(self, alerts: List[Dict[str, Any]]) -> bool:
+        """
+        Save a batch of alerts in one multi-row insert and one transaction.
+        
+        Each alert dict has the save_alert_to_database arguments as keys. Either
+        every alert is saved or none is.
+        """
         try:
             if not self.engine:
                 logger.error("Database not connected")
                 return False
             
-            record = {
-                'ticker': ticker,
-                'alert_type': alert_type,
-                'current_price': current_price,
-                'average_price': average_price,
-                'absolute_difference': absolute_difference,
-                'percent_difference': percent_difference,
-                'sent_at': datetime.now()
-            }
+            if not alerts:
+                return True
             
-            with self.engine.connect() as conn:
-                stmt = """
+            sent_at = datetime.now()
+            records = [
+                {
+                    'ticker': alert['ticker'],
+                    'alert_type': alert['alert_type'],
+                    'current_price': alert['current_price'],
+                    'average_price': alert['average_price'],
+                    'absolute_difference': alert['absolute_difference'],
+                    'percent_difference': alert['percent_difference'],
+                    'sent_at': sent_at
+                }
+                for alert in alerts
+            ]
+            
+            with self.transaction() as conn:
+                self._execute_chunked(conn, """
                     INSERT INTO alert_history 
                     (ticker, alert_type, current_price, average_price, absolute_difference, percent_difference, sent_at)
                     VALUES (:ticker, :alert_type, :current_price, :average_price, :absolute_difference, :percent_difference, :sent_at)
-                """
-                conn.execute(text(stmt), {
-                    'ticker': ticker,
-                    'alert_type': alert_type,
-                    'current_price': current_price,
-                    'average_price': average_price,
-                    'absolute_difference': absolute_difference,
-                    'percent_difference': percent_difference,
-                    'sent_at': record['sent_at']
-                })
-                conn.commit()
-            
-            logger.info(f"Alert saved to database for {ticker} {alert_type}")
+                """, records)
+                
+                # Last alert per ticker; with several periods the longest one is kept
+                last_alerts = {}
+                for record in sorted(records, key=lambda item: int(item['alert_type'].split('_')[0])):
+                    last_alerts[record['ticker']] = record
+                self._execute_chunked(conn, f"""
+                    INSERT INTO stock_indicator_snapshot
+                    (ticker, row_count, last_alert_type, last_alert_price, last_alert_at, updated_at)
+                    VALUES (:ticker, 0, :alert_type, :current_price, :sent_at, :sent_at)
+                    {self._on_conflict(['ticker'], ['last_alert_type', 'last_alert_price', 'last_alert_at', 'updated_at'])}
+                """, list(last_alerts.values()))
+            
+            if self.alert_ledger is not None:
+                def record_sent():
+                    for record in records:
+                        self.alert_ledger.record(record['ticker'], record['alert_type'])
+                
+                # Rows rolled back at a later checkpoint must not keep suppressing
+                # the alert, so the ledger follows the commit
+                self.after_commit(record_sent, self.alert_ledger.invalidate)
+            
+            for record in records:
+                logger.info(f"Alert saved to database for {record['ticker']} {record['alert_type']}")
             return True
             
         except Exception as e:
-            logger.error(f"Failed to save alert to database for {ticker} {alert_type}: {e}")
+            logger.error(f"Failed to save {len(alerts)} alerts to database: {e}")
             return False
     
+    def get_alerts_since(self, since: datetime) -> Optional[List[tuple]]:
+        """Get the distinct (ticker, alert_type) pairs alerted at or after `since`; None on error."""
+        try:
+            if not self.engine:
+                logger.error("Database not connected")
+                return None
+            
+            # Covered by idx_alert_dedup, so this never touches the table rows
+            query = """
+                SELECT DISTINCT ticker, alert_type
+                FROM alert_history
+                WHERE sent_at >= :since
+            """
+            
+            with self.connection() as conn:
+                result = conn.execute(text(query), {"since": since})
+                return [(row[0], row[1]) for row in result.fetchall()]
+                
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get alerts since {since}: {e}")
+            return None
+    
     def add_company_to_watchlist(self, ticker: str, company_name: str = None, 
                                 sector: str = "Custom", notes: str = None) -> bool:
         """Add a new company to the watchlist."""
@@ -375,16 +1485,17 @@ class DatabaseManager:
                 'sector': sector,
                 'notes': notes,
                 'added_at': datetime.now(),
-                'is_active': True
+                'is_active': True,
+                'updated_at': datetime.utcnow()
             }
             
-            with self.engine.connect() as conn:
+            with self.transaction() as conn:
                 stmt = """
-                    INSERT INTO watchlist (ticker, company_name, sector, notes, added_at, is_active)
-                    VALUES (:ticker, :company_name, :sector, :notes, :added_at, :is_active)
+                    INSERT INTO watchlist (ticker, company_name, sector, notes, added_at, is_active, updated_at)
+                    VALUES (:ticker, :company_name, :sector, :notes, :added_at, :is_active, :updated_at)
                 """
                 conn.execute(text(stmt), record)
-                conn.commit()
+            self._invalidate_watchlist()
             
             logger.info(f"Added {ticker} to watchlist: {company_name or 'Unknown Company'}")
             return True
@@ -400,14 +1511,14 @@ class DatabaseManager:
                 logger.error("Database not connected")
                 return False
             
-            with self.engine.connect() as conn:
+            with self.transaction() as conn:
                 stmt = """
                     UPDATE watchlist 
-                    SET is_active = FALSE 
+                    SET is_active = FALSE, updated_at = :updated_at
                     WHERE ticker = :ticker
                 """
-                result = conn.execute(text(stmt), {"ticker": ticker.upper()})
-                conn.commit()
+                result = conn.execute(text(stmt), {"ticker": ticker.upper(), "updated_at": datetime.utcnow()})
+                self._invalidate_watchlist()
                 
                 if result.rowcount > 0:
                     logger.info(f"Removed {ticker} from active watchlist")
@@ -427,33 +1538,55 @@ class DatabaseManager:
                 logger.error("Database not connected")
                 return []
             
-            query = """
-                SELECT ticker, company_name, sector, added_at, is_active, notes
-                FROM watchlist
-            """
-            if active_only:
-                query += " WHERE is_active = TRUE"
-            query += " ORDER BY added_at DESC"
-            
-            with self.engine.connect() as conn:
-                result = conn.execute(text(query))
-                watchlist = []
-                for row in result.fetchall():
-                    watchlist.append({
-                        'ticker': row[0],
-                        'company_name': row[1],
-                        'sector': row[2],
-                        'added_at': row[3],
-                        'is_active': row[4],
-                        'notes': row[5]
-                    })
-                
-            return watchlist
+            return [
+                dict(row)
+                for row in self._cached_watchlist()
+                if row['is_active'] or not active_only
+            ]
             
         except Exception as e:
             logger.error(f"Failed to get watchlist: {e}")
             return []
     
+    def _cached_watchlist(self) -> List[Dict[str, Any]]:
+        # One tiny probe per call; the full table is only read when it changed.
+        # COUNT(*) catches deletes that MAX(updated_at) alone would miss.
+        with self.connection() as conn:
+            version = tuple(conn.execute(text("SELECT COUNT(*), MAX(updated_at) FROM watchlist")).fetchone())
+            
+            with self._watchlist_lock:
+                if self._watchlist_rows is not None and self._watchlist_version == version:
+                    return self._watchlist_rows
+            
+            result = conn.execute(text("""
+                SELECT ticker, company_name, sector, added_at, is_active, notes
+                FROM watchlist
+                ORDER BY added_at DESC
+            """))
+            rows = [
+                {
+                    'ticker': row[0],
+                    'company_name': row[1],
+                    'sector': row[2],
+                    'added_at': row[3],
+                    'is_active': row[4],
+                    'notes': row[5]
+                }
+                for row in result.fetchall()
+            ]
+        
+        with self._watchlist_lock:
+            self._watchlist_rows = rows
+            self._watchlist_version = version
+        
+        logger.debug(f"Watchlist reloaded: {len(rows)} rows")
+        return rows
+    
+    def _invalidate_watchlist(self) -> None:
+        with self._watchlist_lock:
+            self._watchlist_rows = None
+            self._watchlist_version = None
+    
     def close(self) -> None:
         if self.engine:
             self.engine.dispose()
@@ -0,0 +1,221 @@
+import logging
+import os
+import threading
+from datetime import date
+from typing import Any, Dict, List, Optional, Set
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'adj_close']
+
+# yfinance column names used by the frames DatabaseManager reads and writes
+FRAME_COLUMNS = {
+    'open': 'Open',
+    'high': 'High',
+    'low': 'Low',
+    'close': 'Close',
+    'adj_close': 'Adj Close',
+    'volume': 'Volume'
+}
+
+
+class ParquetHistoryCache:
+    """
+    Local Parquet copy of stock_daily, one file per ticker under `path`.
+
+    Files are updated once the rows written by insert_historical_data are
+    committed (at the unit of work's checkpoint when one is open) and read
+    with memory mapping. A ticker is only served from its file once the file is
+    known to match the database: it was built from a full database read, or
+    the last reconcile() found its checksum (row count, first and last date,
+    column sums) equal to the database's. Anything else falls through to the
+    database.
+    """
+
+    def __init__(self, db_manager: Any, path: str = 'cache/history', compression: str = 'zstd',
+                 tolerance: float = 1e-9):
+        self.db = db_manager
+        self.path = path
+        self.compression = compression
+        self.tolerance = tolerance
+
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.Lock()
+        # Serializes file rewrites between the monitoring cycle and reconcile()
+        self._write_lock = threading.Lock()
+        self._trusted: Set[str] = set()
+
+    def is_trusted(self, ticker: str) -> bool:
+        with self._lock:
+            return ticker in self._trusted
+
+    def read(self, ticker: str, start: Optional[date] = None, end: Optional[date] = None) -> Optional[pd.DataFrame]:
+        """
+        Daily bars of a ticker with `start` <= date < `end` in the
+        get_historical_data layout, or None when the file cannot be trusted.
+        """
+        if not self.is_trusted(ticker):
+            return None
+
+        try:
+            frame = self._read_file(ticker)
+        except Exception as e:
+            logger.warning(f"History cache read failed for {ticker}: {e}")
+            self.invalidate(ticker)
+            return None
+
+        if start is not None:
+            frame = frame[frame.index >= pd.Timestamp(start)]
+        if end is not None:
+            frame = frame[frame.index < pd.Timestamp(end)]
+        return frame
+
+    def write(self, ticker: str, data: pd.DataFrame) -> None:
+        """Merge bars that were just committed to stock_daily into the ticker's file."""
+        try:
+            if data is None or data.empty:
+                return
+
+            incoming = self._normalize(data)
+            with self._write_lock:
+                if self.is_trusted(ticker):
+                    existing = self._read_file(ticker)
+                    merged = pd.concat([existing, incoming])
+                    merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+                    self._write_file(ticker, merged)
+                else:
+                    # Without a trusted file the new rows alone are not the full
+                    # history, so the file is rebuilt from the database
+                    self._rebuild(ticker)
+
+        except Exception as e:
+            logger.warning(f"History cache write failed for {ticker}: {e}")
+            self.invalidate(ticker)
+
+    def recent_closes(self, tickers: List[str], limit: int) -> Dict[str, List[tuple]]:
+        """Last `limit` non-null closes per trusted ticker as [(date, close), ...], oldest first."""
+        closes = {}
+        for ticker in tickers:
+            frame = self.read(ticker)
+            if frame is None:
+                continue
+
+            tail = frame['Close'].dropna().tail(limit)
+            if not tail.empty:
+                closes[ticker] = list(zip(tail.index.date, tail.tolist()))
+        return closes
+
+    def reconcile(self, tickers: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Compare each ticker's file with stock_daily and rebuild the ones that
+        differ. Tickers without stored bars lose their file.
+        """
+        expected = self.db.get_daily_checksums(tickers)
+        if expected is None:
+            return {}
+
+        if tickers is None:
+            tickers = sorted(set(expected) | {
+                name[:-len('.parquet')] for name in os.listdir(self.path) if name.endswith('.parquet')
+            })
+
+        summary = {'checked': 0, 'matched': 0, 'rebuilt': 0, 'removed': 0}
+        for ticker in tickers:
+            summary['checked'] += 1
+            try:
+                if ticker not in expected:
+                    self.invalidate(ticker)
+                    with self._write_lock:
+                        if os.path.exists(self._file(ticker)):
+                            os.remove(self._file(ticker))
+                            summary['removed'] += 1
+                    continue
+
+                with self._write_lock:
+                    if os.path.exists(self._file(ticker)) and self._matches(self._read_file(ticker), expected[ticker]):
+                        with self._lock:
+                            self._trusted.add(ticker)
+                        summary['matched'] += 1
+                    elif self._rebuild(ticker):
+                        summary['rebuilt'] += 1
+
+            except Exception as e:
+                logger.warning(f"History cache reconcile failed for {ticker}: {e}")
+                self.invalidate(ticker)
+
+        logger.info(f"History cache reconciled: {summary}")
+        return summary
+
+    def invalidate(self, ticker: str) -> None:
+        with self._lock:
+            self._trusted.discard(ticker)
+
+    def _rebuild(self, ticker: str) -> bool:
+        frame = self.db.get_historical_data(ticker, use_cache=False)
+        if frame is None or frame.empty:
+            self.invalidate(ticker)
+            return False
+
+        self._write_file(ticker, frame)
+        with self._lock:
+            self._trusted.add(ticker)
+        return True
+
+    def _matches(self, frame: pd.DataFrame, checksum: Dict[str, Any]) -> bool:
+        if len(frame) != checksum['rows']:
+            return False
+        if frame.empty:
+            return True
+        if str(frame.index[0].date()) != str(checksum['first_date'])[:10]:
+            return False
+        if str(frame.index[-1].date()) != str(checksum['last_date'])[:10]:
+            return False
+
+        for column in PRICE_COLUMNS + ['volume']:
+            want = checksum[f'{column}_sum'] or 0.0
+            got = float(frame[FRAME_COLUMNS[column]].sum())
+            if abs(want - got) > self.tolerance * max(1.0, abs(want)):
+                return False
+        return True
+
+    @staticmethod
+    def _normalize(data: pd.DataFrame) -> pd.DataFrame:
+        # Rounded like DECIMAL(18,6), so file and database sums agree exactly
+        index = pd.DatetimeIndex(data.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        frame = pd.DataFrame(
+            {
+                name: pd.to_numeric(data[name], errors='coerce').astype(float)
+                for name in FRAME_COLUMNS.values()
+            },
+            index=pd.DatetimeIndex(index.normalize(), name='Date')
+        )
+        frame[[FRAME_COLUMNS[column] for column in PRICE_COLUMNS]] = frame[
+            [FRAME_COLUMNS[column] for column in PRICE_COLUMNS]
+        ].round(6)
+        frame['Volume'] = frame['Volume'].round()
+        return frame
+
+    def _read_file(self, ticker: str) -> pd.DataFrame:
+        table = pq.read_table(self._file(ticker), memory_map=True)
+        frame = table.to_pandas(date_as_object=False)
+        frame = frame.set_index(pd.DatetimeIndex(frame.pop('date').astype('datetime64[ns]'), name='Date'))
+        return frame.rename(columns=FRAME_COLUMNS)
+
+    def _write_file(self, ticker: str, frame: pd.DataFrame) -> None:
+        frame = self._normalize(frame)
+        columns = {column: frame[name].to_numpy() for column, name in FRAME_COLUMNS.items()}
+        table = pa.table({'date': pa.array(frame.index.date, type=pa.date32()), **columns})
+
+        tmp_path = f"{self._file(ticker)}.{threading.get_ident()}.tmp"
+        pq.write_table(table, tmp_path, compression=self.compression)
+        os.replace(tmp_path, self._file(ticker))
+
+    def _file(self, ticker: str) -> str:
+        return os.path.join(self.path, f"{ticker.replace(os.sep, '_')}.parquet")
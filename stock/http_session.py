@@ -0,0 +1,90 @@
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+import yfinance as yf
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class YahooSessionManager:
+    """
+    Process-wide HTTP session for all Yahoo Finance traffic.
+
+    One keep-alive connection pool is shared by every fetch worker, so TLS
+    handshakes and yfinance's cookie/crumb negotiation happen once per process.
+    Freshness comes from no-cache request headers instead of patching pandas
+    or yfinance internals.
+    """
+
+    CACHE_BUSTING_HEADERS = {
+        'Cache-Control': 'no-cache, no-store, max-age=0',
+        'Pragma': 'no-cache'
+    }
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 20,
+                 connect_timeout: float = 5.0, read_timeout: float = 15.0):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        self._lock = threading.Lock()
+        self._tickers: Dict[str, yf.Ticker] = {}
+        self.session = self._build_session()
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=False
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update(self.CACHE_BUSTING_HEADERS)
+
+        logger.info(f"HTTP session created (pool size {self.pool_maxsize}, timeouts {self.timeout})")
+        return session
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        return (self.connect_timeout, self.read_timeout)
+
+    def get_ticker(self, symbol: str) -> yf.Ticker:
+        """Return the shared Ticker object for a symbol, creating it on first use."""
+        with self._lock:
+            ticker = self._tickers.get(symbol)
+            if ticker is None:
+                ticker = yf.Ticker(symbol, session=self.session)
+                self._tickers[symbol] = ticker
+            return ticker
+
+    def new_ticker(self, symbol: str) -> yf.Ticker:
+        # Ticker memoizes .info for its lifetime, so info reloads use a throwaway
+        # object that still rides on the shared session and connection pool
+        return yf.Ticker(symbol, session=self.session)
+
+    def get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """GET a Yahoo JSON endpoint on the shared session."""
+        try:
+            from yfinance.data import YfData
+        except ImportError:
+            YfData = None
+
+        if YfData is not None and hasattr(YfData, 'get_raw_json'):
+            # Reuses the cookie/crumb yfinance has already negotiated for this session
+            return YfData(session=self.session).get_raw_json(url, params=params, timeout=self.read_timeout)
+
+        response = self.session.get(url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self) -> None:
+        with self._lock:
+            self._tickers.clear()
+            self.session.close()
+        logger.info("HTTP session closed")
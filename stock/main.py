@@ -4,7 +4,8 @@ import os
 import sys
 import logging
 import logging.handlers
-from datetime import datetime, time
+from datetime import datetime, date, time, timedelta
+from time import perf_counter
 from typing import Dict, List, Optional
 import yaml
 from dotenv import load_dotenv
@@ -14,6 +15,16 @@ from apscheduler.triggers.cron import CronTrigger
 
 from stock.database import DatabaseManager
 from stock.data_fetcher import StockDataFetcher
+from stock.metadata_cache import TickerMetadataCache
+from stock.http_session import YahooSessionManager
+from stock.providers import MarketDataProvider, YahooFinanceProvider
+from stock.replay import ReplayProvider
+from stock.circuit_breaker import TickerCircuitBreaker
+from stock.market_hours import MarketCalendar
+from stock.rolling_averages import RollingAverageEngine
+from stock.alert_ledger import AlertLedger
+from stock.retention import RetentionManager
+from stock.history_cache import ParquetHistoryCache
 from stock.analytics import StockAnalytics
 from stock.alerts import TelegramAlertSystem
 
@@ -56,6 +67,14 @@ class StockMonitor:
         self.analytics = None
         self.alert_system = None
         self.scheduler = None
+        self.market_calendar = None
+        self.rolling_averages = None
+        self.alert_ledger = None
+        self.retention = None
+        self.history_cache = None
+        self.last_cycle_stats: Dict = {}
+        # Last backfill attempt per ticker, for sync_new_watchlist_stocks
+        self.backfill_attempts: Dict[str, datetime] = {}
         
         self._initialize_system()
     
@@ -117,13 +136,16 @@ class StockMonitor:
     def _initialize_database(self) -> None:
         try:
             db_config = self.config['database']
-            connection_string = (
-                f"mysql+pymysql://{db_config['user']}:{db_config['password']}"
-                f"@{db_config['host']}:{db_config['port']}/{db_config['name']}"
-                f"?charset={db_config['charset']}"
-            )
+            if db_config.get('backend', 'mariadb') == 'sqlite':
+                connection_string = f"sqlite:///{db_config.get('sqlite_path', 'data/stock_monitor.db')}"
+            else:
+                connection_string = (
+                    f"mysql+pymysql://{db_config['user']}:{db_config['password']}"
+                    f"@{db_config['host']}:{db_config['port']}/{db_config['name']}"
+                    f"?charset={db_config['charset']}"
+                )
             
-            self.db_manager = DatabaseManager(connection_string)
+            self.db_manager = DatabaseManager(connection_string, bulk_chunk_size=db_config.get('bulk_chunk_size', 500))
             
             max_retries = 5
             retry_delay = 2
@@ -147,6 +169,20 @@ class StockMonitor:
             if not self.db_manager.create_tables():
                 raise Exception("Failed to create database tables")
             
+            # Brings snapshots in line with any history written before they existed
+            self.db_manager.refresh_indicator_snapshots()
+            
+            cache_config = self.config.get('history_cache', {})
+            if cache_config.get('enabled', False):
+                self.history_cache = ParquetHistoryCache(
+                    self.db_manager,
+                    path=cache_config.get('path', 'cache/history'),
+                    compression=cache_config.get('compression', 'zstd')
+                )
+                self.db_manager.history_cache = self.history_cache
+                # Files are only served once they are known to match stock_daily
+                self.history_cache.reconcile()
+            
             self.logger.info("Database initialized successfully")
             
         except Exception as e:
@@ -156,21 +192,106 @@ class StockMonitor:
     def _initialize_data_fetcher(self) -> None:
         try:
             retry_config = self.config.get('retry', {})
+            cache_config = self.config.get('metadata_cache', {})
+            metadata_cache = TickerMetadataCache(
+                path=cache_config.get('path', 'cache/ticker_metadata.db'),
+                max_tickers=cache_config.get('max_tickers', 500),
+                ttl_seconds=cache_config.get('ttl_seconds'),
+                touch_flush_seconds=cache_config.get('touch_flush_seconds', 60)
+            )
+            
+            provider = self._create_data_provider()
+            
+            breaker_config = self.config.get('circuit_breaker', {})
+            circuit_breaker = TickerCircuitBreaker(
+                path=breaker_config.get('path', 'cache/circuit_breaker.json'),
+                failure_threshold=breaker_config.get('failure_threshold', 3),
+                base_cooldown_seconds=breaker_config.get('base_cooldown_minutes', 15) * 60,
+                max_cooldown_seconds=breaker_config.get('max_cooldown_hours', 24) * 3600
+            )
+            
             self.data_fetcher = StockDataFetcher(
                 retry_attempts=retry_config.get('max_attempts', 3),
-                backoff_seconds=retry_config.get('backoff_seconds', 5)
+                backoff_seconds=retry_config.get('backoff_seconds', 5),
+                batch_size=self.config['data'].get('batch_size', 50),
+                max_workers=retry_config.get('max_workers', 4),
+                requests_per_second=retry_config.get('requests_per_second', 2.0),
+                burst=retry_config.get('burst', 5),
+                metadata_cache=metadata_cache,
+                provider=provider,
+                circuit_breaker=circuit_breaker,
+                intraday_store=self.db_manager if self.config['data'].get('intraday', {}).get('enabled', True) else None
             )
             
+            schedule_config = self.config['schedule']
+            if schedule_config.get('market_aware', True):
+                self.market_calendar = MarketCalendar(
+                    session_loader=lambda ticker: self.data_fetcher.get_ticker_info(ticker, 'static'),
+                    extended_hours=schedule_config.get('extended_hours', False),
+                    post_close_refresh=schedule_config.get('post_close_refresh', True),
+                    # Replay runs on its own clock in exchange local time
+                    clock=provider.now if isinstance(provider, ReplayProvider) else None
+                )
+            
             self.logger.info("Data fetcher initialized successfully")
             
         except Exception as e:
             self.logger.error(f"Data fetcher initialization failed: {e}")
             raise
     
+    def _create_data_provider(self) -> MarketDataProvider:
+        provider_config = self.config.get('provider', {})
+        provider_type = provider_config.get('type', 'yahoo')
+        
+        if provider_type == 'replay':
+            replay_config = provider_config.get('replay', {})
+            self.logger.info("Using replay data provider - no live market data will be fetched")
+            return ReplayProvider(
+                data_dir=replay_config.get('data_dir', 'replay'),
+                speed=replay_config.get('speed', 390),
+                replay_date=replay_config.get('replay_date'),
+                session_start=replay_config.get('session_start', '09:30'),
+                session_end=replay_config.get('session_end', '16:00'),
+                history_days=replay_config.get('history_days', 250),
+                seed=replay_config.get('seed', 42),
+                loop=replay_config.get('loop', True),
+                latency_ms=replay_config.get('latency_ms', 0)
+            )
+        
+        if provider_type != 'yahoo':
+            raise ValueError(f"Unknown data provider type: {provider_type}")
+        
+        http_config = self.config.get('http', {})
+        session_manager = YahooSessionManager(
+            pool_connections=http_config.get('pool_connections', 10),
+            pool_maxsize=http_config.get('pool_maxsize', 20),
+            connect_timeout=http_config.get('connect_timeout', 5),
+            read_timeout=http_config.get('read_timeout', 15)
+        )
+        return YahooFinanceProvider(
+            session_manager,
+            download_threads=self.config.get('retry', {}).get('max_workers', 4)
+        )
+    
     def _initialize_analytics(self) -> None:
         """Initialize analytics engine."""
         try:
-            self.analytics = StockAnalytics(self.db_manager)
+            rolling_config = self.config['data'].get('rolling_averages', {})
+            if rolling_config.get('enabled', True):
+                self.rolling_averages = RollingAverageEngine(self.db_manager, periods=[7, 30, 90])
+                self.rolling_averages.load(self.db_manager.get_all_tickers())
+                self.db_manager.rolling_averages = self.rolling_averages
+            
+            market_hours = self.config['data'].get('market_hours', {})
+            self.alert_ledger = AlertLedger(
+                self.db_manager,
+                session_timezone=market_hours.get('timezone', 'Europe/Vienna'),
+                session_open=datetime.strptime(market_hours.get('start', '09:00'), '%H:%M').time()
+            )
+            self.db_manager.alert_ledger = self.alert_ledger
+            
+            self.analytics = StockAnalytics(self.db_manager, rolling_averages=self.rolling_averages,
+                                            alert_ledger=self.alert_ledger)
             self.logger.info("Analytics engine initialized successfully")
             
         except Exception as e:
@@ -183,7 +304,8 @@ class StockMonitor:
             self.alert_system = TelegramAlertSystem(
                 bot_token=telegram_config['bot_token'],
                 chat_id=telegram_config['chat_id'],
-                db_manager=self.db_manager
+                db_manager=self.db_manager,
+                data_fetcher=self.data_fetcher
             )
             
             # Start the bot listener for interactive commands
@@ -231,6 +353,48 @@ class StockMonitor:
                 name='Startup Sequence'
             )
             
+            if self.config['data'].get('intraday', {}).get('enabled', True):
+                self.scheduler.add_job(
+                    self.run_intraday_rollup,
+                    CronTrigger(hour=2, minute=30),
+                    id='intraday_rollup',
+                    name='Intraday Bar Rollup'
+                )
+            
+            retention_config = self.config.get('retention', {})
+            if retention_config.get('enabled', False):
+                self.retention = RetentionManager(
+                    self.db_manager,
+                    archive_dir=retention_config.get('archive_dir', 'archive'),
+                    hot_days=retention_config.get('hot_days'),
+                    compression=retention_config.get('compression', 'zstd')
+                )
+                self.scheduler.add_job(
+                    self.run_retention,
+                    CronTrigger(hour=3, minute=15),
+                    id='retention',
+                    name='Retention and Archival'
+                )
+            
+            if self.history_cache is not None:
+                self.scheduler.add_job(
+                    self.run_history_reconcile,
+                    'interval',
+                    minutes=self.config['history_cache'].get('reconcile_interval_minutes', 60),
+                    id='history_reconcile',
+                    name='History Cache Reconciliation'
+                )
+            
+            rolling_config = self.config['data'].get('rolling_averages', {})
+            if self.rolling_averages is not None and rolling_config.get('verify_sample_size', 5) > 0:
+                self.scheduler.add_job(
+                    self.run_rolling_average_check,
+                    'interval',
+                    minutes=rolling_config.get('verify_interval_minutes', 60),
+                    id='rolling_average_check',
+                    name='Rolling Average Verification'
+                )
+            
             # Add watchlist sync job - check for new stocks every 2 minutes
             self.scheduler.add_job(
                 self.sync_new_watchlist_stocks,
@@ -260,15 +424,8 @@ class StockMonitor:
             
             self.alert_system.send_startup_notification(tickers)
             
-            self.logger.info("Fetching initial historical data...")
-            historical_data = self.data_fetcher.fetch_all_historical_data(
-                tickers, 
-                self.config['data']['historical_days']
-            )
-            
-            for ticker, data in historical_data.items():
-                if data is not None:
-                    self.db_manager.insert_historical_data(ticker, data)
+            self.logger.info("Syncing initial historical data...")
+            self.sync_historical_data(tickers)
             
             self.logger.info("Startup sequence completed successfully")
             
@@ -277,6 +434,19 @@ class StockMonitor:
             self.alert_system.send_error_notification(str(e), "Startup sequence")
     
     def run_real_time_monitoring(self) -> None:
+        # One pooled connection for the whole cycle, committed at checkpoints
+        try:
+            with self.db_manager.unit_of_work('Real-time cycle') as unit:
+                self._run_real_time_cycle()
+            
+            self.last_cycle_stats['db'] = unit.stats()
+            
+        except Exception as e:
+            self.logger.error(f"Database unit of work failed in real-time monitoring: {e}")
+    
+    def _run_real_time_cycle(self) -> None:
+        cycle_start = perf_counter()
+        self.last_cycle_stats = {}
         try:
             self.logger.info("Starting real-time monitoring...")
             
@@ -285,6 +455,20 @@ class StockMonitor:
                 self.logger.warning("No tickers to monitor in real-time.")
                 return
             
+            if self.market_calendar is not None:
+                plan = self.market_calendar.plan(tickers)
+                if plan['closed']:
+                    self.logger.info(f"Skipping {len(plan['closed'])} tickers with closed markets: {', '.join(plan['closed'])}")
+                if plan['final']:
+                    self.logger.info(f"Post-close refresh for: {', '.join(plan['final'])}")
+                
+                tickers = plan['open'] + plan['final']
+                if not tickers:
+                    self.logger.info("All monitored markets are closed - nothing to refresh")
+                    self.last_cycle_stats = {'tickers': 0, 'skipped_closed': len(plan['closed']),
+                                             'cycle_seconds': perf_counter() - cycle_start}
+                    return
+            
             self.logger.info("Fetching LIVE current prices from Yahoo Finance with FORCE REFRESH...")
             current_prices = self.data_fetcher.force_refresh_all_prices(tickers)
             
@@ -292,6 +476,35 @@ class StockMonitor:
                 self.logger.error("Failed to fetch any current prices")
                 return
             
+            if self.market_calendar is not None:
+                for ticker, price_data in current_prices.items():
+                    if price_data:
+                        self.market_calendar.record_market_state(ticker, price_data.get('market_state'))
+            
+            try:
+                self.sync_historical_data([ticker for ticker in tickers if current_prices.get(ticker)])
+            except Exception as e:
+                self.logger.warning(f"Could not sync historical data in real-time: {e}")
+            # Intraday sync writes from worker threads, so nothing may be left uncommitted here
+            self.db_manager.checkpoint()
+            
+            try:
+                self.data_fetcher.sync_intraday_bars([ticker for ticker in tickers if current_prices.get(ticker)])
+            except Exception as e:
+                self.logger.warning(f"Could not sync intraday bars in real-time: {e}")
+            self.db_manager.checkpoint()
+            
+            fetch_seconds = perf_counter() - cycle_start
+            alerts_saved = 0
+            pending_alerts = []
+            
+            # One multi-row upsert for the whole cycle, before analytics reads stock_latest
+            self.db_manager.update_latest_prices(current_prices)
+            self.db_manager.checkpoint()
+            all_averages = self.analytics.calculate_averages_for_all_tickers(
+                [ticker for ticker in tickers if current_prices.get(ticker)]
+            )
+            
             stock_updates = []
             for ticker in tickers:
                 if ticker in current_prices and current_prices[ticker] is not None:
@@ -306,22 +519,7 @@ class StockMonitor:
                     }
                     stock_updates.append(stock_update)
                     
-                    self.db_manager.update_latest_price(ticker, current_prices[ticker])
-                    
-                    try:
-                        from datetime import date
-                        today = date.today()
-
-                        if self._is_new_trading_day(ticker, today):
-                            self.logger.info(f"New trading day detected for {ticker} - updating historical data")
-                            historical_data = self.data_fetcher.fetch_historical_data(ticker, 150)
-                            if historical_data is not None:
-                                self.db_manager.insert_historical_data(ticker, historical_data)
-                                self.logger.info(f"Updated historical data for {ticker} in real-time monitoring")
-                    except Exception as e:
-                        self.logger.warning(f"Could not update historical data for {ticker} in real-time: {e}")
-                    
-                    analysis_result = self.analytics.analyze_single_ticker(ticker)
+                    analysis_result = self.analytics.analyze_single_ticker(ticker, averages=all_averages.get(ticker))
                     
                     # Debug: Log what analyze_single_ticker returns
                     self.logger.info(f"DEBUG: analyze_single_ticker result for {ticker}: {analysis_result}")
@@ -365,76 +563,209 @@ class StockMonitor:
                                 'alert_conditions': alert_conditions
                             }
                             
-                            # Always save alerts to database first to prevent future duplicates
-                            self.logger.info(f"About to save {len(alert_conditions)} alert conditions to database for {ticker}")
-                            self._save_alerts_to_database(ticker, alert_conditions, analysis_result['current_price'])
-                            self.logger.info(f"Finished saving alerts to database for {ticker}")
-                            
-                            # Try to send the alert (but don't depend on it for database saving)
-                            if self.alert_system.send_alert(ticker, alert_result):
-                                self.logger.info(f"Real-time alert sent successfully for {ticker}")
-                            else:
-                                self.logger.error(f"Failed to send real-time alert for {ticker} (but alert saved to database)")
+                            pending_alerts.append((ticker, alert_result))
                         else:
                             self.logger.info(f"No new alerts to send for {ticker} - all conditions already alerted today")
             
+            if pending_alerts:
+                # Always save the cycle's alerts to database first to prevent future duplicates
+                alerts_saved = self._save_alerts_to_database(pending_alerts)
+                if alerts_saved and not self.db_manager.checkpoint():
+                    alerts_saved = 0
+                
+                # Try to send the alerts (but don't depend on it for database saving)
+                for ticker, alert_result in pending_alerts:
+                    if self.alert_system.send_alert(ticker, alert_result):
+                        self.logger.info(f"Real-time alert sent successfully for {ticker}")
+                    else:
+                        self.logger.error(f"Failed to send real-time alert for {ticker} (but alert saved to database)")
+            
             if stock_updates:
                 self.alert_system.send_real_time_update(stock_updates)
                 self.logger.info("Real-time update sent successfully")
             else:
                 self.logger.warning("No stock updates to send")
             
-            self.logger.info(f"Real-time monitoring completed: {len(stock_updates)} stocks updated")
+            cycle_seconds = perf_counter() - cycle_start
+            self.last_cycle_stats = {
+                'tickers': len(tickers),
+                'stocks_updated': len(stock_updates),
+                'alerts_saved': alerts_saved,
+                'fetch_seconds': fetch_seconds,
+                'cycle_seconds': cycle_seconds
+            }
+            self.logger.info(
+                f"Real-time monitoring completed: {len(stock_updates)} stocks updated, "
+                f"{alerts_saved} alerts saved in {cycle_seconds:.2f}s (fetch {fetch_seconds:.2f}s)"
+            )
             
         except Exception as e:
             self.logger.error(f"Error in real-time monitoring: {e}")
             import traceback
             self.logger.error(f"Traceback: {traceback.format_exc()}")
     
-    def _save_alerts_to_database(self, ticker: str, alert_conditions: Dict, current_price: float) -> None:
+    def _save_alerts_to_database(self, pending_alerts: List) -> int:
         """
-        Save alerts to database to prevent future duplicates.
+        Save a cycle's alerts to database in one transaction to prevent future duplicates.
+        
+        Takes (ticker, alert_result) pairs and returns the number of alerts saved.
         """
         try:
-            for period_key, condition in alert_conditions.items():
-                # Extract period number from key (e.g., '90_day' -> 90)
-                period_num = period_key.split('_')[0]
-                
-                # Calculate the difference and percentage
-                avg_value = condition['average']
-                diff = avg_value - current_price
-                pct_diff = (diff / avg_value) * 100
+            alerts = []
+            for ticker, alert_result in pending_alerts:
+                current_price = alert_result['current_price']
                 
-                # Save to database
-                success = self.db_manager.save_alert_to_database(
-                    ticker=ticker,
-                    alert_type=period_key,
-                    current_price=current_price,
-                    average_price=avg_value,
-                    absolute_difference=diff,
-                    percent_difference=pct_diff
-                )
+                for period_key, condition in alert_result['alert_conditions'].items():
+                    # Calculate the difference and percentage
+                    avg_value = condition['average']
+                    diff = avg_value - current_price
+                    pct_diff = (diff / avg_value) * 100
+                    
+                    alerts.append({
+                        'ticker': ticker,
+                        'alert_type': period_key,
+                        'current_price': current_price,
+                        'average_price': avg_value,
+                        'absolute_difference': diff,
+                        'percent_difference': pct_diff
+                    })
+            
+            if self.db_manager.save_alerts_to_database(alerts):
+                self.logger.info(f"Saved {len(alerts)} alerts for {len(pending_alerts)} tickers to database")
+                return len(alerts)
+            
+            self.logger.error(f"Failed to save {len(alerts)} alerts to database")
+            return 0
+            
+        except Exception as e:
+            self.logger.error(f"Error saving alerts to database: {e}")
+            return 0
+    
+    def sync_historical_data(self, tickers: List[str], force_full: bool = False) -> None:
+        """
+        Bring stock_daily up to date by fetching only the bars missing since the
+        last completed stored bar of each ticker.
+        
+        The full historical window is re-pulled for tickers with no stored data,
+        for tickers whose stored closes no longer match Yahoo (a split or dividend
+        adjustment), or for every ticker when force_full is set.
+        """
+        if not tickers:
+            return
+        
+        historical_days = self.config['data']['historical_days']
+        full_refresh = list(tickers) if force_full else []
+        
+        if not force_full:
+            # The provider's clock, not the wall clock: a replay session's "today"
+            # is its replay date, whose partial bar must not become the reference
+            today = self.data_fetcher.provider.now().date()
+            reference_bars = self.db_manager.get_reference_bars(tickers, today)
+            full_refresh = [ticker for ticker in tickers if ticker not in reference_bars]
+            
+            # Group by reference date so each group is one batched range request
+            tickers_by_start: Dict[date, List[str]] = {}
+            for ticker, reference in reference_bars.items():
+                tickers_by_start.setdefault(reference['date'], []).append(ticker)
+            
+            rows_written = 0
+            for start, group in tickers_by_start.items():
+                fetched = self.data_fetcher.fetch_all_historical_data(group, historical_days, start=start)
                 
-                if success:
-                    self.logger.info(f"Alert saved to database for {ticker} {period_key}")
-                else:
-                    self.logger.error(f"Failed to save alert to database for {ticker} {period_key}")
+                for ticker in group:
+                    data = fetched.get(ticker)
+                    if data is None or data.empty:
+                        continue
                     
+                    reference = reference_bars[ticker]
+                    if self._has_price_adjustment(ticker, data, reference):
+                        full_refresh.append(ticker)
+                        continue
+                    
+                    new_rows = data[data.index.date > reference['date']]
+                    if not new_rows.empty and self.db_manager.insert_historical_data(ticker, new_rows):
+                        rows_written += len(new_rows)
+            
+            self.logger.info(f"Incremental historical sync wrote {rows_written} rows for {len(reference_bars)} tickers")
+        
+        if full_refresh:
+            self.logger.info(f"Fetching full historical window for {len(full_refresh)} tickers: {', '.join(full_refresh)}")
+            historical_data = self.data_fetcher.fetch_all_historical_data(full_refresh, historical_days)
+            
+            for ticker, data in historical_data.items():
+                if data is not None:
+                    self.db_manager.insert_historical_data(ticker, data)
+    
+    def _has_price_adjustment(self, ticker: str, data, reference: Dict) -> bool:
+        # Yahoo back-adjusts earlier closes after a split or dividend, so a stored
+        # close that no longer matches the re-fetched one means history is stale
+        stored_close = reference.get('close')
+        if not stored_close:
+            return False
+        
+        reference_rows = data[data.index.date == reference['date']]
+        if reference_rows.empty:
+            return False
+        
+        fetched_close = float(reference_rows['Close'].iloc[-1])
+        relative_diff = abs(fetched_close - stored_close) / stored_close
+        tolerance = self.config['data'].get('adjustment_tolerance', 0.0005)
+        
+        if relative_diff > tolerance:
+            self.logger.info(
+                f"Price adjustment detected for {ticker} on {reference['date']}: "
+                f"stored ${stored_close:.6f} vs fetched ${fetched_close:.6f} - re-pulling full window"
+            )
+            return True
+        
+        return False
+    
+    def run_full_historical_refresh(self) -> None:
+        try:
+            self.logger.info("Running full historical refresh...")
+            self.sync_historical_data(self.db_manager.get_all_tickers(), force_full=True)
+            self.logger.info("Full historical refresh completed")
+            
         except Exception as e:
-            self.logger.error(f"Error saving alerts to database for {ticker}: {e}")
+            self.logger.error(f"Full historical refresh failed: {e}")
     
-    def _is_new_trading_day(self, ticker: str, today) -> bool:
+    def run_intraday_rollup(self) -> None:
         try:
-            from stock.database import DatabaseManager
+            intraday_config = self.config['data'].get('intraday', {})
+            rolled_up = self.db_manager.rollup_intraday_bars(
+                raw_retention_days=intraday_config.get('raw_retention_days', 7),
+                five_minute_retention_days=intraday_config.get('five_minute_retention_days', 60)
+            )
+            self.logger.info(f"Intraday rollup completed: {rolled_up}")
             
-            if hasattr(self, 'db_manager') and self.db_manager:
-                return True 
-            else:
-                return True
-                
         except Exception as e:
-            self.logger.warning(f"Error checking if new trading day for {ticker}: {e}")
-            return True
+            self.logger.error(f"Intraday rollup failed: {e}")
+    
+    def run_retention(self) -> None:
+        try:
+            archived = self.retention.run()
+            
+            if archived.get('stock_daily') and self.history_cache is not None:
+                self.history_cache.reconcile()
+            if archived.get('stock_daily') and self.rolling_averages is not None:
+                self.rolling_averages.load(self.db_manager.get_all_tickers())
+            
+        except Exception as e:
+            self.logger.error(f"Retention run failed: {e}")
+    
+    def run_history_reconcile(self) -> None:
+        try:
+            self.history_cache.reconcile()
+        except Exception as e:
+            self.logger.error(f"History cache reconciliation failed: {e}")
+    
+    def run_rolling_average_check(self) -> None:
+        try:
+            sample_size = self.config['data'].get('rolling_averages', {}).get('verify_sample_size', 5)
+            self.rolling_averages.verify(sample_size)
+            
+        except Exception as e:
+            self.logger.error(f"Rolling average verification failed: {e}")
     
     def sync_new_watchlist_stocks(self) -> None:
         """
@@ -444,46 +775,37 @@ class StockMonitor:
         try:
             self.logger.info("Checking for new stocks in watchlist...")
             
-            # Get all active tickers from watchlist
-            current_watchlist = self.db_manager.get_all_tickers()
-            
-            if not current_watchlist:
-                self.logger.info("No active stocks in watchlist")
+            # One anti-join against the per-ticker snapshot instead of a COUNT per ticker
+            needing_backfill = self.db_manager.get_tickers_needing_backfill(max(self.analytics.average_periods))
+            if needing_backfill is None:
+                self.logger.warning("Could not check the watchlist for missing history - retrying next run")
                 return
             
-            # Check each ticker to see if it has historical data
-            new_stocks_found = []
-            
-            for ticker in current_watchlist:
-                # Check if we have any historical data for this ticker
-                try:
-                    from sqlalchemy import text
-                    with self.db_manager.engine.connect() as conn:
-                        query = "SELECT COUNT(*) FROM stock_daily WHERE ticker = :ticker"
-                        result = conn.execute(text(query), {"ticker": ticker})
-                        count = result.fetchone()[0]
-                        
-                        if count == 0:
-                            # This is a new stock without historical data
-                            new_stocks_found.append(ticker)
-                            self.logger.info(f"Found new stock in watchlist: {ticker}")
-                            
-                except Exception as e:
-                    self.logger.warning(f"Error checking historical data for {ticker}: {e}")
-                    # Assume it's new if we can't check
-                    new_stocks_found.append(ticker)
-            
-            if new_stocks_found:
-                self.logger.info(f"Fetching historical data for {len(new_stocks_found)} new stocks: {', '.join(new_stocks_found)}")
+            # Tickers with a short history (recent listings) are retried every
+            # backfill_retry_minutes, not on every run
+            now = datetime.now()
+            retry_after = timedelta(minutes=self.config['data'].get('backfill_retry_minutes', 360))
+            backfill = [
+                ticker for ticker in sorted(needing_backfill)
+                if now - self.backfill_attempts.get(ticker, datetime.min) >= retry_after
+            ]
+            new_stocks_found = [ticker for ticker in backfill if needing_backfill[ticker] == 0]
+            
+            if backfill:
+                for ticker in backfill:
+                    self.backfill_attempts[ticker] = now
+                for ticker in new_stocks_found:
+                    self.logger.info(f"Found new stock in watchlist: {ticker}")
+                
+                self.logger.info(f"Backfilling historical data for {len(backfill)} tickers: {', '.join(backfill)}")
+                self.sync_historical_data(backfill, force_full=True)
+                snapshots = self.db_manager.get_indicator_snapshots(backfill)
                 
-                # Fetch historical data for new stocks
                 for ticker in new_stocks_found:
                     try:
-                        self.logger.info(f"Fetching historical data for new stock: {ticker}")
-                        historical_data = self.data_fetcher.fetch_historical_data(ticker, 150)
+                        rows_loaded = snapshots.get(ticker, {}).get('row_count', 0)
                         
-                        if historical_data is not None and not historical_data.empty:
-                            self.db_manager.insert_historical_data(ticker, historical_data)
+                        if rows_loaded:
                             self.logger.info(f"Successfully added historical data for {ticker}")
                             
                             # Send notification about new stock
@@ -501,7 +823,7 @@ class StockMonitor:
 
 🏢 <b>{ticker}</b> - {company_name}
 📂 <b>Sector:</b> {sector}
-📊 <b>Historical Data:</b> ✅ Loaded ({len(historical_data)} days)
+📊 <b>Historical Data:</b> ✅ Loaded ({rows_loaded} days)
 🔔 <b>Alerts:</b> Now active for this stock
 
 💡 Stock was detected from manual database addition
@@ -518,7 +840,7 @@ class StockMonitor:
                     except Exception as e:
                         self.logger.error(f"Error processing new stock {ticker}: {e}")
                 
-                self.logger.info(f"Completed processing {len(new_stocks_found)} new stocks")
+                self.logger.info(f"Completed backfill of {len(backfill)} tickers ({len(new_stocks_found)} new)")
             else:
                 self.logger.info("No new stocks found in watchlist")
                 
@@ -541,14 +863,13 @@ class StockMonitor:
             self.logger.info("Fetching current prices for alert check...")
             current_prices = self.data_fetcher.fetch_all_current_prices(tickers)
             
-            for ticker, price_data in current_prices.items():
-                if price_data is not None:
-                    self.db_manager.update_latest_price(ticker, price_data)
+            self.db_manager.update_latest_prices(current_prices)
             
             self.logger.info("Running analytics for alert check...")
             analysis_results = self.analytics.analyze_all_tickers(tickers)
             
             alerts_sent = 0
+            pending_alerts = []
             for ticker, result in analysis_results.items():
                 if result.get('alerts_triggered', False):
                     self.logger.info(f"Alert triggered for {ticker} - sending alert")
@@ -583,19 +904,23 @@ class StockMonitor:
                             'alert_conditions': alert_conditions
                         }
                         
-                        if self.alert_system.send_alert(ticker, alert_result):
-                            alerts_sent += 1
-                            self.logger.info(f"Alert sent successfully for {ticker}")
-                            
-                            # Save alerts to database to prevent future duplicates
-                            self._save_alerts_to_database(ticker, alert_conditions, result['current_price'])
-                        else:
-                            self.logger.error(f"Failed to send alert for {ticker}")
+                        pending_alerts.append((ticker, alert_result))
                     else:
                         self.logger.info(f"No new alerts to send for {ticker} - all conditions already alerted today")
                 else:
                     self.logger.info(f"No alerts triggered for {ticker}")
             
+            if pending_alerts:
+                # Save alerts to database before delivery to prevent future duplicates
+                self._save_alerts_to_database(pending_alerts)
+                
+                for ticker, alert_result in pending_alerts:
+                    if self.alert_system.send_alert(ticker, alert_result):
+                        alerts_sent += 1
+                        self.logger.info(f"Alert sent successfully for {ticker}")
+                    else:
+                        self.logger.error(f"Failed to send alert for {ticker}")
+            
             self.logger.info(f"Manual alert check completed: {alerts_sent} alerts sent")
             
         except Exception as e:
@@ -650,6 +975,10 @@ class StockMonitor:
             if self.db_manager:
                 self.db_manager.close()
             
+            if self.data_fetcher:
+                self.data_fetcher.metadata_cache.close()
+                self.data_fetcher.provider.close()
+            
             self.logger.info("System shutdown complete")
             
         except Exception as e:
@@ -0,0 +1,186 @@
+import logging
+import threading
+from datetime import date, datetime, time, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import pytz
+
+logger = logging.getLogger(__name__)
+
+
+class ExchangeSession(NamedTuple):
+    exchange: str
+    timezone: str
+    pre_open: time
+    open: time
+    close: time
+    post_close: time
+
+
+US_HOURS = (time(4, 0), time(9, 30), time(16, 0), time(20, 0))
+
+# Yahoo exchange codes -> (timezone, pre-open, open, close, post-close) in exchange local time.
+# Exchanges without extended sessions use their regular hours for both.
+EXCHANGE_HOURS = {
+    'NMS': ('America/New_York',) + US_HOURS,
+    'NGM': ('America/New_York',) + US_HOURS,
+    'NCM': ('America/New_York',) + US_HOURS,
+    'NYQ': ('America/New_York',) + US_HOURS,
+    'ASE': ('America/New_York',) + US_HOURS,
+    'PCX': ('America/New_York',) + US_HOURS,
+    'BTS': ('America/New_York',) + US_HOURS,
+    'PNK': ('America/New_York',) + US_HOURS,
+    'OQB': ('America/New_York',) + US_HOURS,
+    'OQX': ('America/New_York',) + US_HOURS,
+    'TOR': ('America/Toronto', time(9, 30), time(9, 30), time(16, 0), time(16, 0)),
+    'GER': ('Europe/Berlin', time(9, 0), time(9, 0), time(17, 30), time(17, 30)),
+    'FRA': ('Europe/Berlin', time(8, 0), time(8, 0), time(22, 0), time(22, 0)),
+    'STU': ('Europe/Berlin', time(8, 0), time(8, 0), time(22, 0), time(22, 0)),
+    'VIE': ('Europe/Vienna', time(9, 0), time(9, 0), time(17, 30), time(17, 30)),
+    'PAR': ('Europe/Paris', time(9, 0), time(9, 0), time(17, 30), time(17, 30)),
+    'AMS': ('Europe/Amsterdam', time(9, 0), time(9, 0), time(17, 30), time(17, 30)),
+    'MIL': ('Europe/Rome', time(9, 0), time(9, 0), time(17, 30), time(17, 30)),
+    'MCE': ('Europe/Madrid', time(9, 0), time(9, 0), time(17, 30), time(17, 30)),
+    'EBS': ('Europe/Zurich', time(9, 0), time(9, 0), time(17, 30), time(17, 30)),
+    'STO': ('Europe/Stockholm', time(9, 0), time(9, 0), time(17, 30), time(17, 30)),
+    'LSE': ('Europe/London', time(8, 0), time(8, 0), time(16, 30), time(16, 30)),
+    'JPX': ('Asia/Tokyo', time(9, 0), time(9, 0), time(15, 30), time(15, 30)),
+    'KSC': ('Asia/Seoul', time(9, 0), time(9, 0), time(15, 30), time(15, 30)),
+    'HKG': ('Asia/Hong_Kong', time(9, 30), time(9, 30), time(16, 0), time(16, 0)),
+    'SHH': ('Asia/Shanghai', time(9, 30), time(9, 30), time(15, 0), time(15, 0)),
+    'SHZ': ('Asia/Shanghai', time(9, 30), time(9, 30), time(15, 0), time(15, 0)),
+    'NSI': ('Asia/Kolkata', time(9, 15), time(9, 15), time(15, 30), time(15, 30)),
+}
+
+# Used when only the exchange timezone is known
+DEFAULT_HOURS = (time(9, 0), time(9, 0), time(17, 30), time(17, 30))
+
+
+class MarketCalendar:
+    """
+    Decides which tickers are worth polling right now from each ticker's
+    exchange session hours.
+
+    A ticker is polled while its market is open (pre/post sessions included
+    when extended_hours is set) and once more after its market closes, so the
+    stored price ends on the closing print. Tickers whose exchange cannot be
+    resolved are always polled. Exchange holidays are not listed; a CLOSED
+    market state reported during regular hours marks that exchange closed for
+    the rest of its local day instead.
+    """
+
+    def __init__(self, session_loader: Callable[[str], Dict[str, Any]], extended_hours: bool = False,
+                 post_close_refresh: bool = True, clock: Optional[Callable[[], datetime]] = None):
+        self.session_loader = session_loader
+        self.extended_hours = extended_hours
+        self.post_close_refresh = post_close_refresh
+        # Naive clock times are taken as exchange local time (replay); aware ones are converted
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Optional[ExchangeSession]] = {}
+        # {ticker: local session date} of the last poll made while the market was open
+        self._last_open_poll: Dict[str, date] = {}
+        self._final_refresh_done: Dict[str, date] = {}
+        # {exchange: local date} on which Yahoo reported the market closed during regular hours
+        self._holidays: Dict[str, date] = {}
+
+    def get_session(self, ticker: str) -> Optional[ExchangeSession]:
+        with self._lock:
+            if ticker in self._sessions:
+                return self._sessions[ticker]
+
+        session = None
+        try:
+            info = self.session_loader(ticker) or {}
+            session = self._session_from_info(info)
+        except Exception as e:
+            logger.warning(f"Could not resolve exchange hours for {ticker}: {e}")
+
+        with self._lock:
+            # Unresolved lookups are retried on the next cycle
+            if session is not None:
+                self._sessions[ticker] = session
+        return session
+
+    def _session_from_info(self, info: Dict[str, Any]) -> Optional[ExchangeSession]:
+        exchange = info.get('exchange')
+        hours = EXCHANGE_HOURS.get(exchange)
+
+        if hours is not None:
+            return ExchangeSession(exchange, *hours)
+
+        if info.get('exchangeTimezoneName'):
+            return ExchangeSession(exchange or 'unknown', info['exchangeTimezoneName'], *DEFAULT_HOURS)
+
+        return None
+
+    def is_open(self, session: ExchangeSession, now: Optional[datetime] = None) -> bool:
+        local_now = self._local_time(session, now or self.clock())
+
+        if local_now.weekday() >= 5 or self._holidays.get(session.exchange) == local_now.date():
+            return False
+
+        start, end = (session.pre_open, session.post_close) if self.extended_hours else (session.open, session.close)
+        return start <= local_now.time() < end
+
+    def plan(self, tickers: List[str]) -> Dict[str, List[str]]:
+        """
+        Split tickers into 'open' (poll now), 'final' (one post-close refresh
+        still due) and 'closed' (skip this cycle).
+        """
+        now = self.clock()
+        plan = {'open': [], 'final': [], 'closed': []}
+
+        for ticker in tickers:
+            session = self.get_session(ticker)
+            if session is None:
+                plan['open'].append(ticker)
+                continue
+
+            local_date = self._local_time(session, now).date()
+
+            with self._lock:
+                if self.is_open(session, now):
+                    self._last_open_poll[ticker] = local_date
+                    plan['open'].append(ticker)
+                    continue
+
+                last_open = self._last_open_poll.get(ticker)
+                done = self._final_refresh_done.get(ticker)
+                if last_open is None:
+                    # Tickers first seen while closed get one refresh so the stored price is current
+                    needs_final = done is None
+                else:
+                    needs_final = self.post_close_refresh and done != last_open
+
+                if needs_final:
+                    self._final_refresh_done[ticker] = last_open or local_date
+                    plan['final'].append(ticker)
+                else:
+                    plan['closed'].append(ticker)
+
+        return plan
+
+    def record_market_state(self, ticker: str, market_state: Optional[str]) -> None:
+        """Feed back Yahoo's marketState to catch exchange holidays."""
+        if market_state != 'CLOSED':
+            return
+
+        session = self.get_session(ticker)
+        if session is None:
+            return
+
+        now = self.clock()
+        local_now = self._local_time(session, now)
+        if local_now.weekday() < 5 and session.open <= local_now.time() < session.close:
+            with self._lock:
+                if self._holidays.get(session.exchange) != local_now.date():
+                    self._holidays[session.exchange] = local_now.date()
+                    logger.info(f"{session.exchange} reported closed during regular hours - treating {local_now.date()} as a holiday")
+
+    @staticmethod
+    def _local_time(session: ExchangeSession, now: datetime) -> datetime:
+        if now.tzinfo is None:
+            return now
+        return now.astimezone(pytz.timezone(session.timezone))
@@ -0,0 +1,240 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Fields of Ticker.info grouped by how quickly they go stale. Anything not
+# listed here is treated as live quote data and gets the shortest TTL.
+STATIC_FIELDS = {
+    'sector', 'industry', 'longName', 'shortName', 'longBusinessSummary',
+    'country', 'currency', 'financialCurrency', 'exchange', 'fullExchangeName',
+    'exchangeTimezoneName', 'exchangeTimezoneShortName', 'gmtOffSetMilliseconds',
+    'quoteType', 'market', 'symbol', 'underlyingSymbol', 'website'
+}
+
+MARKET_CAP_FIELDS = {
+    'marketCap', 'enterpriseValue', 'sharesOutstanding', 'floatShares',
+    'impliedSharesOutstanding'
+}
+
+DEFAULT_TTL_SECONDS = {
+    'static': 3 * 24 * 3600,
+    'market_cap': 6 * 3600,
+    'quote': 30
+}
+
+
+def classify_field(field: str) -> str:
+    if field in STATIC_FIELDS:
+        return 'static'
+    if field in MARKET_CAP_FIELDS:
+        return 'market_cap'
+    return 'quote'
+
+
+class TickerMetadataCache:
+    """
+    SQLite-backed cache for yfinance Ticker.info payloads.
+
+    Each ticker's info is split into field classes (static, market_cap, quote)
+    that expire independently, so sector and names survive restarts for days
+    while bid/ask/marketState are only reused for seconds. Least recently used
+    tickers are evicted once max_tickers is exceeded.
+
+    Access times of cache hits are kept in memory and written in one commit
+    with the next store, or every touch_flush_seconds, rather than per hit.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_tickers: int = 500,
+                 ttl_seconds: Optional[Dict[str, int]] = None, touch_flush_seconds: float = 60.0):
+        self.path = path or ':memory:'
+        self.max_tickers = max_tickers
+        self.touch_flush_seconds = touch_flush_seconds
+        self.ttl_seconds = dict(DEFAULT_TTL_SECONDS)
+        self.ttl_seconds.update(ttl_seconds or {})
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        # {ticker: last access} of hits not yet written to last_access
+        self._pending_touches: Dict[str, float] = {}
+        self._touches_flushed_at = time.time()
+
+        if self.path != ':memory:':
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS ticker_metadata (
+                ticker TEXT NOT NULL,
+                field_class TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (ticker, field_class)
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_metadata_last_access ON ticker_metadata (last_access)"
+        )
+        self._conn.commit()
+
+    def get_info(self, ticker: str, field_classes: Iterable[str],
+                 loader: Callable[[str], Optional[Dict[str, Any]]],
+                 refresh: bool = False) -> Dict[str, Any]:
+        """
+        Return the merged info fields for the requested classes.
+
+        The loader is called once (returning the full info dict) if any requested
+        class is missing, expired or refresh is set. If the loader fails, expired
+        entries are served instead of raising, when there are any.
+        """
+        field_classes = list(field_classes)
+        now = time.time()
+
+        with self._lock:
+            cached = self._read(ticker, field_classes)
+
+        fresh = {
+            field_class: entry for field_class, entry in cached.items()
+            if now - entry['fetched_at'] <= self.ttl_seconds.get(field_class, 0)
+        }
+
+        if not refresh and len(fresh) == len(field_classes):
+            with self._lock:
+                self.hits += 1
+                self._touch(ticker, now)
+            return self._merge(fresh.values())
+
+        with self._lock:
+            self.misses += 1
+
+        try:
+            info = loader(ticker)
+        except Exception as e:
+            if cached:
+                logger.warning(f"Metadata refresh failed for {ticker}, serving stale cache: {e}")
+                return self._merge(cached.values())
+            raise
+
+        if not info:
+            return self._merge(cached.values())
+
+        with self._lock:
+            self._store(ticker, info, now)
+            self._evict()
+
+        payloads = self._split(info)
+        return self._merge(
+            {'payload': payloads.get(field_class, {})} for field_class in field_classes
+        )
+
+    def invalidate(self, ticker: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM ticker_metadata WHERE ticker = ?", (ticker,))
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(DISTINCT ticker) FROM ticker_metadata").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / lookups * 100) if lookups else 0.0,
+                'evictions': self.evictions,
+                'tickers': row[0] if row else 0
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._write_touches()
+            self._conn.commit()
+            self._conn.close()
+
+    def _read(self, ticker: str, field_classes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        field_classes = list(field_classes)
+        placeholders = ', '.join('?' for _ in field_classes)
+        rows = self._conn.execute(
+            f"SELECT field_class, payload, fetched_at FROM ticker_metadata "
+            f"WHERE ticker = ? AND field_class IN ({placeholders})",
+            (ticker, *field_classes)
+        ).fetchall()
+        return {
+            row[0]: {'payload': json.loads(row[1]), 'fetched_at': row[2]}
+            for row in rows
+        }
+
+    def _touch(self, ticker: str, now: float) -> None:
+        self._pending_touches[ticker] = now
+        if now - self._touches_flushed_at >= self.touch_flush_seconds:
+            self._write_touches()
+            self._conn.commit()
+
+    def _write_touches(self) -> None:
+        # Left uncommitted so the caller's commit covers it
+        if self._pending_touches:
+            self._conn.executemany(
+                "UPDATE ticker_metadata SET last_access = ? WHERE ticker = ?",
+                [(accessed_at, ticker) for ticker, accessed_at in self._pending_touches.items()]
+            )
+            self._pending_touches.clear()
+        self._touches_flushed_at = time.time()
+
+    def _store(self, ticker: str, info: Dict[str, Any], now: float) -> None:
+        rows = [
+            (ticker, field_class, json.dumps(payload, default=str), now, now)
+            for field_class, payload in self._split(info).items()
+        ]
+        # Pending access times go in first so _evict() ranks tickers by them
+        self._pending_touches.pop(ticker, None)
+        self._write_touches()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO ticker_metadata "
+            "(ticker, field_class, payload, fetched_at, last_access) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+        self._conn.commit()
+
+    def _evict(self) -> None:
+        if not self.max_tickers:
+            return
+
+        stale = self._conn.execute("""
+            SELECT ticker FROM ticker_metadata
+            GROUP BY ticker
+            ORDER BY MAX(last_access) DESC
+            LIMIT -1 OFFSET ?
+        """, (self.max_tickers,)).fetchall()
+
+        if stale:
+            self._conn.executemany(
+                "DELETE FROM ticker_metadata WHERE ticker = ?", [(row[0],) for row in stale]
+            )
+            self._conn.commit()
+            self.evictions += len(stale)
+            logger.debug(f"Evicted {len(stale)} tickers from metadata cache")
+
+    @staticmethod
+    def _split(info: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        payloads: Dict[str, Dict[str, Any]] = {field_class: {} for field_class in DEFAULT_TTL_SECONDS}
+        for field, value in info.items():
+            payloads[classify_field(field)][field] = value
+        return payloads
+
+    @staticmethod
+    def _merge(entries: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        merged: Dict[str, Any] = {}
+        for entry in entries:
+            merged.update(entry['payload'])
+        return merged
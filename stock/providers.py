@@ -0,0 +1,140 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Union
+
+import pandas as pd
+import yfinance as yf
+
+from stock.http_session import YahooSessionManager
+
+logger = logging.getLogger(__name__)
+
+QUOTE_URL = 'https://query1.finance.yahoo.com/v7/finance/quote'
+
+DateLike = Union[date, datetime, str]
+
+# yf.download collects results in module globals (shared._DFS / shared._ERRORS)
+# that each call resets, so concurrent downloads would mix or lose frames
+_DOWNLOAD_LOCK = threading.Lock()
+
+
+class MarketDataProvider(ABC):
+    """
+    Source of OHLCV, metadata and quote data behind StockDataFetcher.
+
+    Frames use yfinance's column names (Open, High, Low, Close, Volume, ...) and
+    quotes/info use Yahoo's field names, so the fetcher's parsing is the same
+    whichever provider is plugged in.
+    """
+
+    name = 'base'
+
+    @abstractmethod
+    def get_history(self, ticker: str, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+                    period: Optional[str] = None, interval: str = '1d', prepost: bool = False) -> pd.DataFrame:
+        """OHLCV bars for one ticker, either for [start, end) or a yfinance-style period."""
+
+    @abstractmethod
+    def download_history(self, tickers: List[str], start: DateLike, end: DateLike,
+                         interval: str = '1d') -> Dict[str, pd.DataFrame]:
+        """OHLCV bars for many tickers in as few requests as possible, split per ticker."""
+
+    @abstractmethod
+    def get_info(self, ticker: str) -> Dict[str, Any]:
+        """Ticker.info-style metadata dict."""
+
+    @abstractmethod
+    def get_quotes(self, tickers: List[str]) -> List[Dict[str, Any]]:
+        """Quote dicts with Yahoo v7 quote fields (symbol, regularMarketPrice, marketState, ...)."""
+
+    def now(self) -> datetime:
+        """Current time as seen by this provider's data."""
+        return datetime.now()
+
+    def close(self) -> None:
+        pass
+
+
+class YahooFinanceProvider(MarketDataProvider):
+
+    name = 'yahoo'
+
+    def __init__(self, session_manager: Optional[YahooSessionManager] = None, download_threads: int = 4):
+        self.session_manager = session_manager or YahooSessionManager()
+        # yf.download sends one chart request per symbol, this many at a time
+        self.download_threads = max(1, download_threads)
+
+    def get_history(self, ticker: str, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+                    period: Optional[str] = None, interval: str = '1d', prepost: bool = False) -> pd.DataFrame:
+        stock = self.session_manager.get_ticker(ticker)
+
+        if period is not None:
+            return stock.history(period=period, interval=interval, prepost=prepost,
+                                 timeout=self.session_manager.timeout)
+
+        return stock.history(start=start, end=end, interval=interval, prepost=prepost,
+                             timeout=self.session_manager.timeout)
+
+    def download_history(self, tickers: List[str], start: DateLike, end: DateLike,
+                         interval: str = '1d') -> Dict[str, pd.DataFrame]:
+        with _DOWNLOAD_LOCK:
+            data = yf.download(
+                tickers,
+                start=start,
+                end=end,
+                interval=interval,
+                group_by='ticker',
+                auto_adjust=True,
+                threads=min(self.download_threads, len(tickers)),
+                progress=False,
+                session=self.session_manager.session,
+                timeout=self.session_manager.timeout
+            )
+
+        if data is None or data.empty:
+            return {}
+
+        return self._split_batch_frame(data, tickers)
+
+    def _split_batch_frame(self, data: pd.DataFrame, tickers: List[str]) -> Dict[str, pd.DataFrame]:
+        frames = {}
+
+        if not isinstance(data.columns, pd.MultiIndex):
+            if len(tickers) == 1:
+                frame = data.dropna(how='all')
+                if not frame.empty:
+                    frames[tickers[0]] = frame
+            return frames
+
+        # group_by='ticker' puts the symbol on level 0, but fall back to level 1
+        # in case the installed yfinance lays the columns out the other way
+        level = 0 if set(tickers) & set(data.columns.get_level_values(0)) else 1
+        available = set(data.columns.get_level_values(level))
+
+        for ticker in tickers:
+            if ticker not in available:
+                logger.warning(f"No historical data returned for {ticker} in batch download")
+                continue
+
+            # Rows are aligned across all tickers in the chunk, so drop the dates
+            # on which this ticker did not trade (e.g. exchange holidays)
+            frame = data.xs(ticker, axis=1, level=level).dropna(how='all')
+            if frame.empty:
+                logger.warning(f"No historical data returned for {ticker} in batch download")
+                continue
+
+            frames[ticker] = frame
+
+        return frames
+
+    def get_info(self, ticker: str) -> Dict[str, Any]:
+        return self.session_manager.new_ticker(ticker).info
+
+    def get_quotes(self, tickers: List[str]) -> List[Dict[str, Any]]:
+        payload = self.session_manager.get_json(QUOTE_URL, params={'symbols': ','.join(tickers)})
+        return (payload or {}).get('quoteResponse', {}).get('result') or []
+
+    def close(self) -> None:
+        self.session_manager.close()
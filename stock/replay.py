@@ -0,0 +1,321 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from stock.providers import DateLike, MarketDataProvider
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Offline provider that replays recorded or synthetic market data.
+
+    For each ticker it reads `<TICKER>.daily.csv`, `<TICKER>.intraday.csv` (1m bars)
+    and `<TICKER>.info.json` from data_dir, and generates a seeded random walk for
+    anything missing. A virtual clock runs through the replay session at `speed`
+    times real time (390 replays a 6.5 hour session in one minute), so intraday
+    bars and quotes only become visible as the clock passes them.
+    """
+
+    name = 'replay'
+
+    def __init__(self, data_dir: str = 'replay', speed: float = 390.0, replay_date: Optional[DateLike] = None,
+                 session_start: str = '09:30', session_end: str = '16:00', history_days: int = 250,
+                 seed: int = 42, loop: bool = True, latency_ms: float = 0.0):
+        self.data_dir = data_dir
+        self.speed = max(speed, 0.0)
+        self.history_days = history_days
+        self.seed = seed
+        self.loop = loop
+        self.latency_ms = latency_ms
+
+        self.replay_date = pd.Timestamp(replay_date).date() if replay_date else self._previous_weekday(date.today())
+        self.session_open = datetime.combine(self.replay_date, datetime.strptime(session_start, '%H:%M').time())
+        self.session_close = datetime.combine(self.replay_date, datetime.strptime(session_end, '%H:%M').time())
+
+        self._wall_start = time.monotonic()
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, Any]] = {}
+
+        logger.info(
+            f"Replay provider serving {self.replay_date} from '{data_dir}' at {self.speed:g}x "
+            f"({'looping' if loop else 'single pass'})"
+        )
+
+    def now(self) -> datetime:
+        session_seconds = (self.session_close - self.session_open).total_seconds()
+        elapsed = (time.monotonic() - self._wall_start) * self.speed
+
+        if self.loop and session_seconds > 0:
+            elapsed = elapsed % session_seconds
+
+        return self.session_open + timedelta(seconds=elapsed)
+
+    def get_history(self, ticker: str, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+                    period: Optional[str] = None, interval: str = '1d', prepost: bool = False) -> pd.DataFrame:
+        self._simulate_latency()
+        now = self.now()
+        data = self._load(ticker)
+
+        if interval == '1d':
+            frame = self._visible_daily(data, now)
+        else:
+            frame = self._visible_intraday(data, now)
+            if interval != '1m':
+                frame = self._resample(frame, interval)
+
+        if period is not None:
+            return self._apply_period(frame, period, intraday=interval != '1d')
+
+        if start is not None:
+            frame = frame[frame.index >= self._naive_timestamp(start)]
+        if end is not None:
+            frame = frame[frame.index < self._naive_timestamp(end)]
+        return frame
+
+    def download_history(self, tickers: List[str], start: DateLike, end: DateLike,
+                         interval: str = '1d') -> Dict[str, pd.DataFrame]:
+        frames = {}
+        for ticker in tickers:
+            frame = self.get_history(ticker, start=start, end=end, interval=interval)
+            if not frame.empty:
+                frames[ticker] = frame
+        return frames
+
+    def get_info(self, ticker: str) -> Dict[str, Any]:
+        self._simulate_latency()
+        info = dict(self._load(ticker)['info'])
+
+        # Ticker.info also carries the live quote fields
+        for quote in self._build_quotes([ticker], self.now()):
+            info.update({
+                'regularMarketPrice': quote['regularMarketPrice'],
+                'previousClose': quote['regularMarketPreviousClose'],
+                'volume': quote['regularMarketVolume'],
+                'bid': quote['bid'],
+                'ask': quote['ask'],
+                'marketState': quote['marketState']
+            })
+        return info
+
+    def get_quotes(self, tickers: List[str]) -> List[Dict[str, Any]]:
+        self._simulate_latency()
+        return self._build_quotes(tickers, self.now())
+
+    def _build_quotes(self, tickers: List[str], now: datetime) -> List[Dict[str, Any]]:
+        quotes = []
+
+        for ticker in tickers:
+            data = self._load(ticker)
+            intraday = self._visible_intraday(data, now)
+            daily = data['daily']
+            previous = daily[daily.index.date < self.replay_date]
+            previous_close = float(previous['Close'].iloc[-1]) if not previous.empty else None
+
+            if intraday.empty:
+                price = previous_close
+                volume = 0
+            else:
+                price = float(intraday['Close'].iloc[-1])
+                volume = int(intraday['Volume'].sum())
+
+            if price is None:
+                continue
+
+            quotes.append({
+                'symbol': ticker,
+                'regularMarketPrice': price,
+                'regularMarketPreviousClose': previous_close,
+                'regularMarketVolume': volume,
+                'bid': round(price * 0.9995, 4),
+                'ask': round(price * 1.0005, 4),
+                'marketCap': data['info'].get('marketCap'),
+                'marketState': self._market_state(now)
+            })
+
+        return quotes
+
+    @staticmethod
+    def record(source: MarketDataProvider, tickers: List[str], data_dir: str, days: int = 365) -> None:
+        """Save daily bars, today's 1m bars and info from another provider as replay files."""
+        os.makedirs(data_dir, exist_ok=True)
+        end = datetime.now()
+
+        for ticker in tickers:
+            try:
+                daily = source.get_history(ticker, start=end - timedelta(days=days), end=end, interval='1d')
+                intraday = source.get_history(ticker, period='1d', interval='1m', prepost=True)
+
+                daily.to_csv(os.path.join(data_dir, f"{ticker}.daily.csv"))
+                intraday.to_csv(os.path.join(data_dir, f"{ticker}.intraday.csv"))
+                with open(os.path.join(data_dir, f"{ticker}.info.json"), 'w') as file:
+                    json.dump(source.get_info(ticker), file, default=str)
+
+                logger.info(f"Recorded {len(daily)} daily and {len(intraday)} intraday bars for {ticker}")
+
+            except Exception as e:
+                logger.error(f"Failed to record replay data for {ticker}: {e}")
+
+    def _load(self, ticker: str) -> Dict[str, Any]:
+        with self._lock:
+            if ticker not in self._data:
+                self._data[ticker] = self._read_files(ticker) or self._synthesize(ticker)
+            return self._data[ticker]
+
+    def _read_files(self, ticker: str) -> Optional[Dict[str, Any]]:
+        daily_path = os.path.join(self.data_dir, f"{ticker}.daily.csv")
+        if not os.path.exists(daily_path):
+            return None
+
+        daily = self._read_bars(daily_path)
+        intraday_path = os.path.join(self.data_dir, f"{ticker}.intraday.csv")
+        intraday = self._read_bars(intraday_path) if os.path.exists(intraday_path) else daily.iloc[0:0]
+
+        # Recorded sessions are shifted onto the replay date so the clock lines up
+        if not intraday.empty:
+            offset = pd.Timestamp(self.replay_date) - intraday.index[0].normalize()
+            intraday.index = intraday.index + offset
+
+        info = {'symbol': ticker}
+        info_path = os.path.join(self.data_dir, f"{ticker}.info.json")
+        if os.path.exists(info_path):
+            with open(info_path, 'r') as file:
+                info.update(json.load(file))
+
+        logger.info(f"Loaded recorded replay data for {ticker}: {len(daily)} daily, {len(intraday)} intraday bars")
+        return {'daily': daily, 'intraday': intraday, 'info': info}
+
+    @staticmethod
+    def _read_bars(path: str) -> pd.DataFrame:
+        frame = pd.read_csv(path, index_col=0)
+        # Keep exchange wall-clock time; offsets can differ across DST changes
+        frame.index = pd.to_datetime(frame.index.astype(str).str[:19])
+        return frame.sort_index()
+
+    def _synthesize(self, ticker: str) -> Dict[str, Any]:
+        rng = np.random.default_rng(self.seed + zlib.crc32(ticker.encode()))
+        base_price = float(rng.uniform(10, 400))
+
+        dates = pd.bdate_range(end=self.replay_date - timedelta(days=1), periods=self.history_days, name='Date')
+        closes = base_price * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+        opens = np.concatenate(([base_price], closes[:-1])) * (1 + rng.normal(0, 0.005, len(dates)))
+        daily = pd.DataFrame({
+            'Open': opens,
+            'High': np.maximum(opens, closes) * (1 + np.abs(rng.normal(0, 0.01, len(dates)))),
+            'Low': np.minimum(opens, closes) * (1 - np.abs(rng.normal(0, 0.01, len(dates)))),
+            'Close': closes,
+            'Volume': rng.integers(1_000_000, 50_000_000, len(dates))
+        }, index=dates)
+
+        minutes = pd.date_range(self.session_open, self.session_close, freq='1min', inclusive='left', name='Datetime')
+        minute_closes = closes[-1] * np.exp(np.cumsum(rng.normal(0, 0.001, len(minutes))))
+        minute_opens = np.concatenate(([closes[-1]], minute_closes[:-1]))
+        intraday = pd.DataFrame({
+            'Open': minute_opens,
+            'High': np.maximum(minute_opens, minute_closes) * (1 + np.abs(rng.normal(0, 0.0005, len(minutes)))),
+            'Low': np.minimum(minute_opens, minute_closes) * (1 - np.abs(rng.normal(0, 0.0005, len(minutes)))),
+            'Close': minute_closes,
+            'Volume': rng.integers(1_000, 200_000, len(minutes))
+        }, index=minutes)
+
+        info = {
+            'symbol': ticker,
+            'shortName': f"{ticker} (replay)",
+            'longName': f"{ticker} Synthetic Replay Co",
+            'sector': 'Consumer Cyclical',
+            'industry': 'Auto Manufacturers',
+            'exchange': 'NMS',
+            'exchangeTimezoneName': 'America/New_York',
+            'currency': 'USD',
+            'quoteType': 'EQUITY',
+            'marketCap': int(closes[-1] * rng.integers(100_000_000, 3_000_000_000))
+        }
+
+        logger.debug(f"Synthesized replay data for {ticker}")
+        return {'daily': daily, 'intraday': intraday, 'info': info}
+
+    def _visible_daily(self, data: Dict[str, Any], now: datetime) -> pd.DataFrame:
+        daily = data['daily']
+        frame = daily[daily.index.date < self.replay_date]
+
+        # Today's bar is built from the intraday bars replayed so far
+        intraday = self._visible_intraday(data, now)
+        if not intraday.empty:
+            today = pd.DataFrame({
+                'Open': [intraday['Open'].iloc[0]],
+                'High': [intraday['High'].max()],
+                'Low': [intraday['Low'].min()],
+                'Close': [intraday['Close'].iloc[-1]],
+                'Volume': [intraday['Volume'].sum()]
+            }, index=pd.DatetimeIndex([pd.Timestamp(self.replay_date)], name=frame.index.name))
+            frame = pd.concat([frame, today])
+
+        return frame
+
+    @staticmethod
+    def _naive_timestamp(value: DateLike) -> pd.Timestamp:
+        # Replay bars carry no timezone; aware bounds (UTC from the intraday store) are compared as wall-clock
+        timestamp = pd.Timestamp(value)
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+        return timestamp
+
+    @staticmethod
+    def _visible_intraday(data: Dict[str, Any], now: datetime) -> pd.DataFrame:
+        intraday = data['intraday']
+        return intraday[intraday.index <= pd.Timestamp(now)]
+
+    @staticmethod
+    def _resample(frame: pd.DataFrame, interval: str) -> pd.DataFrame:
+        rule = interval.replace('m', 'min') if interval.endswith('m') else interval
+        return frame.resample(rule).agg({
+            'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'
+        }).dropna(subset=['Close'])
+
+    @staticmethod
+    def _apply_period(frame: pd.DataFrame, period: str, intraday: bool) -> pd.DataFrame:
+        if frame.empty or period == 'max':
+            return frame
+
+        match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+        if not match:
+            return frame
+
+        count, unit = int(match.group(1)), match.group(2)
+        days = count * {'d': 1, 'wk': 7, 'mo': 30, 'y': 365}[unit]
+
+        if intraday:
+            # '1d' of intraday bars means the latest session only
+            cutoff = frame.index[-1].normalize() - pd.Timedelta(days=days - 1)
+            return frame[frame.index >= cutoff]
+
+        trading_days = count if unit == 'd' else int(days * 5 / 7)
+        return frame.tail(trading_days)
+
+    def _market_state(self, now: datetime) -> str:
+        if now < self.session_open:
+            return 'PRE'
+        if now < self.session_close:
+            return 'REGULAR'
+        return 'POST'
+
+    def _simulate_latency(self) -> None:
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+
+    @staticmethod
+    def _previous_weekday(day: date) -> date:
+        day -= timedelta(days=1)
+        while day.weekday() >= 5:
+            day -= timedelta(days=1)
+        return day
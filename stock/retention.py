@@ -0,0 +1,196 @@
+import glob
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+# Tables that are pruned, with the column that ages them out and the key that
+# identifies a row when an archive file is rewritten
+ARCHIVE_TABLES = {
+    'stock_daily': {'time_column': 'date', 'key': ['ticker', 'date']},
+    'alert_history': {'time_column': 'sent_at', 'key': ['id']},
+}
+
+# Moving averages need ~90 trading days and the alert ledger the current session
+MIN_HOT_DAYS = {
+    'stock_daily': 180,
+    'alert_history': 7
+}
+
+DEFAULT_HOT_DAYS = {
+    'stock_daily': 730,
+    'alert_history': 180
+}
+
+
+class RetentionManager:
+    """
+    Keeps stock_daily and alert_history to a hot window and moves older rows
+    to monthly Parquet files under archive_dir.
+
+    Rows are archived one calendar month at a time: the month is read, merged
+    into archive_dir/<table>/<YYYY>/<table>-<YYYY-MM>.parquet and only then
+    deleted, inside one transaction. A failed write deletes nothing, and a
+    re-run after a failed delete merges the same rows again by key.
+    """
+
+    def __init__(self, db_manager: Any, archive_dir: str = 'archive',
+                 hot_days: Optional[Dict[str, int]] = None, compression: str = 'zstd'):
+        self.db = db_manager
+        self.archive_dir = archive_dir
+        self.compression = compression
+
+        self.hot_days = dict(DEFAULT_HOT_DAYS)
+        self.hot_days.update(hot_days or {})
+        for table, minimum in MIN_HOT_DAYS.items():
+            if self.hot_days[table] < minimum:
+                logger.warning(f"Hot window for {table} raised from {self.hot_days[table]} to {minimum} days")
+                self.hot_days[table] = minimum
+
+    def run(self, today: Optional[date] = None) -> Dict[str, int]:
+        """Archive and delete every whole month older than each table's hot window."""
+        today = today or date.today()
+        archived = {}
+
+        for table, spec in ARCHIVE_TABLES.items():
+            try:
+                archived[table] = self._archive_table(table, spec, self._cutoff(table, today))
+            except Exception as e:
+                logger.error(f"Retention failed for {table}: {e}")
+                archived[table] = 0
+
+        if archived.get('stock_daily'):
+            # Row counts and earliest dates in the snapshots no longer match
+            self.db.refresh_indicator_snapshots()
+
+        logger.info(f"Retention run archived {archived}")
+        return archived
+
+    def _cutoff(self, table: str, today: date) -> date:
+        # Only whole months are archived, so the cutoff is the first of a month
+        return (today - timedelta(days=self.hot_days[table])).replace(day=1)
+
+    def _archive_table(self, table: str, spec: Dict[str, Any], cutoff: date) -> int:
+        column = spec['time_column']
+        with self.db.connection() as conn:
+            oldest = conn.execute(
+                text(f"SELECT MIN({column}) FROM {table} WHERE {column} < :cutoff"),
+                {"cutoff": self._bound(column, cutoff)}
+            ).scalar()
+
+        if oldest is None:
+            return 0
+
+        if isinstance(oldest, str):
+            oldest = pd.Timestamp(oldest)
+        month = date(oldest.year, oldest.month, 1)
+
+        total = 0
+        while month < cutoff:
+            next_month = (month + timedelta(days=32)).replace(day=1)
+            total += self._archive_month(table, spec, month, next_month)
+            month = next_month
+        return total
+
+    def _archive_month(self, table: str, spec: Dict[str, Any], start: date, end: date) -> int:
+        column = spec['time_column']
+        params = {"start": self._bound(column, start), "end": self._bound(column, end)}
+
+        with self.db.transaction() as conn:
+            frame = pd.read_sql(
+                text(f"SELECT * FROM {table} WHERE {column} >= :start AND {column} < :end"),
+                conn,
+                params=params
+            )
+            if frame.empty:
+                return 0
+
+            path = self._month_path(table, start)
+            self._write_parquet(frame, path, spec['key'])
+
+            conn.execute(text(f"DELETE FROM {table} WHERE {column} >= :start AND {column} < :end"), params)
+
+        logger.info(f"Archived {len(frame)} {table} rows for {start:%Y-%m} to {path}")
+        return len(frame)
+
+    def _write_parquet(self, frame: pd.DataFrame, path: str, key: List[str]) -> None:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("pyarrow is required for Parquet archives")
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        if os.path.exists(path):
+            existing = pd.read_parquet(path)
+            frame = pd.concat([existing, frame], ignore_index=True).drop_duplicates(subset=key, keep='last')
+
+        frame = frame.sort_values(key).reset_index(drop=True)
+
+        tmp_path = f"{path}.tmp"
+        frame.to_parquet(tmp_path, engine='pyarrow', compression=self.compression, index=False)
+        os.replace(tmp_path, path)
+
+    def read_archive(self, table: str, start: Optional[date] = None, end: Optional[date] = None,
+                     tickers: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read archived rows of a table with `start` <= time < `end`, optionally
+        for some tickers only. Only the monthly files overlapping the range are opened.
+        """
+        if table not in ARCHIVE_TABLES:
+            raise ValueError(f"{table} is not archived")
+
+        column = ARCHIVE_TABLES[table]['time_column']
+        frames = []
+
+        for path in sorted(glob.glob(os.path.join(self.archive_dir, table, '*', f'{table}-*.parquet'))):
+            month = datetime.strptime(os.path.basename(path)[len(table) + 1:-len('.parquet')], '%Y-%m').date()
+            next_month = (month + timedelta(days=32)).replace(day=1)
+            if (start is not None and next_month <= start) or (end is not None and month >= end):
+                continue
+
+            filters = [('ticker', 'in', list(tickers))] if tickers else None
+            frames.append(pd.read_parquet(path, filters=filters))
+
+        if not frames:
+            return pd.DataFrame()
+
+        frame = pd.concat(frames, ignore_index=True)
+        times = pd.to_datetime(frame[column])
+        if start is not None:
+            frame = frame[times >= pd.Timestamp(start)]
+        if end is not None:
+            frame = frame[times < pd.Timestamp(end)]
+        return frame.reset_index(drop=True)
+
+    def get_daily_history(self, ticker: str, start: Optional[date] = None, end: Optional[date] = None,
+                          include_archive: bool = True) -> pd.DataFrame:
+        """Daily bars for a ticker from stock_daily, plus archived months when asked."""
+        frame = self.db.get_historical_data(ticker, start=start, end=end)
+
+        if include_archive:
+            archived = self.read_archive('stock_daily', start=start, end=end, tickers=[ticker])
+            if not archived.empty:
+                archived = archived.set_index(pd.DatetimeIndex(archived['date'], name='Date'))
+                archived = archived.rename(columns={
+                    'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close',
+                    'adj_close': 'Adj Close', 'volume': 'Volume'
+                })[['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']]
+                if not frame.empty:
+                    archived = pd.concat([archived, frame])
+                frame = archived[~archived.index.duplicated(keep='last')].sort_index().astype(float)
+
+        return frame
+
+    def _month_path(self, table: str, month: date) -> str:
+        return os.path.join(self.archive_dir, table, f"{month:%Y}", f"{table}-{month:%Y-%m}.parquet")
+
+    @staticmethod
+    def _bound(column: str, day: date) -> Any:
+        return datetime.combine(day, datetime.min.time()) if column == 'sent_at' else day
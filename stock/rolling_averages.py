@@ -0,0 +1,173 @@
+import logging
+import math
+import random
+import threading
+from collections import deque
+from datetime import date
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class _TickerWindow:
+    """Most recent closes of one ticker plus a running sum per window."""
+
+    def __init__(self, periods: List[int], bars: List[Tuple[date, float]]):
+        self.periods = periods
+        self.bars: Deque[Tuple[date, float]] = deque(maxlen=periods[-1])
+        self.sums = {period: 0.0 for period in periods}
+        for bar_date, close in bars:
+            self.append(bar_date, close)
+
+    @property
+    def last_date(self) -> Optional[date]:
+        return self.bars[-1][0] if self.bars else None
+
+    def append(self, bar_date: date, close: float) -> None:
+        for period in self.periods:
+            self.sums[period] += close
+            if len(self.bars) >= period:
+                # The close that drops out of this window
+                self.sums[period] -= self.bars[-period][1]
+        self.bars.append((bar_date, close))
+
+    def replace_last(self, close: float) -> None:
+        delta = close - self.bars[-1][1]
+        for period in self.periods:
+            self.sums[period] += delta
+        self.bars[-1] = (self.bars[-1][0], close)
+
+    def close_on(self, bar_date: date) -> Optional[float]:
+        for stored_date, close in reversed(self.bars):
+            if stored_date == bar_date:
+                return close
+            if stored_date < bar_date:
+                break
+        return None
+
+    def averages(self) -> Dict[int, Optional[float]]:
+        count = len(self.bars)
+        return {
+            period: self.sums[period] / min(count, period) if count else None
+            for period in self.periods
+        }
+
+
+class RollingAverageEngine:
+    """
+    In-memory N-day moving averages kept up to date as daily bars are written.
+
+    Each ticker holds a ring buffer of its last max(periods) closes and a
+    running sum per window, loaded once from stock_daily. A new bar (or a
+    revised bar for the latest date) updates every window in O(1). A bar that
+    changes an older date, such as a split-adjusted full refresh, drops the
+    ticker so it is reloaded from the database on next use.
+    """
+
+    def __init__(self, db_manager: Any, periods: Optional[List[int]] = None, tolerance: float = 1e-6):
+        self.db = db_manager
+        self.periods = sorted(set(periods or [7, 30, 90]))
+        self.tolerance = tolerance
+
+        self._lock = threading.Lock()
+        self._windows: Dict[str, _TickerWindow] = {}
+
+    def load(self, tickers: List[str]) -> int:
+        """Load (or reload) tickers from stock_daily in one query; returns how many had data."""
+        closes = self.db.get_recent_closes(tickers, self.periods[-1])
+
+        with self._lock:
+            for ticker in tickers:
+                if ticker in closes:
+                    self._windows[ticker] = _TickerWindow(self.periods, closes[ticker])
+                else:
+                    self._windows.pop(ticker, None)
+
+        logger.info(f"Rolling averages loaded for {len(closes)}/{len(tickers)} tickers")
+        return len(closes)
+
+    def get_averages(self, tickers: List[str]) -> Dict[str, Dict[int, Optional[float]]]:
+        """Averages for the given tickers, loading any that are not held yet."""
+        with self._lock:
+            missing = [ticker for ticker in tickers if ticker not in self._windows]
+
+        if missing:
+            self.load(missing)
+
+        with self._lock:
+            return {
+                ticker: self._windows[ticker].averages()
+                for ticker in tickers
+                if ticker in self._windows
+            }
+
+    def apply_bars(self, ticker: str, data: pd.DataFrame) -> None:
+        """Fold daily bars that were just committed to stock_daily into the windows."""
+        if data is None or data.empty or 'Close' not in data.columns:
+            return
+
+        dates = pd.DatetimeIndex(data.index).date
+        closes = pd.to_numeric(data['Close'], errors='coerce').tolist()
+
+        with self._lock:
+            window = self._windows.get(ticker)
+            if window is None:
+                # Not loaded yet; the next read loads it with these rows included
+                return
+
+            for bar_date, close in sorted(zip(dates, closes)):
+                if close is None or math.isnan(close):
+                    continue
+
+                last_date = window.last_date
+                if last_date is None or bar_date > last_date:
+                    window.append(bar_date, close)
+                elif bar_date == last_date:
+                    window.replace_last(close)
+                else:
+                    stored = window.close_on(bar_date)
+                    if stored is None or abs(stored - close) > self.tolerance * max(1.0, abs(stored)):
+                        logger.info(f"Historical closes changed for {ticker} - reloading rolling averages")
+                        self._windows.pop(ticker, None)
+                        return
+
+    def invalidate(self, ticker: str) -> None:
+        with self._lock:
+            self._windows.pop(ticker, None)
+
+    def verify(self, sample_size: int = 5) -> Dict[str, Any]:
+        """
+        Compare a random sample of tickers against SQL averages and reload any
+        that drifted.
+        """
+        with self._lock:
+            held = list(self._windows)
+        sample = random.sample(held, min(sample_size, len(held)))
+        if not sample:
+            return {'checked': 0, 'mismatched': []}
+
+        expected = self.db.get_moving_averages(sample, self.periods)
+        with self._lock:
+            actual = {ticker: self._windows[ticker].averages() for ticker in sample if ticker in self._windows}
+
+        mismatched = []
+        for ticker, averages in actual.items():
+            for period in self.periods:
+                want = expected.get(ticker, {}).get(period)
+                got = averages.get(period)
+                if want is None or got is None:
+                    if want != got:
+                        mismatched.append(ticker)
+                        break
+                elif abs(want - got) > self.tolerance * max(1.0, abs(want)):
+                    logger.warning(f"Rolling {period}-day average for {ticker} drifted: {got:.6f} vs SQL {want:.6f}")
+                    mismatched.append(ticker)
+                    break
+
+        if mismatched:
+            self.load(mismatched)
+
+        logger.info(f"Rolling average verification: {len(actual) - len(mismatched)}/{len(actual)} tickers match SQL")
+        return {'checked': len(actual), 'mismatched': mismatched}
@@ -0,0 +1,78 @@
+import logging
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+
+class UnitOfWork:
+    """
+    One database connection shared by every DatabaseManager call made on the
+    opening thread, plus counters for what went over it.
+
+    Statements are cursor executions (an executemany batch counts once).
+    Round trips add the connection checkout ping, commits and rollbacks.
+
+    Until the first write after a commit the unit holds no transaction between
+    reads (see DatabaseManager.connection), so fetching over the network never
+    keeps a read snapshot open.
+
+    Side effects of a write that must only happen once it is durable (cache
+    updates) are registered with after_commit() and run when the next commit
+    succeeds; their rollback counterparts run if the work is rolled back.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.connection: Optional[Connection] = None
+        self.statements = 0
+        self.round_trips = 0
+        self.checkpoints = 0
+        self.db_seconds = 0.0
+        self._started = perf_counter()
+        # Writes since the last commit, and connection() blocks still open
+        self.dirty = False
+        self.open_reads = 0
+        self._on_commit: List[Callable[[], None]] = []
+        self._on_rollback: List[Callable[[], None]] = []
+
+    def record_statement(self, seconds: float) -> None:
+        self.statements += 1
+        self.round_trips += 1
+        self.db_seconds += seconds
+
+    def record_round_trip(self) -> None:
+        self.round_trips += 1
+
+    def after_commit(self, on_commit: Callable[[], None], on_rollback: Optional[Callable[[], None]] = None) -> None:
+        self._on_commit.append(on_commit)
+        if on_rollback is not None:
+            self._on_rollback.append(on_rollback)
+
+    def committed(self) -> None:
+        self.dirty = False
+        callbacks, self._on_commit, self._on_rollback = self._on_commit, [], []
+        self._run(callbacks, 'after-commit')
+
+    def rolled_back(self) -> None:
+        self.dirty = False
+        callbacks, self._on_commit, self._on_rollback = self._on_rollback, [], []
+        self._run(callbacks, 'after-rollback')
+
+    def _run(self, callbacks: List[Callable[[], None]], kind: str) -> None:
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"{self.name} {kind} callback failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'statements': self.statements,
+            'round_trips': self.round_trips,
+            'checkpoints': self.checkpoints,
+            'db_seconds': self.db_seconds,
+            'elapsed_seconds': perf_counter() - self._started
+        }
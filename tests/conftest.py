@@ -0,0 +1,13 @@
+import pytest
+
+from stock.database import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'stocks.db'}")
+    assert manager.connect()
+    assert manager.create_tables()
+    yield manager
+    manager.close()
+
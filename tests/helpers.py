@@ -0,0 +1,41 @@
+import pandas as pd
+
+from stock.providers import MarketDataProvider
+
+
+def daily_bars(start: str, closes) -> pd.DataFrame:
+    """yfinance-style daily frame with one bar per business day from `start`."""
+    closes = [float(close) for close in closes]
+    return pd.DataFrame(
+        {
+            'Open': closes,
+            'High': [close + 1 for close in closes],
+            'Low': [close - 1 for close in closes],
+            'Close': closes,
+            'Adj Close': closes,
+            'Volume': [1000] * len(closes)
+        },
+        index=pd.bdate_range(start, periods=len(closes), name='Date')
+    )
+
+
+class StubProvider(MarketDataProvider):
+    """Provider without data that records which tickers were asked for."""
+
+    name = 'stub'
+
+    def __init__(self):
+        self.history_calls = []
+
+    def get_history(self, ticker, start=None, end=None, period=None, interval='1d', prepost=False):
+        self.history_calls.append(ticker)
+        return pd.DataFrame()
+
+    def download_history(self, tickers, start, end, interval='1d'):
+        return {}
+
+    def get_info(self, ticker):
+        return {}
+
+    def get_quotes(self, tickers):
+        return []
@@ -0,0 +1,113 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from stock.alert_ledger import AlertLedger
+
+
+def alert(ticker, alert_type='7_day'):
+    return {
+        'ticker': ticker,
+        'alert_type': alert_type,
+        'current_price': 90.0,
+        'average_price': 100.0,
+        'absolute_difference': 10.0,
+        'percent_difference': 10.0
+    }
+
+
+class FrozenDatetime(datetime):
+    frozen = None
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.frozen
+
+
+class Clock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+
+@pytest.fixture
+def clock():
+    # 10:00 in Vienna (CET), an hour into the session
+    return Clock(datetime(2026, 1, 15, 9, 0, tzinfo=timezone.utc))
+
+
+@pytest.fixture
+def sent_at(monkeypatch):
+    """Pins the sent_at that save_alerts_to_database stamps on new rows."""
+    monkeypatch.setattr('stock.database.datetime', FrozenDatetime)
+    FrozenDatetime.frozen = datetime(2026, 1, 15, 9, 30)
+    return FrozenDatetime
+
+
+@pytest.fixture
+def ledger(db, clock, sent_at, monkeypatch):
+    ledger = AlertLedger(db)
+    monkeypatch.setattr(ledger, 'session_start', lambda now=None: AlertLedger.session_start(ledger, now or clock.now))
+    db.alert_ledger = ledger
+    return ledger
+
+
+def test_session_starts_at_the_vienna_open():
+    ledger = AlertLedger(None)
+
+    # 08:59 CET still belongs to the previous day's session
+    assert ledger.session_start(datetime(2026, 1, 15, 7, 59, tzinfo=timezone.utc)) == datetime(2026, 1, 14, 8, 0)
+    assert ledger.session_start(datetime(2026, 1, 15, 8, 0, tzinfo=timezone.utc)) == datetime(2026, 1, 15, 8, 0)
+    # Summer time moves the open to 07:00 UTC
+    assert ledger.session_start(datetime(2026, 7, 15, 7, 30, tzinfo=timezone.utc)) == datetime(2026, 7, 15, 7, 0)
+
+
+def test_saved_alerts_are_answered_from_memory(db, ledger, monkeypatch):
+    assert not ledger.already_sent('AAA', '7_day')
+    assert db.save_alerts_to_database([alert('AAA')])
+
+    monkeypatch.setattr(db, 'get_alerts_since', lambda since: pytest.fail('ledger reloaded'))
+    assert ledger.already_sent('AAA', '7_day')
+    assert not ledger.already_sent('AAA', '30_day')
+    assert not ledger.already_sent('BBB', '7_day')
+
+
+def test_loads_the_current_session_from_alert_history(db, clock, sent_at, monkeypatch):
+    sent_at.frozen = datetime(2026, 1, 15, 8, 30)
+    assert db.save_alerts_to_database([alert('AAA')])
+    sent_at.frozen = datetime(2026, 1, 14, 12, 0)
+    assert db.save_alerts_to_database([alert('BBB')])
+
+    ledger = AlertLedger(db)
+    monkeypatch.setattr(ledger, 'session_start', lambda now=None: AlertLedger.session_start(ledger, clock.now))
+    assert ledger.already_sent('AAA', '7_day')
+    assert not ledger.already_sent('BBB', '7_day')
+
+
+def test_crossing_the_session_boundary_clears_the_ledger(db, ledger, clock):
+    assert db.save_alerts_to_database([alert('AAA')])
+    assert ledger.already_sent('AAA', '7_day')
+
+    clock.now = datetime(2026, 1, 16, 8, 0, tzinfo=timezone.utc)
+    assert not ledger.already_sent('AAA', '7_day')
+
+
+def test_rolled_back_alerts_are_not_suppressed(db, ledger):
+    assert not ledger.already_sent('AAA', '7_day')
+
+    with pytest.raises(RuntimeError):
+        with db.unit_of_work('cycle'):
+            assert db.save_alerts_to_database([alert('AAA')])
+            raise RuntimeError('boom')
+
+    assert not ledger.already_sent('AAA', '7_day')
+
+
+def test_failed_load_is_retried(db, ledger, monkeypatch):
+    load = db.get_alerts_since
+    monkeypatch.setattr(db, 'get_alerts_since', lambda since: None)
+    with pytest.raises(RuntimeError):
+        ledger.already_sent('AAA', '7_day')
+
+    monkeypatch.setattr(db, 'get_alerts_since', load)
+    assert not ledger.already_sent('AAA', '7_day')
+
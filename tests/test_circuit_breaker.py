@@ -0,0 +1,122 @@
+import pytest
+
+from stock import circuit_breaker
+from stock.circuit_breaker import TickerCircuitBreaker
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return TickerCircuitBreaker(failure_threshold=2, base_cooldown_seconds=100, max_cooldown_seconds=300)
+
+
+def test_opens_after_consecutive_failures(breaker):
+    breaker.record_failure('AAA', 'timeout')
+    assert breaker.allow('AAA')
+    assert not breaker.is_quarantined('AAA')
+
+    breaker.record_failure('AAA', 'timeout')
+    assert not breaker.allow('AAA')
+    assert breaker.is_quarantined('AAA')
+    assert breaker.get_quarantined()[0]['last_error'] == 'timeout'
+
+
+def test_success_resets_the_failure_count(breaker):
+    breaker.record_failure('AAA')
+    breaker.record_success('AAA')
+    breaker.record_failure('AAA')
+    assert breaker.allow('AAA')
+
+
+def test_single_half_open_probe_after_cooldown(breaker, clock):
+    breaker.record_failure('AAA')
+    breaker.record_failure('AAA')
+
+    clock.now += 100
+    assert breaker.allow('AAA')
+    # The probe is taken; nobody else gets through until it reports back
+    assert not breaker.allow('AAA')
+    assert breaker.get_quarantined()[0]['state'] == TickerCircuitBreaker.HALF_OPEN
+
+    breaker.record_success('AAA')
+    assert breaker.allow('AAA')
+    assert breaker.get_quarantined() == []
+
+
+def test_failed_probe_doubles_cooldown_up_to_the_cap(breaker, clock):
+    breaker.record_failure('AAA')
+    breaker.record_failure('AAA')
+
+    cooldowns = []
+    for _ in range(3):
+        clock.now += 1000
+        assert breaker.allow('AAA')
+        breaker.record_failure('AAA')
+        cooldowns.append(breaker.get_quarantined()[0]['retry_in_seconds'])
+
+    assert cooldowns == [200, 300, 300]
+
+
+def test_unreported_probe_is_handed_out_again_after_timeout(breaker, clock):
+    breaker.record_failure('AAA')
+    breaker.record_failure('AAA')
+    clock.now += 100
+    assert breaker.allow('AAA')
+
+    clock.now += TickerCircuitBreaker.PROBE_TIMEOUT_SECONDS - 1
+    assert not breaker.allow('AAA')
+    clock.now += 1
+    assert breaker.allow('AAA')
+
+
+def test_is_quarantined_does_not_claim_the_probe(breaker, clock):
+    breaker.record_failure('AAA')
+    breaker.record_failure('AAA')
+    clock.now += 100
+
+    assert breaker.is_quarantined('AAA')
+    assert breaker.get_quarantined()[0]['state'] == TickerCircuitBreaker.OPEN
+    assert breaker.allow('AAA')
+
+
+def test_state_survives_restart_and_probe_reopens(tmp_path, clock):
+    path = str(tmp_path / 'breaker.json')
+    breaker = TickerCircuitBreaker(path=path, failure_threshold=1, base_cooldown_seconds=100)
+    breaker.record_failure('AAA')
+    clock.now += 100
+    assert breaker.allow('AAA')
+
+    # Restarted mid-probe: the probe is treated as lost and the circuit as open
+    restored = TickerCircuitBreaker(path=path, failure_threshold=1, base_cooldown_seconds=100)
+    assert restored.get_quarantined()[0]['state'] == TickerCircuitBreaker.OPEN
+    assert restored.allow('AAA')
+
+
+def test_intraday_sync_leaves_the_probe_to_the_price_fetch(db, breaker, clock):
+    from stock.data_fetcher import StockDataFetcher
+    from tests.helpers import StubProvider
+
+    provider = StubProvider()
+    fetcher = StockDataFetcher(provider=provider, circuit_breaker=breaker, intraday_store=db,
+                               requests_per_second=1000, burst=1000)
+    breaker.record_failure('AAA')
+    breaker.record_failure('AAA')
+    clock.now += 100
+
+    assert fetcher.sync_intraday_bars(['AAA', 'BBB']) == {'BBB': 0}
+    assert provider.history_calls == ['BBB']
+    assert breaker.allow('AAA')
@@ -0,0 +1,83 @@
+import os
+
+import pandas as pd
+import pytest
+
+from stock.history_cache import ParquetHistoryCache
+from tests.helpers import daily_bars
+
+
+@pytest.fixture
+def cache(db, tmp_path):
+    cache = ParquetHistoryCache(db, str(tmp_path / 'history'))
+    db.history_cache = cache
+    return cache
+
+
+def test_committed_writes_build_a_trusted_file(db, cache):
+    assert db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2, 3]))
+    assert cache.is_trusted('AAA')
+
+    assert db.insert_historical_data('AAA', daily_bars('2026-01-08', [4]))
+    frame = cache.read('AAA')
+    assert frame['Close'].tolist() == [1.0, 2.0, 3.0, 4.0]
+    pd.testing.assert_frame_equal(frame, db.get_historical_data('AAA', use_cache=False), check_freq=False)
+
+
+def test_reads_are_filtered_by_range(db, cache):
+    db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2, 3, 4]))
+
+    frame = cache.read('AAA', start=pd.Timestamp('2026-01-06').date(), end=pd.Timestamp('2026-01-08').date())
+    assert frame['Close'].tolist() == [2.0, 3.0]
+    assert cache.recent_closes(['AAA', 'ZZZ'], 2) == {
+        'AAA': [(pd.Timestamp('2026-01-07').date(), 3.0), (pd.Timestamp('2026-01-08').date(), 4.0)]
+    }
+
+
+def test_file_is_written_only_at_the_checkpoint(db, cache):
+    with db.unit_of_work('cycle'):
+        db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2]))
+        assert not cache.is_trusted('AAA')
+        assert db.checkpoint()
+        assert cache.is_trusted('AAA')
+
+
+def test_rollback_untrusts_the_file(db, cache):
+    db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2]))
+
+    with pytest.raises(RuntimeError):
+        with db.unit_of_work('cycle'):
+            db.insert_historical_data('AAA', daily_bars('2026-01-07', [3]))
+            raise RuntimeError('boom')
+
+    assert not cache.is_trusted('AAA')
+    assert cache.read('AAA') is None
+    assert len(db.get_historical_data('AAA')) == 2
+
+
+def test_reconcile_matches_rebuilds_and_removes(db, cache, tmp_path):
+    db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2]))
+    db.insert_historical_data('BBB', daily_bars('2026-01-05', [5, 6]))
+
+    restarted = ParquetHistoryCache(db, cache.path)
+    # A row written while the cache was not attached makes BBB's file stale
+    db.history_cache = None
+    db.insert_historical_data('BBB', daily_bars('2026-01-07', [7]))
+    # And a file without any rows behind it
+    os.replace(restarted._file('BBB'), restarted._file('OLD'))
+    restarted._write_file('BBB', daily_bars('2026-01-05', [5, 6]))
+
+    summary = restarted.reconcile()
+    assert summary == {'checked': 3, 'matched': 1, 'rebuilt': 1, 'removed': 1}
+    assert restarted.read('BBB')['Close'].tolist() == [5.0, 6.0, 7.0]
+    assert not os.path.exists(restarted._file('OLD'))
+
+
+def test_unreadable_file_falls_back_to_the_database(db, cache):
+    db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2]))
+    with open(cache._file('AAA'), 'wb') as file:
+        file.write(b'not parquet')
+
+    assert cache.read('AAA') is None
+    assert not cache.is_trusted('AAA')
+    assert db.get_historical_data('AAA')['Close'].tolist() == [1.0, 2.0]
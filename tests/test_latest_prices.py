@@ -0,0 +1,24 @@
+import pytest
+
+
+def test_malformed_snapshot_only_skips_its_ticker(db):
+    prices = {
+        'AAA': {'price': 10.5, 'volume': 100, 'market_state': 'REGULAR'},
+        'BAD': {'price': 'n/a'},
+        'CCC': {'price': 3.25, 'market_cap': 'huge'},
+        'DDD': None
+    }
+
+    assert db.update_latest_prices(prices)
+
+    assert db.get_current_price('AAA') == pytest.approx(10.5)
+    assert db.get_current_price('BAD') is None
+    assert db.get_current_price('CCC') is None
+    assert db.get_current_price('DDD') is None
+
+
+def test_upsert_overwrites_previous_snapshot(db):
+    assert db.update_latest_prices({'AAA': {'price': 1.0}})
+    assert db.update_latest_prices({'AAA': {'price': 2.0}})
+
+    assert db.get_current_price('AAA') == pytest.approx(2.0)
@@ -0,0 +1,124 @@
+from datetime import datetime, time, timezone
+
+import pytest
+
+from stock.market_hours import MarketCalendar
+
+INFO = {
+    'AAA': {'exchange': 'NMS'},
+    'VIE': {'exchange': 'VIE'},
+    'TZ': {'exchange': 'XYZ', 'exchangeTimezoneName': 'Asia/Tokyo'},
+    'UNK': {}
+}
+
+
+class Clock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def clock():
+    # Wednesday 15:00 UTC: 10:00 in New York, 16:00 in Vienna
+    return Clock(utc(2026, 1, 14, 15, 0))
+
+
+@pytest.fixture
+def calendar(clock):
+    return MarketCalendar(lambda ticker: INFO[ticker], clock=clock)
+
+
+def test_sessions_come_from_exchange_code_or_timezone(calendar):
+    assert calendar.get_session('AAA').timezone == 'America/New_York'
+    assert calendar.get_session('TZ').timezone == 'Asia/Tokyo'
+    assert calendar.get_session('TZ').open == time(9, 0)
+    assert calendar.get_session('UNK') is None
+
+
+def test_unresolved_session_is_polled_and_retried():
+    lookups = []
+
+    def loader(ticker):
+        lookups.append(ticker)
+        raise ConnectionError('no info')
+
+    calendar = MarketCalendar(loader, clock=lambda: utc(2026, 1, 17, 12, 0))
+    assert calendar.plan(['AAA']) == {'open': ['AAA'], 'final': [], 'closed': []}
+    calendar.plan(['AAA'])
+    assert lookups == ['AAA', 'AAA']
+
+
+def test_regular_and_extended_hours(calendar, clock):
+    session = calendar.get_session('AAA')
+    assert calendar.is_open(session)
+    assert not calendar.is_open(session, utc(2026, 1, 14, 13, 0))  # 08:00 New York
+    assert not calendar.is_open(session, utc(2026, 1, 17, 15, 0))  # Saturday
+
+    extended = MarketCalendar(lambda ticker: INFO[ticker], extended_hours=True, clock=clock)
+    assert extended.is_open(session, utc(2026, 1, 14, 13, 0))
+    assert not extended.is_open(session, utc(2026, 1, 15, 1, 0))  # 20:00 New York
+
+
+def test_one_final_refresh_after_the_close(calendar, clock):
+    assert calendar.plan(['AAA', 'VIE'])['open'] == ['AAA', 'VIE']
+
+    clock.now = utc(2026, 1, 14, 17, 0)  # Vienna closed at 16:30 UTC
+    assert calendar.plan(['AAA', 'VIE']) == {'open': ['AAA'], 'final': ['VIE'], 'closed': []}
+    assert calendar.plan(['AAA', 'VIE']) == {'open': ['AAA'], 'final': [], 'closed': ['VIE']}
+
+
+def test_next_session_allows_another_final_refresh(calendar, clock):
+    calendar.plan(['VIE'])
+    clock.now = utc(2026, 1, 14, 17, 0)
+    assert calendar.plan(['VIE'])['final'] == ['VIE']
+
+    clock.now = utc(2026, 1, 15, 9, 0)
+    assert calendar.plan(['VIE'])['open'] == ['VIE']
+    clock.now = utc(2026, 1, 15, 17, 0)
+    assert calendar.plan(['VIE'])['final'] == ['VIE']
+    assert calendar.plan(['VIE'])['closed'] == ['VIE']
+
+
+def test_ticker_first_seen_while_closed_is_refreshed_once(calendar, clock):
+    clock.now = utc(2026, 1, 17, 12, 0)
+    assert calendar.plan(['AAA'])['final'] == ['AAA']
+    assert calendar.plan(['AAA'])['closed'] == ['AAA']
+
+
+def test_post_close_refresh_can_be_disabled(clock):
+    calendar = MarketCalendar(lambda ticker: INFO[ticker], post_close_refresh=False, clock=clock)
+    calendar.plan(['VIE'])
+    clock.now = utc(2026, 1, 14, 17, 0)
+    assert calendar.plan(['VIE'])['closed'] == ['VIE']
+
+
+def test_closed_state_during_regular_hours_marks_a_holiday(calendar, clock):
+    session = calendar.get_session('AAA')
+
+    calendar.record_market_state('AAA', 'REGULAR')
+    assert calendar.is_open(session)
+
+    calendar.record_market_state('AAA', 'CLOSED')
+    assert not calendar.is_open(session)
+    # Only for that local day
+    assert calendar.is_open(session, utc(2026, 1, 15, 15, 0))
+
+
+def test_closed_state_outside_regular_hours_is_ignored(calendar, clock):
+    session = calendar.get_session('AAA')
+    clock.now = utc(2026, 1, 14, 22, 0)  # 17:00 New York
+    calendar.record_market_state('AAA', 'CLOSED')
+
+    assert calendar.is_open(session, utc(2026, 1, 14, 15, 0))
+
+
+def test_naive_clock_is_exchange_local_time():
+    calendar = MarketCalendar(lambda ticker: INFO[ticker], clock=lambda: datetime(2026, 1, 14, 10, 0))
+    assert calendar.plan(['AAA', 'VIE'])['open'] == ['AAA', 'VIE']
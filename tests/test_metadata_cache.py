@@ -0,0 +1,147 @@
+import pytest
+
+from stock import metadata_cache
+from stock.metadata_cache import TickerMetadataCache, classify_field
+
+INFO = {'sector': 'Auto', 'marketCap': 1000, 'bid': 10.0, 'regularMarketTime': 1}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(metadata_cache.time, 'time', clock)
+    return clock
+
+
+class Loader:
+    def __init__(self, info=None):
+        self.info = dict(info or INFO)
+        self.calls = []
+        self.error = None
+
+    def __call__(self, ticker):
+        self.calls.append(ticker)
+        if self.error is not None:
+            raise self.error
+        return dict(self.info)
+
+
+def test_field_classes():
+    assert classify_field('sector') == 'static'
+    assert classify_field('marketCap') == 'market_cap'
+    assert classify_field('bid') == 'quote'
+    assert classify_field('somethingNew') == 'quote'
+
+
+def test_classes_expire_independently(clock):
+    cache = TickerMetadataCache(ttl_seconds={'static': 100, 'market_cap': 50, 'quote': 10})
+    loader = Loader()
+
+    assert cache.get_info('AAA', ['static'], loader) == {'sector': 'Auto'}
+    clock.now += 20
+    assert cache.get_info('AAA', ['static', 'market_cap'], loader) == {'sector': 'Auto', 'marketCap': 1000}
+    assert loader.calls == ['AAA']
+
+    cache.get_info('AAA', ['quote'], loader)
+    assert loader.calls == ['AAA', 'AAA']
+    assert cache.stats()['hits'] == 1
+
+
+def test_stale_entries_are_served_when_the_loader_fails(clock):
+    cache = TickerMetadataCache(ttl_seconds={'quote': 10})
+    loader = Loader()
+    cache.get_info('AAA', ['quote'], loader)
+
+    clock.now += 60
+    loader.error = ConnectionError('rate limited')
+    assert cache.get_info('AAA', ['quote'], loader)['bid'] == 10.0
+
+    with pytest.raises(ConnectionError):
+        cache.get_info('BBB', ['quote'], loader)
+
+
+def test_entries_survive_a_restart(tmp_path, clock):
+    path = str(tmp_path / 'metadata.db')
+    cache = TickerMetadataCache(path)
+    cache.get_info('AAA', ['static'], Loader())
+    cache.close()
+
+    loader = Loader()
+    assert TickerMetadataCache(path).get_info('AAA', ['static'], loader) == {'sector': 'Auto'}
+    assert loader.calls == []
+
+
+def test_least_recently_used_ticker_is_evicted(clock):
+    cache = TickerMetadataCache(max_tickers=2, touch_flush_seconds=3600)
+    loader = Loader()
+    for ticker in ['AAA', 'BBB']:
+        cache.get_info(ticker, ['static'], loader)
+        clock.now += 1
+
+    # Only held in memory so far, but still counted when evicting
+    cache.get_info('AAA', ['static'], loader)
+    clock.now += 1
+    cache.get_info('CCC', ['static'], loader)
+
+    assert cache.stats()['evictions'] == 1
+    loader.calls.clear()
+    cache.get_info('AAA', ['static'], loader)
+    cache.get_info('BBB', ['static'], loader)
+    assert loader.calls == ['BBB']
+
+
+def test_hits_do_not_commit_until_the_flush_interval(clock):
+    cache = TickerMetadataCache(touch_flush_seconds=60)
+    loader = Loader()
+    cache.get_info('AAA', ['static'], loader)
+
+    commits = []
+    connection = cache._conn
+
+    class CountingConnection:
+        def commit(self):
+            commits.append(1)
+            connection.commit()
+
+        def __getattr__(self, name):
+            return getattr(connection, name)
+
+    cache._conn = CountingConnection()
+    for _ in range(100):
+        cache.get_info('AAA', ['static'], loader)
+    assert commits == []
+
+    clock.now += 60
+    cache.get_info('AAA', ['static'], loader)
+    assert commits == [1]
+    last_access = connection.execute("SELECT MAX(last_access) FROM ticker_metadata").fetchone()[0]
+    assert last_access == clock.now
+
+
+def test_pending_access_times_are_written_on_close(tmp_path, clock):
+    path = str(tmp_path / 'metadata.db')
+    cache = TickerMetadataCache(path, touch_flush_seconds=3600)
+    cache.get_info('AAA', ['static'], Loader())
+    clock.now += 10
+    cache.get_info('AAA', ['static'], Loader())
+    cache.close()
+
+    reopened = TickerMetadataCache(path)
+    assert reopened._conn.execute("SELECT MAX(last_access) FROM ticker_metadata").fetchone()[0] == clock.now
+
+
+def test_invalidate_forces_a_reload(clock):
+    cache = TickerMetadataCache()
+    loader = Loader()
+    cache.get_info('AAA', ['static'], loader)
+    cache.invalidate('AAA')
+    cache.get_info('AAA', ['static'], loader)
+    assert loader.calls == ['AAA', 'AAA']
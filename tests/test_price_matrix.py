@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock.history_cache import ParquetHistoryCache
+from tests.helpers import daily_bars
+
+
+@pytest.fixture
+def stored(db):
+    db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2, 3, 4]))
+    db.insert_historical_data('BBB', daily_bars('2026-01-07', [10, 20]))
+    return db
+
+
+def test_matrix_is_float_dates_by_tickers(stored):
+    matrix = stored.get_price_matrix(['BBB', 'AAA', 'ZZZ'], days=3)
+
+    assert list(matrix.columns) == ['BBB', 'AAA', 'ZZZ']
+    assert isinstance(matrix.index, pd.DatetimeIndex)
+    assert matrix.index.is_monotonic_increasing
+    assert (matrix.dtypes == np.float64).all()
+
+    # Last three bars of AAA; BBB only has two, ZZZ none
+    assert list(matrix.index) == list(pd.bdate_range('2026-01-06', periods=3))
+    assert matrix['AAA'].tolist() == [2.0, 3.0, 4.0]
+    assert matrix['BBB'].isna().tolist() == [True, False, False]
+    assert matrix['ZZZ'].isna().all()
+
+
+def test_matrix_field_selection(stored):
+    matrix = stored.get_price_matrix(['AAA'], days=1, field='high')
+    assert matrix['AAA'].tolist() == [5.0]
+
+    with pytest.raises(ValueError):
+        stored.get_price_matrix(['AAA'], days=1, field='Close; DROP TABLE stock_daily')
+
+
+def test_matrix_without_rows_or_days(stored):
+    assert stored.get_price_matrix(['ZZZ'], days=5)['ZZZ'].isna().all()
+    assert stored.get_price_matrix(['AAA'], days=0).empty
+
+
+def test_matrix_matches_with_history_cache(stored, tmp_path):
+    expected = stored.get_price_matrix(['AAA', 'BBB'], days=3)
+
+    cache = ParquetHistoryCache(stored, str(tmp_path / 'history'))
+    stored.history_cache = cache
+    cache.reconcile(['AAA'])
+    assert cache.is_trusted('AAA') and not cache.is_trusted('BBB')
+
+    matrix = stored.get_price_matrix(['AAA', 'BBB'], days=3)
+    pd.testing.assert_frame_equal(matrix, expected, check_names=False, check_freq=False)
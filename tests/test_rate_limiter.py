@@ -0,0 +1,66 @@
+import pytest
+
+from stock import rate_limiter
+from stock.rate_limiter import TokenBucketRateLimiter
+
+
+class FakeTime:
+    """monotonic() and sleep() that only advance when the limiter sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', fake.monotonic)
+    monkeypatch.setattr(rate_limiter.time, 'sleep', fake.sleep)
+    return fake
+
+
+def test_rejects_invalid_configuration_and_requests(fake_time):
+    with pytest.raises(ValueError):
+        TokenBucketRateLimiter(0)
+
+    limiter = TokenBucketRateLimiter(2, capacity=3)
+    with pytest.raises(ValueError):
+        limiter.acquire(4)
+
+
+def test_capacity_defaults_to_rate_but_at_least_one(fake_time):
+    assert TokenBucketRateLimiter(5).capacity == 5
+    assert TokenBucketRateLimiter(0.5).capacity == 1
+
+
+def test_burst_then_paced_at_rate(fake_time):
+    limiter = TokenBucketRateLimiter(2, capacity=3)
+
+    assert [limiter.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire() == pytest.approx(0.5)
+    assert limiter.acquire() == pytest.approx(0.5)
+    assert fake_time.now == pytest.approx(1.0)
+
+
+def test_refill_is_capped_at_capacity(fake_time):
+    limiter = TokenBucketRateLimiter(2, capacity=3)
+    for _ in range(3):
+        limiter.acquire()
+
+    fake_time.now += 60
+    assert [limiter.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_acquire_whole_capacity(fake_time):
+    limiter = TokenBucketRateLimiter(2, capacity=3)
+    limiter.acquire()
+
+    assert limiter.acquire(3) == pytest.approx(0.5)
@@ -0,0 +1,99 @@
+import pytest
+
+from stock.rolling_averages import RollingAverageEngine
+from tests.helpers import daily_bars
+
+PERIODS = [2, 3]
+
+
+@pytest.fixture
+def engine(db):
+    engine = RollingAverageEngine(db, PERIODS)
+    db.rolling_averages = engine
+    return engine
+
+
+def sql_averages(db, ticker):
+    return db.get_moving_averages([ticker], PERIODS)[ticker]
+
+
+def test_loads_windows_from_stock_daily(db, engine):
+    db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2, 3, 4]))
+
+    assert engine.get_averages(['AAA', 'ZZZ']) == {'AAA': {2: pytest.approx(3.5), 3: pytest.approx(3.0)}}
+
+
+def test_new_bars_slide_the_windows(db, engine):
+    db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2, 3]))
+    engine.get_averages(['AAA'])
+
+    db.insert_historical_data('AAA', daily_bars('2026-01-08', [10]))
+
+    assert 'AAA' in engine._windows
+    assert engine.get_averages(['AAA'])['AAA'] == {2: pytest.approx(6.5), 3: pytest.approx(5.0)}
+    assert engine.get_averages(['AAA'])['AAA'] == pytest.approx(sql_averages(db, 'AAA'))
+
+
+def test_revised_latest_bar_replaces_it(db, engine):
+    db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2, 3]))
+    engine.get_averages(['AAA'])
+
+    db.insert_historical_data('AAA', daily_bars('2026-01-07', [9]))
+
+    assert 'AAA' in engine._windows
+    assert engine.get_averages(['AAA'])['AAA'] == {2: pytest.approx(5.5), 3: pytest.approx(4.0)}
+
+
+def test_unchanged_older_bar_keeps_the_window(db, engine):
+    db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2, 3]))
+    engine.get_averages(['AAA'])
+
+    db.insert_historical_data('AAA', daily_bars('2026-01-06', [2, 3, 4]))
+
+    assert 'AAA' in engine._windows
+    assert engine.get_averages(['AAA'])['AAA'] == pytest.approx(sql_averages(db, 'AAA'))
+
+
+def test_revised_older_bar_reloads_from_the_database(db, engine):
+    db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2, 3]))
+    engine.get_averages(['AAA'])
+
+    # A split-adjusted refresh rewrites earlier closes
+    db.insert_historical_data('AAA', daily_bars('2026-01-05', [0.5, 1, 1.5]))
+
+    assert 'AAA' not in engine._windows
+    assert engine.get_averages(['AAA'])['AAA'] == {2: pytest.approx(1.25), 3: pytest.approx(1.0)}
+
+
+def test_bars_follow_the_unit_of_work_commit(db, engine):
+    db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2, 3]))
+    engine.get_averages(['AAA'])
+
+    with db.unit_of_work('cycle'):
+        db.insert_historical_data('AAA', daily_bars('2026-01-08', [10]))
+        assert engine._windows['AAA'].last_date.isoformat() == '2026-01-07'
+        assert db.checkpoint()
+        assert engine._windows['AAA'].last_date.isoformat() == '2026-01-08'
+
+
+def test_rollback_drops_the_window(db, engine):
+    db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2, 3]))
+    engine.get_averages(['AAA'])
+
+    with pytest.raises(RuntimeError):
+        with db.unit_of_work('cycle'):
+            db.insert_historical_data('AAA', daily_bars('2026-01-08', [10]))
+            raise RuntimeError('boom')
+
+    assert 'AAA' not in engine._windows
+    assert engine.get_averages(['AAA'])['AAA'] == {2: pytest.approx(2.5), 3: pytest.approx(2.0)}
+
+
+def test_verify_reloads_drifted_tickers(db, engine):
+    db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2, 3]))
+    db.insert_historical_data('BBB', daily_bars('2026-01-05', [4, 5, 6]))
+    engine.get_averages(['AAA', 'BBB'])
+    engine._windows['AAA'].sums[2] += 1
+
+    assert engine.verify(sample_size=10) == {'checked': 2, 'mismatched': ['AAA']}
+    assert engine.verify(sample_size=10) == {'checked': 2, 'mismatched': []}
@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+
+from stock.single_flight import SingleFlight
+
+
+def run_followers(flight, key, fn, count):
+    """Start `count` threads calling flight.do(key, fn); returns (threads, outcomes)."""
+    outcomes = []
+    lock = threading.Lock()
+
+    def follow():
+        try:
+            outcome = flight.do(key, fn)
+        except Exception as e:
+            outcome = e
+        with lock:
+            outcomes.append(outcome)
+
+    threads = [threading.Thread(target=follow) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def wait_for_followers(flight, count):
+    for _ in range(500):
+        if flight.stats()['deduplicated'] >= count:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError('followers never joined the in-flight call')
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return 'quote'
+
+    leader = threading.Thread(target=lambda: flight.do('AAA', fetch))
+    leader.start()
+    while flight.stats()['in_flight'] == 0:
+        threading.Event().wait(0.001)
+
+    threads, outcomes = run_followers(flight, 'AAA', fetch, 3)
+    wait_for_followers(flight, 3)
+    release.set()
+    for thread in [leader] + threads:
+        thread.join(5)
+
+    assert calls == [1]
+    assert outcomes == [('quote', True)] * 3
+    assert flight.stats() == {'executed': 1, 'deduplicated': 3, 'dedup_rate': 0.75, 'in_flight': 0}
+
+
+def test_followers_receive_the_leaders_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        raise ConnectionError('rate limited')
+
+    leader_errors = []
+
+    def lead():
+        with pytest.raises(ConnectionError) as error:
+            flight.do('AAA', fetch)
+        leader_errors.append(error.value)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    while flight.stats()['in_flight'] == 0:
+        threading.Event().wait(0.001)
+
+    threads, outcomes = run_followers(flight, 'AAA', fetch, 2)
+    wait_for_followers(flight, 2)
+    release.set()
+    for thread in [leader] + threads:
+        thread.join(5)
+
+    assert len(leader_errors) == 1
+    assert [type(outcome) for outcome in outcomes] == [ConnectionError, ConnectionError]
+
+
+def test_nothing_is_cached_after_completion():
+    flight = SingleFlight()
+    results = iter([1, 2])
+
+    assert flight.do('AAA', lambda: next(results)) == (1, False)
+    assert flight.do('AAA', lambda: next(results)) == (2, False)
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight()
+    assert flight.do('AAA', lambda: 'a') == ('a', False)
+    assert flight.do('BBB', lambda: 'b') == ('b', False)
+    assert flight.stats()['deduplicated'] == 0
@@ -0,0 +1,58 @@
+import sqlite3
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import text
+
+from stock.database import DatabaseManager
+
+from tests.helpers import daily_bars
+
+
+def test_temporal_columns_round_trip_as_python_objects(db):
+    db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2]))
+    db.update_latest_prices({'AAA': {'price': 2.0, 'timestamp': datetime(2026, 1, 6, 15, 30, 1, 250000)}})
+
+    with db.connection() as conn:
+        dates = [row[0] for row in conn.execute(text("SELECT date FROM stock_daily ORDER BY date"))]
+        latest = conn.execute(text("SELECT timestamp, fetched_at FROM stock_latest")).fetchone()
+        first = conn.execute(
+            text("SELECT close FROM stock_daily WHERE ticker = :ticker AND date >= :start"),
+            {"ticker": 'AAA', "start": date(2026, 1, 6)}
+        ).scalar()
+
+    assert dates == [date(2026, 1, 5), date(2026, 1, 6)]
+    assert latest[0] == datetime(2026, 1, 6, 15, 30, 1, 250000)
+    assert isinstance(latest[1], datetime)
+    assert first == pytest.approx(2.0)
+
+
+def test_computed_columns_stay_text(db):
+    db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2]))
+
+    with db.connection() as conn:
+        assert conn.execute(text("SELECT MAX(date) FROM stock_daily")).scalar() == '2026-01-06'
+
+
+def test_text_columns_are_not_parsed(db):
+    db.add_company_to_watchlist('AAA', company_name='2026-01-05', notes='2026-01-05')
+
+    watchlist = db.get_watchlist()
+    assert watchlist[0]['company_name'] == '2026-01-05'
+    assert watchlist[0]['notes'] == '2026-01-05'
+    assert isinstance(watchlist[0]['added_at'], datetime)
+
+
+def test_sqlite3_module_state_is_untouched(tmp_path):
+    # Other sqlite3 users (the metadata cache, libraries) keep their own behaviour
+    adapters = dict(sqlite3.adapters)
+    converters = dict(sqlite3.converters)
+
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'other.db'}")
+    assert manager.connect()
+    assert manager.create_tables()
+    manager.insert_historical_data('AAA', daily_bars('2026-01-05', [1]))
+    manager.close()
+
+    assert sqlite3.adapters == adapters
+    assert sqlite3.converters == converters
@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from tests.helpers import daily_bars
+
+
+def run_in_thread(target):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(target()))
+    thread.start()
+    thread.join()
+    return results[0]
+
+
+def test_foreign_commit_between_read_and_write(db):
+    # The real-time cycle reads the watchlist, fetches over the network while
+    # other threads commit, and only then writes
+    db.add_company_to_watchlist('AAA')
+
+    with db.unit_of_work('cycle'):
+        assert db.get_all_tickers() == ['AAA']
+
+        assert run_in_thread(lambda: db.add_company_to_watchlist('BBB'))
+        assert run_in_thread(lambda: db.insert_historical_data('BBB', daily_bars('2026-01-05', [5, 6])))
+
+        assert db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2, 3]))
+        assert db.update_latest_prices({'AAA': {'price': 3.0}})
+        assert db.checkpoint()
+
+    assert len(db.get_historical_data('AAA', use_cache=False)) == 3
+    assert db.get_current_price('AAA') == pytest.approx(3.0)
+
+
+def test_writes_commit_at_checkpoint(db):
+    with db.unit_of_work('cycle'):
+        db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2]))
+        assert run_in_thread(lambda: len(db.get_historical_data('AAA', use_cache=False))) == 0
+
+        assert db.checkpoint()
+        assert run_in_thread(lambda: len(db.get_historical_data('AAA', use_cache=False))) == 2
+
+
+def test_exception_rolls_back_and_runs_rollback_callbacks(db):
+    calls = []
+
+    with pytest.raises(RuntimeError):
+        with db.unit_of_work('cycle'):
+            db.insert_historical_data('AAA', daily_bars('2026-01-05', [1, 2]))
+            db.after_commit(lambda: calls.append('commit'), lambda: calls.append('rollback'))
+            raise RuntimeError('boom')
+
+    assert calls == ['rollback']
+    assert db.get_historical_data('AAA', use_cache=False).empty
+
+
+def test_commit_callbacks_run_once_per_commit(db):
+    calls = []
+
+    with db.unit_of_work('cycle') as unit:
+        db.after_commit(lambda: calls.append('first'), lambda: calls.append('undo first'))
+        assert calls == []
+        assert db.checkpoint()
+        assert calls == ['first']
+
+        db.after_commit(lambda: calls.append('second'))
+
+    assert calls == ['first', 'second']
+    assert unit.checkpoints == 1
+
+
+def test_failing_callback_does_not_break_the_unit(db):
+    calls = []
+
+    def broken():
+        raise ValueError('callback failed')
+
+    with db.unit_of_work('cycle'):
+        db.after_commit(broken)
+        db.after_commit(lambda: calls.append('after'))
+
+    assert calls == ['after']
+
+
+def test_after_commit_outside_unit_runs_immediately(db):
+    calls = []
+    db.after_commit(lambda: calls.append('commit'), lambda: calls.append('rollback'))
+    assert calls == ['commit']
+
+
+def test_nested_units_join_the_outer_one(db):
+    with db.unit_of_work('outer') as outer:
+        with db.unit_of_work('inner') as inner:
+            assert inner is outer